@@ -0,0 +1,67 @@
+"""
+Cold-start benchmark for the WSGI application.
+
+Each run starts a fresh interpreter, builds the WSGI application, serves one
+/healthz probe and one routed API request, and reports the elapsed times.
+
+Usage (from the backend directory):
+    python benchmarks/startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trucklogix.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+
+from django.test import Client
+client = Client()
+client.get('/healthz', HTTP_HOST='localhost')
+first_probe = time.perf_counter()
+client.get('/api/routes/healthcheck/', HTTP_HOST='localhost')
+first_api = time.perf_counter()
+
+print(json.dumps({
+    'wsgi_loaded_ms': (loaded - start) * 1000,
+    'first_probe_ms': (first_probe - start) * 1000,
+    'first_api_ms': (first_api - start) * 1000,
+    'ors_imported': 'openrouteservice' in sys.modules,
+}))
+"""
+
+
+def run_once():
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND_DIR,
+        env={**os.environ, 'PYTHONPATH': BACKEND_DIR},
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    for metric in ('wsgi_loaded_ms', 'first_probe_ms', 'first_api_ms'):
+        values = [r[metric] for r in results]
+        print(f"{metric:>16}: median {statistics.median(values):7.1f} ms  "
+              f"min {min(values):7.1f} ms  max {max(values):7.1f} ms")
+    print(f"{'ors_imported':>16}: {any(r['ors_imported'] for r in results)}")
+
+
+if __name__ == '__main__':
+    main()
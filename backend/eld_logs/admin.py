@@ -1,5 +1,34 @@
 from django.contrib import admin
-from .models import EldLog, DutyStatusChange
+from django.db.models import Q
+from .models import ArchivedEldLog, EldLog, DutyStatusChange, DutyStatusEvent
+from .pagination import EstimatedCountPaginator
+
+
+class CarrierListFilter(admin.SimpleListFilter):
+    """
+    Carrier filter offering the carriers of the most recent logs, instead of
+    the SELECT DISTINCT over the whole table a field list_filter runs.
+    """
+    title = 'carrier'
+    parameter_name = 'carrier_name'
+    recent_logs = 1000
+    max_choices = 20
+
+    def lookups(self, request, model_admin):
+        recent = (
+            model_admin.get_queryset(request)
+            .order_by('-date', '-id')
+            .values_list('carrier_name', flat=True)[:self.recent_logs]
+        )
+        carriers = list(dict.fromkeys(recent))[:self.max_choices]
+        if self.value() and self.value() not in carriers:
+            carriers.append(self.value())
+        return [(carrier, carrier) for carrier in sorted(carriers)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(carrier_name=self.value())
+        return queryset
 
 
 class DutyStatusChangeInline(admin.TabularInline):
@@ -11,8 +40,13 @@ class DutyStatusChangeInline(admin.TabularInline):
 @admin.register(EldLog)
 class EldLogAdmin(admin.ModelAdmin):
     list_display = ['driver_name', 'date', 'truck_number', 'carrier_name', 'created_at']
-    list_filter = ['date', 'carrier_name', 'created_at']
+    list_filter = ['date', CarrierListFilter]
     search_fields = ['driver_name', 'truck_number', 'carrier_name']
+    search_help_text = 'Start of a driver name, truck number or carrier name (case-sensitive)'
+    ordering = ['-date', '-id']
+    # Avoid full-table counts on large log tables
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [DutyStatusChangeInline]
     readonly_fields = ['created_at', 'updated_at', 'log_sheet']
     
@@ -34,4 +68,45 @@ class EldLogAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
-    )
\ No newline at end of file
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Prefix matches rather than the default icontains, which matches
+        # anywhere in every field and is the slowest search on a large table.
+        # Case-sensitive: istartswith compares UPPER(column), which the
+        # pattern indexes on these columns cannot serve.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = (
+            Q(driver_name__startswith=search_term)
+            | Q(truck_number__startswith=search_term)
+            | Q(carrier_name__startswith=search_term)
+        )
+        return queryset.filter(matches), False
+
+
+@admin.register(ArchivedEldLog)
+class ArchivedEldLogAdmin(admin.ModelAdmin):
+    list_display = ['id', 'driver_name', 'date', 'created_at', 'archived_at']
+    ordering = ['-date', '-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    exclude = ['payload']
+    readonly_fields = ['id', 'driver_name', 'date', 'created_at', 'archived_at']
+
+
+@admin.register(DutyStatusEvent)
+class DutyStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['driver_id', 'timestamp', 'status', 'location', 'received_at']
+    ordering = ['driver_id', '-timestamp']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['received_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Case-sensitive driver id prefix, served by the pattern index on driver_id
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(driver_id__startswith=search_term), False
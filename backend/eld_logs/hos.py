@@ -0,0 +1,381 @@
+"""
+Hours-of-service rule-set engine.
+
+Rule sets are declared as plain data (``RULE_SETS``) and compiled once into
+minute thresholds. ``HosEngine.evaluate`` walks a driver's duty timeline a
+single time, updating the shared totals (on-duty minutes per day, the
+current off-duty run) and a small state record per compiled rule set, and
+reports remaining hours and violations for every rule set together.
+
+All limits are modelled as "may not drive after ...": the driving limit,
+the shift window, the on-duty limit, the 30-minute break and the cycle
+limit are checked as each driving segment is added. Sleeper-berth splits
+and calendar-day Canadian limits are not modelled.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+OFF_DUTY = 'Off Duty'
+SLEEPER_BERTH = 'Sleeper Berth'
+DRIVING = 'Driving'
+ON_DUTY = 'On Duty (Not Driving)'
+
+MINUTES_PER_DAY = 24 * 60
+_UNLIMITED = float('inf')
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Limits in hours; ``None`` means the rule set has no such limit."""
+    label: str
+    driving_hours: float
+    window_hours: float
+    daily_reset_hours: float
+    cycle_hours: float
+    cycle_days: int
+    restart_hours: float
+    on_duty_hours: Optional[float] = None
+    break_after_driving_hours: Optional[float] = None
+    break_minutes: int = 30
+    # Canada cycle 2: at least this much consecutive off-duty time before
+    # passing cycle_long_off_after_hours of on-duty time in the cycle
+    cycle_long_off_hours: Optional[float] = None
+    cycle_long_off_after_hours: Optional[float] = None
+
+
+RULE_SETS: Dict[str, RuleSet] = {
+    'us_property_70_8': RuleSet(
+        label='US property-carrying, 70 hours / 8 days',
+        driving_hours=11, window_hours=14, daily_reset_hours=10,
+        break_after_driving_hours=8,
+        cycle_hours=70, cycle_days=8, restart_hours=34,
+    ),
+    'us_property_60_7': RuleSet(
+        label='US property-carrying, 60 hours / 7 days',
+        driving_hours=11, window_hours=14, daily_reset_hours=10,
+        break_after_driving_hours=8,
+        cycle_hours=60, cycle_days=7, restart_hours=34,
+    ),
+    'us_short_haul': RuleSet(
+        label='US short-haul exception (150 air-miles), 70 hours / 8 days',
+        driving_hours=11, window_hours=14, daily_reset_hours=10,
+        cycle_hours=70, cycle_days=8, restart_hours=34,
+    ),
+    'canada_cycle_1': RuleSet(
+        label='Canada south of 60°N, cycle 1 (70 hours / 7 days)',
+        driving_hours=13, on_duty_hours=14, window_hours=16, daily_reset_hours=8,
+        cycle_hours=70, cycle_days=7, restart_hours=36,
+    ),
+    'canada_cycle_2': RuleSet(
+        label='Canada south of 60°N, cycle 2 (120 hours / 14 days)',
+        driving_hours=13, on_duty_hours=14, window_hours=16, daily_reset_hours=8,
+        cycle_hours=120, cycle_days=14, restart_hours=72,
+        cycle_long_off_hours=24, cycle_long_off_after_hours=70,
+    ),
+}
+
+# (start_minute, end_minute, status) with minutes counted from midnight of day 0
+Segment = Tuple[int, int, str]
+
+
+class _CompiledRuleSet:
+    __slots__ = (
+        'name', 'label', 'driving', 'window', 'on_duty', 'daily_reset', 'break_after',
+        'break_length', 'cycle', 'cycle_days', 'restart', 'long_off', 'long_off_after',
+    )
+
+    def __init__(self, name: str, rule: RuleSet):
+        def minutes(hours):
+            return _UNLIMITED if hours is None else round(hours * 60)
+
+        self.name = name
+        self.label = rule.label
+        self.driving = minutes(rule.driving_hours)
+        self.window = minutes(rule.window_hours)
+        self.on_duty = minutes(rule.on_duty_hours)
+        self.daily_reset = minutes(rule.daily_reset_hours)
+        self.break_after = minutes(rule.break_after_driving_hours)
+        self.break_length = rule.break_minutes
+        self.cycle = minutes(rule.cycle_hours)
+        self.cycle_days = rule.cycle_days
+        self.restart = minutes(rule.restart_hours)
+        self.long_off = minutes(rule.cycle_long_off_hours)
+        self.long_off_after = minutes(rule.cycle_long_off_after_hours)
+
+
+class _State:
+    """Per-rule-set counters carried through the pass."""
+    __slots__ = (
+        'shift_start', 'shift_driving', 'shift_on_duty', 'driving_since_break',
+        'cycle_start', 'cycle_start_total', 'prior', 'last_long_off', 'violations', 'flagged',
+    )
+
+    def __init__(self, prior_minutes: float):
+        self.shift_start = None
+        self.shift_driving = 0
+        self.shift_on_duty = 0
+        self.driving_since_break = 0
+        # Cycle on-duty time counts from here (moved by a restart)
+        self.cycle_start = 0
+        self.cycle_start_total = 0
+        self.prior = prior_minutes
+        self.last_long_off = None
+        self.violations = []
+        self.flagged = set()
+
+
+class HosEngine:
+    """A fixed group of compiled rule sets, evaluated together."""
+
+    def __init__(self, names: Sequence[str]):
+        unknown = [name for name in names if name not in RULE_SETS]
+        if unknown:
+            raise ValueError(f"Unknown HOS rule sets: {', '.join(unknown)}")
+        self.rules = [_CompiledRuleSet(name, RULE_SETS[name]) for name in names]
+        self.max_cycle_days = max(rule.cycle_days for rule in self.rules)
+
+    def evaluate(self, segments: Iterable[Segment], prior_cycle_hours: float = 0) -> List[Dict]:
+        """
+        Evaluate contiguous, time-ordered segments. ``prior_cycle_hours`` is
+        on-duty time already in the cycle before the first segment.
+
+        Returns one result per rule set, with remaining hours as of the end
+        of the last segment and violations as minute offsets.
+        """
+        tracker = self.tracker(prior_cycle_hours)
+        for start, end, status in segments:
+            tracker.add(start, end, status)
+        return tracker.results()
+
+    def tracker(self, prior_cycle_hours: float = 0) -> 'HosTracker':
+        """A fresh incremental evaluator over these rule sets."""
+        return HosTracker(self, prior_cycle_hours)
+
+    @staticmethod
+    def _rest(rule, state, off_run, non_driving_run, end, total_on_duty):
+        if non_driving_run >= rule.break_length:
+            state.driving_since_break = 0
+        if off_run >= rule.daily_reset:
+            state.shift_start = None
+            state.shift_driving = state.shift_on_duty = 0
+            state.driving_since_break = 0
+            state.flagged -= {'driving_limit', 'window', 'on_duty_limit', 'break'}
+        if off_run >= rule.long_off:
+            state.last_long_off = end
+        if off_run >= rule.restart:
+            state.cycle_start = end
+            state.cycle_start_total = total_on_duty
+            state.prior = 0
+            state.flagged -= {'cycle', 'cycle_long_off'}
+
+    @staticmethod
+    def _cycle_used(rule, state, at, tracker):
+        """On-duty minutes in the rolling cycle ending at minute ``at``."""
+        window_day = at // MINUTES_PER_DAY - rule.cycle_days + 1
+        window_start = window_day * MINUTES_PER_DAY
+        if state.cycle_start >= window_start:
+            return state.prior + tracker.total_on_duty - state.cycle_start_total
+        # The cycle began before the window: older days (and any prior count) have rolled out
+        return tracker.total_on_duty - tracker.day_start_total(window_day)
+
+    def _check_driving(self, rule, state, start, length, cycle_used):
+        end = start + length
+        crossings = (
+            ('driving_limit', start + rule.driving - state.shift_driving),
+            ('window', state.shift_start + rule.window),
+            ('on_duty_limit', start + rule.on_duty - state.shift_on_duty),
+            ('break', start + rule.break_after - state.driving_since_break),
+            ('cycle', start + rule.cycle - cycle_used),
+        )
+        for code, at in crossings:
+            if at < end and code not in state.flagged:
+                self._flag(rule, state, code, max(at, start))
+
+        if (rule.long_off != _UNLIMITED and cycle_used + length > rule.long_off_after
+                and 'cycle_long_off' not in state.flagged
+                and (state.last_long_off is None
+                     or state.last_long_off < end - rule.cycle_days * MINUTES_PER_DAY)):
+            self._flag(rule, state, 'cycle_long_off', max(start + rule.long_off_after - cycle_used, start))
+
+    @staticmethod
+    def _flag(rule, state, code, at):
+        state.flagged.add(code)
+        state.violations.append({'rule': code, 'at_minute': at, 'message': _message(rule, code)})
+
+    def _result(self, rule, state, tracker):
+        now = tracker.now
+        cycle_used = self._cycle_used(rule, state, now, tracker)
+        if tracker.off_run >= rule.restart:
+            cycle_used = 0
+
+        if state.shift_start is None:
+            driving_left, window_left, on_duty_left = rule.driving, rule.window, rule.on_duty
+            until_break = rule.break_after
+        else:
+            driving_left = rule.driving - state.shift_driving
+            window_left = state.shift_start + rule.window - now
+            on_duty_left = rule.on_duty - state.shift_on_duty
+            until_break = rule.break_after - state.driving_since_break
+        cycle_left = rule.cycle - cycle_used
+
+        def hours(minutes):
+            return None if minutes == _UNLIMITED else round(max(minutes, 0) / 60, 2)
+
+        return {
+            'rule_set': rule.name,
+            'label': rule.label,
+            'compliant': not state.violations,
+            'remaining': {
+                'driving_hours': hours(min(driving_left, window_left, on_duty_left, cycle_left, until_break)),
+                'on_duty_hours': hours(min(window_left, on_duty_left, cycle_left)),
+                'cycle_hours': hours(cycle_left),
+                'until_break_hours': hours(until_break),
+            },
+            'used': {
+                'shift_driving_hours': hours(state.shift_driving),
+                'shift_on_duty_hours': hours(state.shift_on_duty),
+                'cycle_hours': hours(cycle_used),
+            },
+            # Copies, so callers can reformat them without touching the tracker's state
+            'violations': [
+                dict(violation) for violation in sorted(state.violations, key=lambda violation: violation['at_minute'])
+            ],
+        }
+
+
+def _message(rule: _CompiledRuleSet, code: str) -> str:
+    if code == 'driving_limit':
+        return f"Driving beyond {rule.driving / 60:g} hours in a shift"
+    if code == 'window':
+        return f"Driving after the {rule.window / 60:g}-hour window"
+    if code == 'on_duty_limit':
+        return f"Driving after {rule.on_duty / 60:g} hours on duty in a shift"
+    if code == 'break':
+        return f"Driving over {rule.break_after / 60:g} hours without a {rule.break_length}-minute break"
+    if code == 'cycle':
+        return f"Driving beyond {rule.cycle / 60:g} on-duty hours in {rule.cycle_days} days"
+    return f"Over {rule.long_off_after / 60:g} cycle hours without {rule.long_off / 60:g} consecutive hours off"
+
+
+class HosTracker:
+    """
+    Incremental evaluation for one driver: ``add`` each segment as it
+    completes (constant work per segment and rule set) and read ``results``
+    at any point. ``HosEngine.evaluate`` is a tracker fed a whole timeline.
+    """
+    __slots__ = ('engine', 'states', 'day_totals', 'first_day', 'total_on_duty', 'off_run', 'non_driving_run', 'now')
+
+    def __init__(self, engine: HosEngine, prior_cycle_hours: float = 0):
+        self.engine = engine
+        self.states = [_State(prior_cycle_hours * 60) for _ in engine.rules]
+        # Cumulative on-duty minutes at each midnight, from day ``first_day``;
+        # only the longest cycle's worth of days is kept.
+        self.day_totals = [0]
+        self.first_day = 0
+        self.total_on_duty = 0
+        self.off_run = 0  # current consecutive off-duty/sleeper minutes
+        self.non_driving_run = 0
+        self.now = 0
+
+    def day_start_total(self, day: int) -> float:
+        return self.day_totals[max(day - self.first_day, 0)]
+
+    def add(self, start: int, end: int, status: str):
+        for piece_start, piece_end, piece_status in _split_at_midnight(((start, end, status),)):
+            self._add(piece_start, piece_end, piece_status)
+
+    def _add(self, start, end, status):
+        engine = self.engine
+        self._advance_day(start // MINUTES_PER_DAY)
+        length = end - start
+        self.now = end
+
+        if status in (OFF_DUTY, SLEEPER_BERTH):
+            self.off_run += length
+            self.non_driving_run += length
+            for rule, state in zip(engine.rules, self.states):
+                engine._rest(rule, state, self.off_run, self.non_driving_run, end, self.total_on_duty)
+            return
+
+        self.off_run = 0
+        for rule, state in zip(engine.rules, self.states):
+            if state.shift_start is None:
+                state.shift_start = start
+            if status == DRIVING:
+                cycle_used = engine._cycle_used(rule, state, start, self)
+                engine._check_driving(rule, state, start, length, cycle_used)
+                state.shift_driving += length
+                state.driving_since_break += length
+            state.shift_on_duty += length
+
+        self.total_on_duty += length
+        if status == DRIVING:
+            self.non_driving_run = 0
+        else:
+            self.non_driving_run += length
+            for rule, state in zip(engine.rules, self.states):
+                if self.non_driving_run >= rule.break_length:
+                    state.driving_since_break = 0
+
+    def _advance_day(self, day: int):
+        while self.first_day + len(self.day_totals) <= day:
+            self.day_totals.append(self.total_on_duty)
+        excess = len(self.day_totals) - self.engine.max_cycle_days - 1
+        if excess > 0:
+            del self.day_totals[:excess]
+            self.first_day += excess
+
+    def results(self) -> List[Dict]:
+        self._advance_day(self.now // MINUTES_PER_DAY)
+        return [self.engine._result(rule, state, self) for rule, state in zip(self.engine.rules, self.states)]
+
+
+@lru_cache(maxsize=64)
+def _engine(names: Tuple[str, ...]) -> HosEngine:
+    return HosEngine(names)
+
+
+def get_engine(names: Optional[Sequence[str]] = None) -> HosEngine:
+    """The compiled engine for ``names`` (default: every rule set), built once per combination."""
+    return _engine(tuple(names) if names else tuple(RULE_SETS))
+
+
+def segments_from_events(events: Sequence[Dict], end: Optional[datetime], tz: tzinfo) -> Tuple[datetime, List[Segment]]:
+    """
+    Turn ``[{'start': datetime, 'status': ...}]`` into segments measured from
+    midnight (in ``tz``) of the first event's day. Each event lasts until the
+    next one; the last until ``end``, or is dropped when ``end`` is None.
+    Returns that midnight and the segments.
+    """
+    ordered = sorted(events, key=lambda event: event['start'])
+    first = ordered[0]['start'].astimezone(tz)
+    origin = first.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def minute(value):
+        return int((value - origin).total_seconds() // 60)
+
+    boundaries = [minute(event['start']) for event in ordered]
+    boundaries.append(minute(end) if end is not None else None)
+    segments = [
+        (boundaries[i], boundaries[i + 1], event['status'])
+        for i, event in enumerate(ordered)
+        if boundaries[i + 1] is not None and boundaries[i + 1] > boundaries[i]
+    ]
+    return origin, segments
+
+
+def at_datetime(origin: datetime, minute: int) -> datetime:
+    return origin + timedelta(minutes=minute)
+
+
+def _split_at_midnight(segments: Iterable[Segment]):
+    for start, end, status in segments:
+        while start // MINUTES_PER_DAY != (end - 1) // MINUTES_PER_DAY and end > start:
+            midnight = (start // MINUTES_PER_DAY + 1) * MINUTES_PER_DAY
+            yield start, midnight, status
+            start = midnight
+        if end > start:
+            yield start, end, status
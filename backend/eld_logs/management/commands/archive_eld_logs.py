@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from eld_logs.models import ArchivedEldLog, EldLog
+from eld_logs.readers import eld_log_rows
+from trucklogix.retention import archive_rows
+
+
+class Command(BaseCommand):
+    help = "Move ELD logs older than the retention age into the compressed archive table. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ELD_LOG_RETENTION_DAYS,
+            help='Archive logs created longer ago than this many days.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Logs copied per archive transaction.')
+        parser.add_argument('--delete-batch', type=int, default=100, help='Logs deleted per transaction.')
+        parser.add_argument('--limit', type=int, help='Maximum number of logs to archive in this run.')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between delete batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many logs would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_logs = EldLog.objects.filter(created_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{old_logs.count()} ELD logs created before {cutoff:%Y-%m-%d} would be archived.')
+            return
+
+        archived = archive_rows(
+            old_logs,
+            ArchivedEldLog,
+            serialize=lambda ids: eld_log_rows(EldLog.objects.filter(id__in=ids).order_by('id')),
+            make_archive=lambda row, payload: ArchivedEldLog(
+                id=row['id'],
+                driver_name=row['driver_name'],
+                date=row['date'],
+                created_at=row['created_at'],
+                payload=payload,
+            ),
+            chunk_size=options['chunk_size'],
+            delete_batch_size=options['delete_batch'],
+            limit=options['limit'],
+            pause_seconds=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} ELD logs created before {cutoff:%Y-%m-%d}.'))
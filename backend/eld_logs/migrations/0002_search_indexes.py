@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eld_logs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['driver_name', '-date', '-id'], name='eld_log_driver_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['truck_number', '-date', '-id'], name='eld_log_truck_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['carrier_name', '-date', '-id'], name='eld_log_carrier_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['-date', '-id'], name='eld_log_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['-created_at'], name='eld_log_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eld_logs', '0002_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEldLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('driver_name', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eld_logs', '0003_archived_eld_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DutyStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('driver_id', models.CharField(max_length=100)),
+                ('timestamp', models.DateTimeField()),
+                ('status', models.CharField(choices=[('Off Duty', 'Off Duty'), ('Sleeper Berth', 'Sleeper Berth'), ('Driving', 'Driving'), ('On Duty (Not Driving)', 'On Duty (Not Driving)')], max_length=25)),
+                ('location', models.CharField(blank=True, default='', max_length=255)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['driver_id', 'timestamp'],
+                'indexes': [models.Index(fields=['driver_id', 'timestamp'], name='duty_event_driver_time_idx')],
+            },
+        ),
+    ]
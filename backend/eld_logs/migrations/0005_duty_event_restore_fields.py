@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eld_logs', '0004_duty_status_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dutystatusevent',
+            name='cycle_hours_used',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dutystatusevent',
+            name='home_terminal_timezone',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eld_logs', '0005_duty_event_restore_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dutystatusevent',
+            index=models.Index(fields=['driver_id'], name='duty_event_driver_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['driver_name'], name='eld_log_driver_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['truck_number'], name='eld_log_truck_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['carrier_name'], name='eld_log_carrier_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from trucklogix.retention import decompress_payload
+
 
 class EldLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -26,6 +28,19 @@ class EldLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Search filters on one of these columns, newest date first, with id as the cursor tiebreak
+            models.Index(fields=['driver_name', '-date', '-id'], name='eld_log_driver_date_idx'),
+            models.Index(fields=['truck_number', '-date', '-id'], name='eld_log_truck_date_idx'),
+            models.Index(fields=['carrier_name', '-date', '-id'], name='eld_log_carrier_date_idx'),
+            models.Index(fields=['-date', '-id'], name='eld_log_date_idx'),
+            models.Index(fields=['-created_at'], name='eld_log_created_idx'),
+            # Admin prefix search (startswith); the pattern operator class lets LIKE 'x%' use them
+            # under any collation. Other databases ignore opclasses.
+            models.Index(fields=['driver_name'], opclasses=['varchar_pattern_ops'], name='eld_log_driver_like_idx'),
+            models.Index(fields=['truck_number'], opclasses=['varchar_pattern_ops'], name='eld_log_truck_like_idx'),
+            models.Index(fields=['carrier_name'], opclasses=['varchar_pattern_ops'], name='eld_log_carrier_like_idx'),
+        ]
 
     def __str__(self):
         return f"ELD Log - {self.driver_name} - {self.date}"
@@ -49,4 +64,50 @@ class DutyStatusChange(models.Model):
         ordering = ['order']
 
     def __str__(self):
-        return f"{self.time} - {self.status} at {self.location}"
\ No newline at end of file
+        return f"{self.time} - {self.status} at {self.location}"
+
+
+class DutyStatusEvent(models.Model):
+    """A duty status change reported by an in-cab device through the event stream."""
+    driver_id = models.CharField(max_length=100)
+    timestamp = models.DateTimeField()
+    status = models.CharField(max_length=25, choices=DutyStatusChange.STATUS_CHOICES)
+    location = models.CharField(max_length=255, blank=True, default='')
+    # As sent with the event; used to rebuild the driver's state in another process
+    cycle_hours_used = models.FloatField(null=True, blank=True)
+    home_terminal_timezone = models.CharField(max_length=50, blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['driver_id', 'timestamp']
+        indexes = [
+            models.Index(fields=['driver_id', 'timestamp'], name='duty_event_driver_time_idx'),
+            # Admin driver id prefix search, as for EldLog
+            models.Index(fields=['driver_id'], opclasses=['varchar_pattern_ops'], name='duty_event_driver_like_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.driver_id} - {self.status} at {self.timestamp}"
+
+
+class ArchivedEldLog(models.Model):
+    """
+    Cold-storage copy of an EldLog moved out of the hot tables by
+    ``manage.py archive_eld_logs``. Keeps the original id; ``payload`` is the
+    zlib-compressed JSON of the log as the detail endpoint returned it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    driver_name = models.CharField(max_length=255)
+    date = models.DateField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived ELD Log - {self.driver_name} - {self.date}"
+
+    def data(self):
+        return decompress_payload(self.payload)
@@ -0,0 +1,151 @@
+import datetime
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EldLogCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(-date, -id)``, served by the composite indexes
+    on EldLog. The cursor carries the ``(date, id)`` of the row a page
+    continues from and the page is filtered on it with a tuple comparison,
+    as the export view does, so page cost does not grow with depth and no
+    COUNT is run. Works with model instances and ``.values()`` dicts.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+
+        if cursor is None:
+            queryset = queryset.order_by('-date', '-id')
+        elif reverse:
+            date, pk = cursor[:2]
+            queryset = queryset.filter(Q(date__gt=date) | Q(date=date, id__gt=pk)).order_by('date', 'id')
+        else:
+            date, pk = cursor[:2]
+            queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk)).order_by('-date', '-id')
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        del rows[page_size:]
+        if reverse:
+            rows.reverse()
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        # Read now: serializing the page may replace the date objects with strings
+        self.first_key = _row_key(rows[0]) if rows else None
+        self.last_key = _row_key(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(*self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(*self.first_key, reverse=True)
+
+    def decode_cursor(self, request):
+        """``(date, id, reverse)`` from the request's cursor, or None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            date = datetime.date.fromisoformat(tokens['d'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk, reverse
+
+    def encode_cursor(self, date, pk, reverse):
+        tokens = {'d': date.isoformat(), 'i': pk}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens, doseq=True).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+def _row_key(row):
+    if isinstance(row, dict):
+        return row['date'], row['id']
+    return row.date, row.id
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never runs an unbounded ``COUNT(*)``.
+
+    Unfiltered PostgreSQL tables use the planner's row estimate; otherwise
+    the count is capped at ``count_cap`` rows, which an index can satisfy
+    cheaply. A capped count is only a lower bound, so asking for a page past
+    it recounts up to one page beyond the one requested.
+    """
+    count_cap = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count_limit = self.count_cap
+        self._capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            estimate = self._estimated_rows(queryset.model._meta.db_table)
+            if estimate > self._count_limit:
+                return estimate
+        count = queryset.order_by().values('pk')[:self._count_limit].count()
+        self._capped = count >= self._count_limit
+        return count
+
+    def validate_number(self, number):
+        try:
+            wanted = int(number)
+        except (TypeError, ValueError):
+            wanted = None
+        if wanted is not None and wanted > self.num_pages and self._capped:
+            self._count_limit = (wanted + 1) * self.per_page
+            for name in ('count', 'num_pages'):
+                self.__dict__.pop(name, None)
+        return super().validate_number(number)
+
+    @staticmethod
+    def _estimated_rows(table):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] and row[0] > 0 else 0
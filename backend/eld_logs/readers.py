@@ -0,0 +1,74 @@
+"""
+Read path for ELD log listings.
+
+Builds the same dicts as ``EldLogSerializer`` straight from ``.values()``:
+one query for the logs and one grouped query for all their duty status
+changes, with no per-field serializer overhead.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from trucklogix.renderers import format_datetime
+
+from .models import DutyStatusChange
+
+LOG_COLUMNS = (
+    'id', 'driver_name', 'date', 'truck_number', 'trailer_number',
+    'carrier_name', 'home_terminal_timezone', 'shipping_document_numbers',
+    'current_location', 'pickup_location', 'dropoff_location',
+    'cycle_hours_used', 'log_sheet', 'remaining_driving_hours',
+    'remaining_on_duty_hours', 'created_at', 'updated_at',
+)
+
+# Keeps the IN (...) list well under database parameter limits
+_CHILD_BATCH = 500
+
+
+def eld_log_rows(queryset) -> List[Dict]:
+    """Serialize ``queryset`` (ordering and slicing preserved) to EldLogSerializer-shaped dicts."""
+    return serialize_eld_log_values(list(queryset.values(*LOG_COLUMNS)))
+
+
+def serialize_eld_log_values(logs: List[Dict]) -> List[Dict]:
+    """Serialize rows already fetched with ``.values(*LOG_COLUMNS)``, e.g. a paginated page."""
+    changes = _duty_status_changes([log['id'] for log in logs])
+    return [
+        {
+            'id': log['id'],
+            'driver_name': log['driver_name'],
+            'date': log['date'].isoformat(),
+            'truck_number': log['truck_number'],
+            'trailer_number': log['trailer_number'],
+            'carrier_name': log['carrier_name'],
+            'home_terminal_timezone': log['home_terminal_timezone'],
+            'shipping_document_numbers': log['shipping_document_numbers'],
+            'current_location': log['current_location'],
+            'pickup_location': log['pickup_location'],
+            'dropoff_location': log['dropoff_location'],
+            'cycle_hours_used': log['cycle_hours_used'],
+            'log_sheet': log['log_sheet'],
+            'remaining_hours': {
+                'driving_hours': log['remaining_driving_hours'],
+                'on_duty_hours': log['remaining_on_duty_hours'],
+            },
+            'duty_status_changes': changes.get(log['id'], []),
+            'created_at': format_datetime(log['created_at']),
+            'updated_at': format_datetime(log['updated_at']),
+        }
+        for log in logs
+    ]
+
+
+def _duty_status_changes(log_ids: List[int]) -> Dict[int, List[Dict]]:
+    grouped = defaultdict(list)
+    for start in range(0, len(log_ids), _CHILD_BATCH):
+        rows = (
+            DutyStatusChange.objects
+            .filter(eld_log_id__in=log_ids[start:start + _CHILD_BATCH])
+            .order_by('eld_log_id', 'order', 'id')
+            .values_list('eld_log_id', 'time', 'location', 'status', 'order')
+        )
+        for log_id, time, location, status, order in rows:
+            grouped[log_id].append({'time': time, 'location': location, 'status': status, 'order': order})
+    return grouped
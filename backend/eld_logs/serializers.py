@@ -1,4 +1,7 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from rest_framework import serializers
+from .hos import RULE_SETS
 from .models import EldLog, DutyStatusChange
 
 
@@ -42,4 +45,72 @@ class EldLogInputSerializer(serializers.Serializer):
     pickup_location = serializers.CharField(max_length=255)
     dropoff_location = serializers.CharField(max_length=255)
     cycle_hours_used = serializers.FloatField(min_value=0)
-    duty_status_changes = DutyStatusChangeSerializer(many=True)
\ No newline at end of file
+    duty_status_changes = DutyStatusChangeSerializer(many=True)
+
+
+class EldLogSearchSerializer(serializers.Serializer):
+    driver_name = serializers.CharField(max_length=255, required=False)
+    truck_number = serializers.CharField(max_length=100, required=False)
+    carrier_name = serializers.CharField(max_length=255, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError('date_from must not be after date_to')
+        return data
+
+
+class HosEventSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    status = serializers.ChoiceField(choices=DutyStatusChange.STATUS_CHOICES)
+
+
+class HosEvaluationInputSerializer(serializers.Serializer):
+    """
+    A duty timeline to check: either timestamped ``events`` (any number of
+    days, each lasting until the next and the last until ``end``) or one
+    day's ``duty_status_changes`` as accepted by the generate endpoint.
+    """
+    rule_sets = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(RULE_SETS)), required=False, allow_empty=False
+    )
+    cycle_hours_used = serializers.FloatField(min_value=0, default=0)
+    home_terminal_timezone = serializers.CharField(max_length=50, default='UTC')
+    events = HosEventSerializer(many=True, required=False, allow_empty=False)
+    end = serializers.DateTimeField(required=False)
+    date = serializers.DateField(required=False)
+    duty_status_changes = DutyStatusChangeSerializer(many=True, required=False, allow_empty=False)
+
+    def validate_home_terminal_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown timezone: {value}')
+        return value
+
+    def validate(self, data):
+        if ('events' in data) == ('duty_status_changes' in data):
+            raise serializers.ValidationError('Provide either events or duty_status_changes.')
+        if 'duty_status_changes' in data and 'date' not in data:
+            raise serializers.ValidationError({'date': 'Required with duty_status_changes.'})
+        if 'events' in data and 'end' in data and data['end'] < max(e['start'] for e in data['events']):
+            raise serializers.ValidationError({'end': 'Must not be before the last event.'})
+        return data
+
+
+class DutyStatusEventInputSerializer(serializers.Serializer):
+    """One event from an in-cab device. The optional fields are used when a driver is first seen."""
+    driver_id = serializers.CharField(max_length=100)
+    timestamp = serializers.DateTimeField()
+    status = serializers.ChoiceField(choices=DutyStatusChange.STATUS_CHOICES)
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    cycle_hours_used = serializers.FloatField(min_value=0, required=False)
+    home_terminal_timezone = serializers.CharField(max_length=50, required=False)
+
+    def validate_home_terminal_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown timezone: {value}')
+        return value
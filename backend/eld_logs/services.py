@@ -1,17 +1,20 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 from datetime import datetime, timedelta
 import re
 
+from .hos import RULE_SETS, Segment, get_engine
+
 
 class EldLogService:
     """
     Service class for ELD log generation and HOS calculations.
     """
     
-    # HOS limits (in hours)
-    MAX_DRIVING_HOURS = 11
-    MAX_ON_DUTY_HOURS = 14
-    MAX_CYCLE_HOURS = 70  # 70 hours in 8 days
+    # HOS limits (in hours) for the daily log, from the US property 70/8 rule set
+    DEFAULT_RULE_SET = 'us_property_70_8'
+    MAX_DRIVING_HOURS = RULE_SETS[DEFAULT_RULE_SET].driving_hours
+    MAX_ON_DUTY_HOURS = RULE_SETS[DEFAULT_RULE_SET].window_hours
+    MAX_CYCLE_HOURS = RULE_SETS[DEFAULT_RULE_SET].cycle_hours  # 70 hours in 8 days
     
     def generate_log(self, log_data: Dict) -> Dict:
         """
@@ -25,6 +28,25 @@ class EldLogService:
             'remaining_hours': remaining_hours
         }
     
+    def evaluate_hos(self, log_data: Dict, rule_sets: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Evaluate the day's duty status changes against several HOS rule sets
+        (default: all of them) in one pass. Violation times are minutes after
+        midnight of the log date.
+        """
+        segments = self._daily_segments(log_data['duty_status_changes'])
+        return get_engine(rule_sets).evaluate(segments, log_data.get('cycle_hours_used', 0))
+
+    def _daily_segments(self, duty_status_changes: List[Dict]) -> List[Segment]:
+        """Timeline segments for the day, matching how _calculate_daily_hours counts durations."""
+        sorted_changes = sorted(duty_status_changes, key=lambda x: self._time_to_minutes(x['time']))
+        segments = []
+        for current_change, next_change in zip(sorted_changes, sorted_changes[1:]):
+            start = self._time_to_minutes(current_change['time'])
+            duration = round(self._calculate_duration(current_change['time'], next_change['time']) * 60)
+            segments.append((start, start + duration, current_change['status']))
+        return segments
+
     def _generate_log_sheet(self, log_data: Dict) -> str:
         """Generate a formatted ELD log sheet."""
         date_str = log_data['date'].strftime('%m/%d/%Y')
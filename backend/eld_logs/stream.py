@@ -0,0 +1,275 @@
+"""
+Real-time duty-status event stream.
+
+In-cab devices post duty-status events (optionally as a long-lived chunked
+NDJSON upload). Each driver has an in-memory ``DriverHosState`` wrapping an
+incremental ``HosTracker``, so an event costs constant work regardless of
+history. Events are queued and written with ``bulk_create`` in batches by a
+background flusher. Remaining-hours snapshots are pushed through an
+in-process ``StateHub`` to Server-Sent Events subscribers.
+
+State lives in this process only, so the web server runs as one threaded
+process (start.sh). A driver first seen by a process is rebuilt from its
+persisted events for the longest cycle. Long-lived connections (SSE
+subscriptions, chunked uploads) each hold a thread and are capped by
+``connections`` so they cannot take every thread from the rest of the API.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+from .hos import at_datetime, get_engine
+
+logger = logging.getLogger(__name__)
+
+# Events kept in memory if the database is unreachable, before the oldest are dropped
+MAX_PENDING_EVENTS = 100000
+
+
+class StaleEventError(ValueError):
+    """An event older than the driver's latest one."""
+
+
+class DriverHosState:
+    """One driver's current duty status and HOS tracker."""
+    __slots__ = ('driver_id', 'tracker', 'origin', 'status', 'since', 'since_minute', 'location', 'lock')
+
+    def __init__(self, driver_id: str, first_timestamp: datetime, tz, prior_cycle_hours: float = 0):
+        self.driver_id = driver_id
+        self.tracker = get_engine(settings.HOS_STREAM_RULE_SETS or None).tracker(prior_cycle_hours)
+        local = first_timestamp.astimezone(tz)
+        self.origin = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.status = None
+        self.since = None
+        self.since_minute = 0
+        self.location = ''
+        self.lock = threading.Lock()
+
+    def apply(self, timestamp: datetime, status: str, location: str = ''):
+        """Close the current status at ``timestamp`` and start ``status``."""
+        if self.since is not None and timestamp < self.since:
+            raise StaleEventError(f"Event at {timestamp.isoformat()} is older than {self.since.isoformat()}")
+        minute = int((timestamp - self.origin).total_seconds() // 60)
+        if self.status is not None and minute > self.since_minute:
+            self.tracker.add(self.since_minute, minute, self.status)
+        self.status, self.since, self.since_minute, self.location = status, timestamp, minute, location
+
+    def snapshot(self) -> Dict:
+        results = self.tracker.results()
+        for result in results:
+            for violation in result['violations']:
+                violation['at'] = at_datetime(self.origin, violation.pop('at_minute')).isoformat()
+        return {
+            'driver_id': self.driver_id,
+            'status': self.status,
+            'since': self.since.isoformat() if self.since else None,
+            'location': self.location,
+            'rule_sets': results,
+        }
+
+
+class Subscription:
+    def __init__(self, driver_ids: Optional[Iterable[str]], maxsize: int = 100):
+        self.driver_ids = set(driver_ids) if driver_ids else None
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout: float) -> Optional[Dict]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, payload: Dict):
+        # A slow subscriber only needs the newest states; drop the oldest
+        while True:
+            try:
+                self.queue.put_nowait(payload)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class StateHub:
+    """In-process pub/sub of driver snapshots, by driver id or for all drivers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_driver: Dict[str, List[Subscription]] = {}
+        self._all: List[Subscription] = []
+
+    def subscribe(self, driver_ids: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(driver_ids)
+        with self._lock:
+            if subscription.driver_ids is None:
+                self._all.append(subscription)
+            else:
+                for driver_id in subscription.driver_ids:
+                    self._by_driver.setdefault(driver_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription.driver_ids is None:
+                self._all.remove(subscription)
+                return
+            for driver_id in subscription.driver_ids:
+                subscribers = self._by_driver.get(driver_id, [])
+                if subscription in subscribers:
+                    subscribers.remove(subscription)
+                if not subscribers:
+                    self._by_driver.pop(driver_id, None)
+
+    def has_subscribers(self, driver_id: str) -> bool:
+        return bool(self._all) or driver_id in self._by_driver
+
+    def publish(self, driver_id: str, payload: Dict):
+        with self._lock:
+            subscribers = self._all + self._by_driver.get(driver_id, [])
+        for subscription in subscribers:
+            subscription.put(payload)
+
+
+class EventStream:
+    """Per-driver HOS state, the batched event writer and the subscriber hub."""
+
+    def __init__(self):
+        self.hub = StateHub()
+        self._drivers: Dict[str, DriverHosState] = {}
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flusher = None
+        # Acquire without blocking for each SSE subscription or chunked upload
+        self.connections = threading.BoundedSemaphore(settings.HOS_STREAM_MAX_CONNECTIONS)
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def ingest(self, event: Dict) -> DriverHosState:
+        """
+        Apply one validated event (``driver_id``, ``timestamp``, ``status`` and
+        optionally ``location``, ``cycle_hours_used``, ``home_terminal_timezone``).
+        Raises StaleEventError for out-of-order events.
+        """
+        driver_id = event['driver_id']
+        state = self._drivers.get(driver_id) or self._load(event)
+        with state.lock:
+            state.apply(event['timestamp'], event['status'], event.get('location', ''))
+            snapshot = state.snapshot() if self.hub.has_subscribers(driver_id) else None
+        self._queue(event)
+        if snapshot is not None:
+            self.hub.publish(driver_id, snapshot)
+        return state
+
+    def snapshot(self, driver_id: str) -> Optional[Dict]:
+        state = self._drivers.get(driver_id) or self._restore(driver_id)
+        if state is None:
+            return None
+        with state.lock:
+            return state.snapshot()
+
+    def flush(self) -> int:
+        """Write queued events with one bulk insert. Returns how many were written."""
+        from .models import DutyStatusEvent
+
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            DutyStatusEvent.objects.bulk_create([DutyStatusEvent(**fields) for fields in batch])
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} duty status events: {e}")
+            with self._pending_lock:
+                self._pending = (batch + self._pending)[-MAX_PENDING_EVENTS:]
+            return 0
+        return len(batch)
+
+    def _queue(self, event: Dict):
+        fields = {
+            'driver_id': event['driver_id'],
+            'timestamp': event['timestamp'],
+            'status': event['status'],
+            'location': event.get('location', ''),
+            'cycle_hours_used': event.get('cycle_hours_used'),
+            'home_terminal_timezone': event.get('home_terminal_timezone', ''),
+        }
+        with self._pending_lock:
+            self._pending.append(fields)
+            full = len(self._pending) >= settings.HOS_STREAM_FLUSH_BATCH
+        self._start_flusher()
+        if full:
+            self.flush()
+
+    def _load(self, event: Dict) -> DriverHosState:
+        driver_id = event['driver_id']
+        state = self._restore(driver_id)
+        if state is None:
+            tz = ZoneInfo(event.get('home_terminal_timezone') or 'UTC')
+            state = DriverHosState(driver_id, event['timestamp'], tz, event.get('cycle_hours_used', 0))
+        with self._lock:
+            return self._drivers.setdefault(driver_id, state)
+
+    def _restore(self, driver_id: str) -> Optional[DriverHosState]:
+        """
+        Rebuild a driver's state from persisted events within the longest
+        cycle, in the home terminal timezone and with the prior cycle hours
+        the first of them was sent with.
+        """
+        from .models import DutyStatusEvent
+
+        engine = get_engine(settings.HOS_STREAM_RULE_SETS or None)
+        since = timezone.now() - timedelta(days=engine.max_cycle_days + 1)
+        events = list(
+            DutyStatusEvent.objects.filter(driver_id=driver_id, timestamp__gte=since)
+            .order_by('timestamp', 'id')
+            .values_list('timestamp', 'status', 'location', 'cycle_hours_used', 'home_terminal_timezone')
+        )
+        if not events:
+            return None
+        home_timezone = next((tz for *_, tz in events if tz), '')
+        tz = ZoneInfo(home_timezone) if home_timezone else dt_timezone.utc
+        state = DriverHosState(driver_id, events[0][0], tz, events[0][3] or 0)
+        for timestamp, status, location, _, _ in events:
+            state.apply(timestamp, status, location)
+        with self._lock:
+            return self._drivers.setdefault(driver_id, state)
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(settings.HOS_STREAM_FLUSH_SECONDS)
+                    self.flush()
+
+            self._flusher = threading.Thread(target=run, name='duty-event-flush', daemon=True)
+            self._flusher.start()
+
+
+_stream: Optional[EventStream] = None
+_stream_lock = threading.Lock()
+
+
+def get_event_stream() -> EventStream:
+    global _stream
+    if _stream is None:
+        with _stream_lock:
+            if _stream is None:
+                _stream = EventStream()
+    return _stream
@@ -0,0 +1,143 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import EldLog
+from .stream import DriverHosState, EventStream
+
+
+class DriverHosStateTests(TestCase):
+    def test_snapshot_can_be_taken_repeatedly(self):
+        start = datetime(2026, 1, 5, 6, 0, tzinfo=dt_timezone.utc)
+        state = DriverHosState('D1', start, dt_timezone.utc)
+        state.apply(start, 'Driving')
+        # 12 hours straight breaks the driving limit and the 30-minute break rule
+        state.apply(start + timedelta(hours=12), 'Off Duty')
+
+        first = state.snapshot()
+        second = state.snapshot()
+
+        self.assertEqual(first, second)
+        violations = [v for result in second['rule_sets'] for v in result['violations']]
+        self.assertTrue(violations)
+        self.assertTrue(all('at' in v and 'at_minute' not in v for v in violations))
+
+
+class EventStreamRestoreTests(TestCase):
+    def test_restore_keeps_timezone_and_prior_cycle_hours(self):
+        start = timezone.now().replace(microsecond=0) - timedelta(hours=3)
+        live = EventStream()
+        live.ingest({
+            'driver_id': 'D2', 'timestamp': start, 'status': 'Driving',
+            'cycle_hours_used': 20, 'home_terminal_timezone': 'America/Chicago',
+        })
+        live.ingest({'driver_id': 'D2', 'timestamp': start + timedelta(hours=2), 'status': 'Off Duty'})
+        live.flush()
+
+        restored = EventStream().snapshot('D2')
+
+        self.assertEqual(restored, live.snapshot('D2'))
+        state = EventStream()._restore('D2')
+        self.assertEqual(state.origin.tzinfo, ZoneInfo('America/Chicago'))
+
+
+class IngestDutyEventsTests(TestCase):
+    def test_body_that_is_not_a_list_or_object_is_rejected(self):
+        for body in ('"events"', '42', '{"events": "x"}'):
+            response = self.client.post('/api/eld-logs/stream/events/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+
+@override_settings(
+    HOS_STREAM_MAX_CONNECTIONS=1, HOS_STREAM_MAX_CONNECTION_SECONDS=0.3, HOS_STREAM_HEARTBEAT_SECONDS=0.1,
+)
+class StreamConnectionLimitTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('eld_logs.views.get_event_stream', return_value=EventStream())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_subscriptions_past_the_cap_are_refused_until_one_ends(self):
+        first = self.client.get('/api/eld-logs/stream/subscribe/')
+        refused = self.client.get('/api/eld-logs/stream/subscribe/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused['Retry-After'], '5')
+
+        # The stream ends on its own after the maximum duration and frees its slot
+        self.assertIn(b': keep-alive', b''.join(first.streaming_content))
+        second = self.client.get('/api/eld-logs/stream/subscribe/')
+        self.assertEqual(second.status_code, 200)
+        b''.join(second.streaming_content)
+
+    def test_chunked_upload_takes_a_slot(self):
+        subscription = self.client.get('/api/eld-logs/stream/subscribe/')
+
+        response = self.client.post(
+            '/api/eld-logs/stream/events/', b'{}\n', content_type='application/x-ndjson',
+            HTTP_TRANSFER_ENCODING='chunked',
+        )
+
+        self.assertEqual(response.status_code, 503)
+        b''.join(subscription.streaming_content)
+
+    def test_stream_closed_before_it_was_read_frees_its_slot(self):
+        self.client.get('/api/eld-logs/stream/subscribe/').close()
+
+        response = self.client.get('/api/eld-logs/stream/subscribe/')
+
+        self.assertEqual(response.status_code, 200)
+        b''.join(response.streaming_content)
+
+
+class SearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Several logs per date, created out of date order, so the id tiebreak matters
+        EldLog.objects.bulk_create([
+            EldLog(
+                driver_name=f'Driver {i % 3}', date=date(2026, 1, 1) + timedelta(days=(i * 7) % 5),
+                truck_number='T1', trailer_number='R1', carrier_name='Carrier', home_terminal_timezone='UTC',
+                shipping_document_numbers='', current_location='A', pickup_location='B', dropoff_location='C',
+                cycle_hours_used=0, log_sheet='', remaining_driving_hours=11, remaining_on_duty_hours=14,
+            )
+            for i in range(23)
+        ])
+        cls.expected = list(EldLog.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+    def test_pages_forward_and_back_over_every_log_once(self):
+        response = self.client.get('/api/eld-logs/search/', {'page_size': 5})
+        pages = []
+        while True:
+            body = response.json()
+            pages.append([log['id'] for log in body['results']])
+            if body['next'] is None:
+                break
+            response = self.client.get(body['next'])
+
+        self.assertEqual([log_id for page in pages for log_id in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+
+        for page in reversed(pages[:-1]):
+            response = self.client.get(body['previous'])
+            body = response.json()
+            self.assertEqual([log['id'] for log in body['results']], page)
+        self.assertIsNone(body['previous'])
+
+    def test_filters_apply_to_every_page(self):
+        body = self.client.get('/api/eld-logs/search/', {'driver_name': 'Driver 1', 'page_size': 3}).json()
+        ids = [log['id'] for log in body['results']]
+        ids += [log['id'] for log in self.client.get(body['next']).json()['results']]
+
+        expected = list(
+            EldLog.objects.filter(driver_name='Driver 1').order_by('-date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected[:6])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/eld-logs/search/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
@@ -3,7 +3,13 @@ from . import views
 
 urlpatterns = [
     path('generate/', views.generate_eld_log, name='generate_eld_log'),
+    path('hos/evaluate/', views.evaluate_hos, name='evaluate_hos'),
+    path('stream/events/', views.ingest_duty_events, name='ingest_duty_events'),
+    path('stream/subscribe/', views.subscribe_driver_hos_states, name='subscribe_driver_hos_states'),
+    path('stream/drivers/<str:driver_id>/', views.get_driver_hos_state, name='driver_hos_state'),
     path('history/', views.get_eld_log_history, name='eld_log_history'),
+    path('search/', views.search_eld_logs, name='search_eld_logs'),
+    path('export/', views.export_eld_logs, name='export_eld_logs'),
     path('<int:log_id>/', views.get_eld_log_detail, name='eld_log_detail'),
     path('<int:log_id>/delete/', views.delete_eld_log, name='delete_eld_log'),
 ]
\ No newline at end of file
@@ -1,12 +1,34 @@
+import datetime
+import json
+import logging
+import time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
-from .models import EldLog, DutyStatusChange
-from .serializers import EldLogSerializer, EldLogInputSerializer
+from trucklogix.idempotency import idempotent
+from trucklogix.renderers import FastJSONRenderer, dumps
+from .hos import at_datetime, get_engine, segments_from_events
+from .models import ArchivedEldLog, EldLog, DutyStatusChange
+from .pagination import EldLogCursorPagination
+from .readers import LOG_COLUMNS, eld_log_rows, serialize_eld_log_values
+from .serializers import (
+    EldLogSerializer, EldLogInputSerializer, EldLogSearchSerializer, HosEvaluationInputSerializer,
+    DutyStatusEventInputSerializer
+)
+from .stream import StaleEventError, get_event_stream
 from .services import EldLogService
 
+logger = logging.getLogger(__name__)
+
 
 @api_view(['POST'])
+@idempotent('generate_eld_log')
 def generate_eld_log(request):
     """
     Generate an ELD log based on the provided data.
@@ -60,26 +82,314 @@ def generate_eld_log(request):
         )
 
 
+# Logs fetched per query while streaming an export
+EXPORT_CHUNK_SIZE = 500
+
+
+@api_view(['POST'])
+def evaluate_hos(request):
+    """
+    Check a duty timeline against several hours-of-service rule sets at once.
+
+    Returns remaining driving, on-duty, cycle and until-break hours, the
+    hours used, and timestamped violations for each rule set.
+    """
+    serializer = HosEvaluationInputSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    tz = ZoneInfo(data['home_terminal_timezone'])
+    try:
+        if 'events' in data:
+            origin, segments = segments_from_events(data['events'], data.get('end'), tz)
+            results = get_engine(data.get('rule_sets')).evaluate(segments, data['cycle_hours_used'])
+        else:
+            origin = datetime.datetime.combine(data['date'], datetime.time(), tzinfo=tz)
+            results = EldLogService().evaluate_hos(data, data.get('rule_sets'))
+    except Exception as e:
+        logger.exception("Failed to evaluate HOS")
+        return Response(
+            {'error': f'Failed to evaluate HOS: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    for result in results:
+        for violation in result['violations']:
+            violation['at'] = at_datetime(origin, violation.pop('at_minute')).isoformat()
+    return Response({'results': results})
+
+
+class _Closing:
+    """
+    Iterate ``iterable`` and run ``on_close`` when the response is closed.
+    Closing a generator that never started skips its ``finally``, which
+    happens when the client goes away before the first chunk is sent.
+    """
+
+    def __init__(self, iterable, on_close):
+        self.iterable = iterable
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            self.iterable.close()
+        finally:
+            self.on_close()
+
+
+def _is_chunked(request):
+    return 'chunked' in request.META.get('HTTP_TRANSFER_ENCODING', '').lower()
+
+
+def _event_lines(request):
+    """Yield raw NDJSON lines as they arrive, including from chunked uploads."""
+    if _is_chunked(request):
+        # Django caps the body at CONTENT_LENGTH, which a chunked upload lacks
+        stream = request.META['wsgi.input']
+    else:
+        stream = request._request
+    for line in iter(stream.readline, b''):
+        if line.strip():
+            yield line
+
+
+def _too_many_connections():
+    return Response(
+        {'error': 'Too many open event stream connections'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '5'}
+    )
+
+
+@api_view(['POST'])
+def ingest_duty_events(request):
+    """
+    Ingest duty-status events from in-cab devices.
+
+    Accepts a JSON list (or ``{"events": [...]}``), or ``application/x-ndjson``
+    with one event per line; an NDJSON body may be a long-lived chunked
+    upload, applied line by line as it arrives. Returns the counts, any
+    rejected events, and each touched driver's remaining hours.
+    """
+    stream = get_event_stream()
+    held = False
+    if request.content_type.startswith('application/x-ndjson'):
+        # A chunked upload may stay open for its whole shift and holds a thread meanwhile
+        if _is_chunked(request):
+            if not stream.connections.acquire(blocking=False):
+                return _too_many_connections()
+            held = True
+        raw_events = (_parse_event_line(line) for line in _event_lines(request))
+    elif isinstance(request.data, list):
+        raw_events = request.data
+    elif isinstance(request.data, dict) and isinstance(request.data.get('events', []), list):
+        raw_events = request.data.get('events', [])
+    else:
+        return Response(
+            {'error': 'Expected a list of events or {"events": [...]}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    accepted = 0
+    rejected = []
+    drivers = {}
+    try:
+        for index, raw in enumerate(raw_events):
+            if raw is None:
+                rejected.append({'index': index, 'errors': {'non_field_errors': ['Invalid JSON']}})
+                continue
+            serializer = DutyStatusEventInputSerializer(data=raw)
+            if not serializer.is_valid():
+                rejected.append({'index': index, 'errors': serializer.errors})
+                continue
+            try:
+                state = stream.ingest(serializer.validated_data)
+            except StaleEventError as e:
+                rejected.append({'index': index, 'errors': {'timestamp': [str(e)]}})
+                continue
+            accepted += 1
+            drivers[state.driver_id] = state
+    finally:
+        if held:
+            stream.connections.release()
+
+    return Response({
+        'accepted': accepted,
+        'rejected': rejected,
+        'drivers': {driver_id: stream.snapshot(driver_id) for driver_id in drivers},
+    })
+
+
+def _parse_event_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+@api_view(['GET'])
+def get_driver_hos_state(request, driver_id):
+    """
+    Get a driver's current duty status and remaining hours from the event stream.
+    """
+    snapshot = get_event_stream().snapshot(driver_id)
+    if snapshot is None:
+        return Response(
+            {'error': 'No duty status events for this driver'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(snapshot)
+
+
+@require_GET
+def subscribe_driver_hos_states(request):
+    """
+    Server-Sent Events stream of remaining-hours updates, for the drivers in
+    ``?drivers=a,b`` or for every driver when omitted. Plain Django view:
+    DRF content negotiation has no ``text/event-stream`` renderer.
+
+    Answers 503 past HOS_STREAM_MAX_CONNECTIONS open streams, and ends each
+    stream after HOS_STREAM_MAX_CONNECTION_SECONDS; EventSource reconnects.
+    """
+    driver_ids = [d for d in request.GET.get('drivers', '').split(',') if d]
+    stream = get_event_stream()
+    if not stream.connections.acquire(blocking=False):
+        response = HttpResponse(
+            dumps({'error': 'Too many open event stream connections'}),
+            status=status.HTTP_503_SERVICE_UNAVAILABLE, content_type='application/json'
+        )
+        response['Retry-After'] = '5'
+        return response
+    subscription = stream.hub.subscribe(driver_ids or None)
+    deadline = time.monotonic() + settings.HOS_STREAM_MAX_CONNECTION_SECONDS
+    ended = False
+
+    def end():
+        nonlocal ended
+        if not ended:
+            ended = True
+            stream.hub.unsubscribe(subscription)
+            stream.connections.release()
+
+    def events():
+        try:
+            for driver_id in driver_ids:
+                snapshot = stream.snapshot(driver_id)
+                if snapshot is not None:
+                    yield f"event: state\ndata: {dumps(snapshot).decode()}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                snapshot = subscription.get(timeout=min(settings.HOS_STREAM_HEARTBEAT_SECONDS, remaining))
+                if snapshot is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: state\ndata: {dumps(snapshot).decode()}\n\n"
+        finally:
+            end()
+
+    response = StreamingHttpResponse(_Closing(events(), end), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def get_eld_log_history(request):
     """
     Get the history of ELD logs.
     """
     logs = EldLog.objects.all()[:10]  # Get last 10 logs
-    serializer = EldLogSerializer(logs, many=True)
-    return Response(serializer.data)
+    return Response(eld_log_rows(logs))
+
+
+def _filtered_logs(filters):
+    logs = EldLog.objects.all()
+    for field in ('driver_name', 'truck_number', 'carrier_name'):
+        if field in filters:
+            logs = logs.filter(**{field: filters[field]})
+    if 'date_from' in filters:
+        logs = logs.filter(date__gte=filters['date_from'])
+    if 'date_to' in filters:
+        logs = logs.filter(date__lte=filters['date_to'])
+    return logs
+
+
+@api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
+def search_eld_logs(request):
+    """
+    Search ELD logs by driver, truck, carrier (exact match) and date range.
+
+    Results are newest date first and cursor-paginated; follow the ``next``
+    and ``previous`` links to page.
+    """
+    params = EldLogSearchSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    logs = _filtered_logs(params.validated_data).values(*LOG_COLUMNS)
+    paginator = EldLogCursorPagination()
+    page = paginator.paginate_queryset(logs, request)
+    return paginator.get_paginated_response(serialize_eld_log_values(page))
+
+
+@api_view(['GET'])
+def export_eld_logs(request):
+    """
+    Export every ELD log matching the search filters as one JSON array.
+
+    The body is streamed in keyset-ordered chunks, so memory use stays flat
+    however many logs match.
+    """
+    params = EldLogSearchSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    logs = _filtered_logs(params.validated_data).order_by('-date', '-id')
+
+    def chunks():
+        yield b'['
+        first = True
+        after = None
+        while True:
+            page = logs
+            if after is not None:
+                page = page.filter(Q(date__lt=after[0]) | Q(date=after[0], id__lt=after[1]))
+            rows = eld_log_rows(page[:EXPORT_CHUNK_SIZE])
+            if not rows:
+                break
+            for row in rows:
+                yield (b'' if first else b',') + dumps(row)
+                first = False
+            after = (datetime.date.fromisoformat(rows[-1]['date']), rows[-1]['id'])
+        yield b']'
+
+    response = StreamingHttpResponse(chunks(), content_type='application/json')
+    response['Content-Disposition'] = 'attachment; filename="eld-logs.json"'
+    return response
 
 
 @api_view(['GET'])
 def get_eld_log_detail(request, log_id):
     """
-    Get details of a specific ELD log.
+    Get details of a specific ELD log, falling back to the archive for logs
+    moved out by retention (those carry ``"archived": true``).
     """
     try:
         log = EldLog.objects.get(id=log_id)
         serializer = EldLogSerializer(log)
         return Response(serializer.data)
     except EldLog.DoesNotExist:
+        archived = ArchivedEldLog.objects.filter(id=log_id).first()
+        if archived is not None:
+            return Response({**archived.data(), 'archived': True})
         return Response(
             {'error': 'ELD log not found'},
             status=status.HTTP_404_NOT_FOUND
@@ -99,6 +409,12 @@ def delete_eld_log(request, log_id):
             status=status.HTTP_200_OK
         )
     except EldLog.DoesNotExist:
+        deleted, _ = ArchivedEldLog.objects.filter(id=log_id).delete()
+        if deleted:
+            return Response(
+                {"detail": "ELD log deleted successfully", "id": log_id},
+                status=status.HTTP_200_OK
+            )
         return Response(
             {'error': 'ELD log not found'},
             status=status.HTTP_404_NOT_FOUND
@@ -0,0 +1,235 @@
+"""
+Local OpenRouteService stand-in for load tests.
+
+Replays recorded geocode, directions, POI and matrix responses with
+configurable latency distributions and error rates. With ``--record`` it
+proxies to the real ORS instead and appends every response to the
+recordings file, so later runs can replay production-shaped payloads.
+
+Usage (from the backend directory):
+    python -m loadtest.ors_stub --port 8089 --profile loadtest/profiles/default.json
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Request path prefix -> endpoint kind used in recordings and profiles
+ENDPOINTS = [
+    ('/geocode/search', 'geocode'),
+    ('/v2/directions/', 'directions'),
+    ('/pois', 'pois'),
+    ('/v2/matrix/', 'matrix'),
+]
+
+DEFAULT_PROFILE = {
+    'geocode': {'latency': {'distribution': 'lognormal', 'median_ms': 120, 'sigma': 0.4}, 'error_rate': 0.0},
+    'directions': {'latency': {'distribution': 'lognormal', 'median_ms': 450, 'sigma': 0.5}, 'error_rate': 0.0},
+    'pois': {'latency': {'distribution': 'lognormal', 'median_ms': 250, 'sigma': 0.5}, 'error_rate': 0.0},
+    'matrix': {'latency': {'distribution': 'lognormal', 'median_ms': 300, 'sigma': 0.4}, 'error_rate': 0.0},
+}
+
+
+def sample_latency(spec: Dict, rng: random.Random) -> float:
+    """Seconds to wait, drawn from a ``fixed``, ``uniform`` or ``lognormal`` spec."""
+    distribution = spec.get('distribution', 'fixed')
+    if distribution == 'fixed':
+        ms = spec.get('ms', 0)
+    elif distribution == 'uniform':
+        ms = rng.uniform(spec['min_ms'], spec['max_ms'])
+    elif distribution == 'lognormal':
+        ms = rng.lognormvariate(math.log(spec['median_ms']), spec.get('sigma', 0.5))
+    else:
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+    return max(ms, 0) / 1000
+
+
+class OrsStub:
+    """
+    Holds recordings and the latency/error profile, and answers ORS requests.
+    """
+
+    def __init__(self, recordings: Optional[Dict] = None, profile: Optional[Dict] = None,
+                 record_upstream: Optional[str] = None, recordings_path: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.recordings = recordings or {}
+        self.profile = {**DEFAULT_PROFILE, **(profile or {})}
+        self.record_upstream = record_upstream
+        self.recordings_path = recordings_path
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {kind: 0 for _, kind in ENDPOINTS}
+
+    def handle(self, method: str, path: str, body: bytes, headers: Dict):
+        """Return ``(status, payload_bytes)`` for one request."""
+        kind = next((k for prefix, k in ENDPOINTS if path.startswith(prefix)), None)
+        if kind is None:
+            return 404, json.dumps({'error': f'Unsupported path {path}'}).encode()
+        with self.lock:
+            self.counts[kind] += 1
+
+        if self.record_upstream:
+            return self._proxy(kind, method, path, body, headers)
+
+        spec = self.profile.get(kind, {})
+        with self.lock:
+            delay = sample_latency(spec.get('latency', {}), self.rng)
+            failed = self.rng.random() < spec.get('error_rate', 0)
+        time.sleep(delay)
+        if failed:
+            # 503 would make the ORS client retry; report a plain server error instead
+            return spec.get('error_status', 500), json.dumps({'error': 'stubbed failure'}).encode()
+        return 200, json.dumps(self._response(kind, path, body)).encode()
+
+    def _response(self, kind: str, path: str, body: bytes) -> Dict:
+        recorded = self.recordings.get(kind)
+        if recorded:
+            with self.lock:
+                return self.rng.choice(recorded)
+        return synthesize(kind, path, json.loads(body) if body else {}, self.rng)
+
+    def _proxy(self, kind, method, path, body, headers):
+        request = urllib.request.Request(
+            self.record_upstream.rstrip('/') + path,
+            data=body if method == 'POST' else None,
+            method=method,
+            headers={k: v for k, v in headers.items() if k.lower() in ('authorization', 'content-type', 'accept')},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        if status == 200:
+            with self.lock:
+                self.recordings.setdefault(kind, []).append(json.loads(payload))
+                if self.recordings_path:
+                    with open(self.recordings_path, 'w', encoding='utf-8') as f:
+                        json.dump(self.recordings, f)
+        return status, payload
+
+
+def synthesize(kind: str, path: str, body: Dict, rng: random.Random) -> Dict:
+    """Plausible ORS-shaped payloads for when no recordings are loaded."""
+    if kind == 'geocode':
+        lon, lat = rng.uniform(-120, -75), rng.uniform(30, 47)
+        return {'features': [{'geometry': {'type': 'Point', 'coordinates': [lon, lat]}, 'properties': {}}]}
+    if kind == 'directions':
+        coordinates = body.get('coordinates', [[0, 0], [0, 0]])
+        line, segments, way_points = [coordinates[0]], [], [0]
+        total_distance = total_duration = 0.0
+        for a, b in zip(coordinates, coordinates[1:]):
+            for step in range(1, 21):
+                line.append([a[0] + (b[0] - a[0]) * step / 20, a[1] + (b[1] - a[1]) * step / 20])
+            way_points.append(len(line) - 1)
+            distance = math.hypot(b[0] - a[0], b[1] - a[1]) * 111000 * 1.25
+            duration = distance / 24
+            segments.append({'distance': distance, 'duration': duration, 'steps': [
+                {'distance': distance / 2, 'duration': duration / 2},
+                {'distance': distance / 2, 'duration': duration / 2},
+            ]})
+            total_distance += distance
+            total_duration += duration
+        return {'type': 'FeatureCollection', 'features': [{
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': line},
+            'properties': {
+                'segments': segments,
+                'way_points': way_points,
+                'summary': {'distance': total_distance, 'duration': total_duration},
+            },
+        }]}
+    if kind == 'pois':
+        lon, lat = (body.get('geometry', {}).get('geojson') or {}).get('coordinates', [0, 0])
+        category = (body.get('filters') or {}).get('category_ids', [0])[0]
+        return {'type': 'FeatureCollection', 'features': [
+            {
+                'geometry': {'type': 'Point', 'coordinates': [lon + rng.uniform(-0.01, 0.01), lat + rng.uniform(-0.01, 0.01)]},
+                'properties': {'osm_tags': {'name': f'Stub POI {category}-{i}'}, 'distance': rng.uniform(50, 2000)},
+            }
+            for i in range(rng.randint(0, 5))
+        ]}
+    # matrix
+    locations = body.get('locations', [])
+    sources = body.get('sources') or list(range(len(locations)))
+    destinations = body.get('destinations') or list(range(len(locations)))
+    distances = [
+        [math.hypot(locations[d][0] - locations[s][0], locations[d][1] - locations[s][1]) * 111000 * 1.25
+         for d in destinations]
+        for s in sources
+    ]
+    return {'distances': distances, 'durations': [[value / 24 for value in row] for row in distances]}
+
+
+def make_server(stub: OrsStub, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _serve(self, method):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            status, payload = stub.handle(method, self.path.split('?', 1)[0], body, dict(self.headers))
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._serve('GET')
+
+        def do_POST(self):
+            self._serve('POST')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def load_json(path: Optional[str]) -> Dict:
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenRouteService stand-in.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--recordings', help='JSON file of recorded responses keyed by endpoint kind')
+    parser.add_argument('--profile', help='JSON latency/error profile keyed by endpoint kind')
+    parser.add_argument('--record', metavar='UPSTREAM', help='Proxy to this ORS base URL and record responses')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    stub = OrsStub(
+        recordings=load_json(args.recordings),
+        profile=load_json(args.profile),
+        record_upstream=args.record,
+        recordings_path=args.recordings,
+        seed=args.seed,
+    )
+    server = make_server(stub, args.host, args.port)
+    print(f"ORS stub listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""
+Load-test driver for the TruckLogix API.
+
+Starts the ORS stub and (unless ``--target`` is given) a server process on
+a throwaway SQLite database pointed at the stub, then drives
+``/api/routes/optimize/`` and ``/api/eld-logs/generate/`` at the requested
+concurrency and reports throughput, p50/p95/p99 latency and error rates.
+
+Usage (from the backend directory):
+    python -m loadtest.run --concurrency 16 --duration 60
+    python -m loadtest.run --server-cmd "gunicorn trucklogix.wsgi:application --bind 127.0.0.1:{port} --workers 2" \\
+        --profile loadtest/profiles/degraded.json --json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .ors_stub import OrsStub, load_json, make_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'optimize': '/api/routes/optimize/',
+    'eld': '/api/eld-logs/generate/',
+}
+
+DUTY_DAY = [
+    ('12:00 a.m.', 'Off Duty'),
+    ('6:00 a.m.', 'On Duty (Not Driving)'),
+    ('7:00 a.m.', 'Driving'),
+    ('11:30 a.m.', 'Off Duty'),
+    ('12:00 p.m.', 'Driving'),
+    ('4:30 p.m.', 'On Duty (Not Driving)'),
+    ('5:30 p.m.', 'Off Duty'),
+]
+
+
+def optimize_payload(rng: random.Random, pool_size: int) -> Dict:
+    def place():
+        return f"Loadtest Place {rng.randrange(pool_size)}"
+
+    return {
+        'current_location': place(),
+        'pickup_location': place(),
+        'dropoff_location': place(),
+        'current_cycle_hours_used': rng.choice([2, 5, 12, 30]),
+    }
+
+
+def eld_payload(rng: random.Random, pool_size: int) -> Dict:
+    location = f"Loadtest Place {rng.randrange(pool_size)}"
+    return {
+        'driver_name': f"Driver {rng.randrange(500)}",
+        'date': '2025-07-27',
+        'truck_number': f"T-{rng.randrange(200)}",
+        'trailer_number': f"TR-{rng.randrange(200)}",
+        'carrier_name': f"Carrier {rng.randrange(20)}",
+        'home_terminal_timezone': 'America/Chicago',
+        'shipping_document_numbers': f"BOL-{rng.randrange(10 ** 6)}",
+        'current_location': location,
+        'pickup_location': location,
+        'dropoff_location': location,
+        'cycle_hours_used': rng.uniform(0, 60),
+        'duty_status_changes': [
+            {'time': t, 'location': location, 'status': s, 'order': i}
+            for i, (t, s) in enumerate(DUTY_DAY)
+        ],
+    }
+
+
+PAYLOADS = {'optimize': optimize_payload, 'eld': eld_payload}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not become live at {url}")
+
+
+def start_server(args, stub_url: str, workdir: str):
+    port = free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'loadtest.sqlite3')}",
+        'OPENROUTESERVICE_BASE_URL': stub_url,
+        'OPENROUTESERVICE_API_KEY': 'loadtest',
+        'DEBUG': 'False',
+    }
+    if args.no_reuse:
+        env.update({'ROUTE_OPTIMIZATION_REUSE_SECONDS': '0', 'ORS_CACHE_FRESH_SECONDS': '0'})
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v', '0'],
+                   cwd=BACKEND_DIR, env=env, check=True)
+    command = shlex.split(args.server_cmd.format(port=port, python=sys.executable))
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(base_url + '/healthz')
+    return process, base_url
+
+
+def drive(base_url: str, mix: List[Tuple[str, int]], concurrency: int, duration: float,
+          pool_size: int, seed: int):
+    """Run the workers; returns ``[(scenario, status, latency_s)]`` and the wall time."""
+    results = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        local = []
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            body = json.dumps(PAYLOADS[scenario](rng, pool_size)).encode()
+            request = urllib.request.Request(
+                base_url + SCENARIOS[scenario], data=body, method='POST',
+                headers={'Content-Type': 'application/json'},
+            )
+            started = time.monotonic()
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, OSError):
+                status = 0
+            local.append((scenario, status, time.monotonic() - started))
+        with lock:
+            results.extend(local)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def summarize(results, elapsed: float) -> Dict:
+    groups = defaultdict(list)
+    for scenario, status, latency in results:
+        groups[scenario].append((status, latency))
+        groups['total'].append((status, latency))
+
+    summary = {}
+    for name, rows in groups.items():
+        latencies = sorted(latency * 1000 for _, latency in rows)
+        errors = sum(1 for status, _ in rows if not 200 <= status < 300)
+        summary[name] = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 2),
+            'error_rate': round(errors / len(rows), 4),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'statuses': dict(sorted(_count(status for status, _ in rows).items())),
+        }
+    return summary
+
+
+def _count(values):
+    counts = defaultdict(int)
+    for value in values:
+        counts[str(value)] += 1
+    return counts
+
+
+def parse_mix(text: str) -> List[Tuple[str, int]]:
+    mix = []
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'")
+        mix.append((name, int(weight or 1)))
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive the TruckLogix API against a stubbed ORS.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds of unmeasured load first')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('optimize=3,eld=1'))
+    parser.add_argument('--locations', type=int, default=50, help='Size of the place-name pool')
+    parser.add_argument('--no-reuse', action='store_true', help='Disable optimize reuse and ORS result caching')
+    parser.add_argument('--profile', default=os.path.join(BACKEND_DIR, 'loadtest', 'profiles', 'default.json'))
+    parser.add_argument('--recordings', help='Recorded ORS responses to replay')
+    parser.add_argument('--target', help='Base URL of an already running server (its ORS must point at the stub)')
+    parser.add_argument('--stub-port', type=int, default=0)
+    parser.add_argument('--server-cmd', default='{python} manage.py runserver 127.0.0.1:{port} --noreload',
+                        help='Server command; {port} and {python} are substituted')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the summary to this file')
+    args = parser.parse_args()
+
+    stub = OrsStub(recordings=load_json(args.recordings), profile=load_json(args.profile), seed=args.seed)
+    stub_server = make_server(stub, port=args.stub_port)
+    threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub_server.server_port}"
+
+    process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.target:
+                base_url = args.target.rstrip('/')
+            else:
+                process, base_url = start_server(args, stub_url, workdir)
+            if args.warmup > 0:
+                drive(base_url, args.mix, args.concurrency, args.warmup, args.locations, args.seed + 1000)
+            results, elapsed = drive(base_url, args.mix, args.concurrency, args.duration, args.locations, args.seed)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+            stub_server.shutdown()
+
+    summary = {
+        'config': {
+            'concurrency': args.concurrency,
+            'duration_s': round(elapsed, 2),
+            'mix': dict(args.mix),
+            'server_cmd': None if args.target else args.server_cmd,
+            'profile': os.path.basename(args.profile),
+            'no_reuse': args.no_reuse,
+        },
+        'results': summarize(results, elapsed),
+        'ors_calls': stub.counts,
+    }
+
+    print(f"{'scenario':<10} {'reqs':>7} {'rps':>8} {'err%':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in summary['results'].items():
+        print(f"{name:<10} {row['requests']:>7} {row['throughput_rps']:>8} {row['error_rate'] * 100:>6.2f}% "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+    print(f"ORS calls: {stub.counts}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import RouteOptimization, FuelStop, RestBreakStop
+from .models import ArchivedRouteOptimization, RouteOptimization, FuelStop, RestBreakStop, Location
 
 
 class FuelStopInline(admin.TabularInline):
@@ -18,4 +18,18 @@ class RouteOptimizationAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['current_location', 'pickup_location', 'dropoff_location']
     inlines = [FuelStopInline, RestBreakStopInline]
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'longitude', 'latitude', 'usage_count', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['normalized_name', 'usage_count', 'created_at', 'updated_at']
+
+
+@admin.register(ArchivedRouteOptimization)
+class ArchivedRouteOptimizationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'optimized_route', 'created_at', 'archived_at']
+    exclude = ['payload']
+    readonly_fields = ['id', 'optimized_route', 'created_at', 'archived_at']
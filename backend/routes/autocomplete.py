@@ -0,0 +1,181 @@
+"""
+In-memory prefix index over registered locations for autocomplete.
+
+Every word suffix of a location's normalized name ("main yard dallas tx",
+"yard dallas tx", "dallas tx", "tx") is kept in one sorted array, so a
+query matches the start of any word with two bisections. All matches are
+ranked by usage count. The index is built from the Location table on
+first use and then updated in place as places are registered or used.
+
+Prefixes of one or two characters match a large share of the index, so
+their best-ranked matches are kept as precomputed top lists instead of
+being ranked per keystroke.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set
+
+# Sorts after every character a key can continue the prefix with
+_PREFIX_END = '\U0010ffff'
+
+# Prefixes shorter than this are answered from precomputed top lists of _TOP_K
+# locations; _TOP_K covers the largest limit the autocomplete view accepts
+_SHORT_PREFIX = 3
+_TOP_K = 50
+
+
+class LocationPrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[tuple] = []  # sorted (word_suffix, location_id)
+        self._entries: Dict[int, Dict] = {}
+        # short prefix -> location ids ranked best first; filled on first search
+        self._top: Dict[str, List[int]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, rows) -> 'LocationPrefixIndex':
+        """Bulk-build from ``(id, name, longitude, latitude, usage_count)`` rows with one sort."""
+        index = cls()
+        for location_id, name, longitude, latitude, usage_count in rows:
+            index._entries[location_id] = {
+                'id': location_id,
+                'name': name,
+                'coordinates': [longitude, latitude],
+                'usage_count': usage_count,
+            }
+            index._keys.extend((key, location_id) for key in _word_suffixes(name))
+        index._keys.sort()
+        return index
+
+    def add(self, location_id: int, name: str, coordinates: List[float], usage_count: int = 0):
+        """Insert a location, or refresh its name, coordinates and usage count."""
+        with self._lock:
+            existing = self._entries.get(location_id)
+            old_prefixes = _short_prefixes(existing['name']) if existing is not None else set()
+            old_rank = self._rank(location_id) if existing is not None else None
+            if existing is not None and existing['name'] != name:
+                self._remove_keys(location_id, existing['name'])
+            self._entries[location_id] = {
+                'id': location_id,
+                'name': name,
+                'coordinates': list(coordinates),
+                'usage_count': usage_count,
+            }
+            if existing is None or existing['name'] != name:
+                for key in _word_suffixes(name):
+                    insort(self._keys, (key, location_id))
+
+            new_prefixes = _short_prefixes(name)
+            for prefix in old_prefixes - new_prefixes:
+                self._withdraw(prefix, location_id)
+            for prefix in new_prefixes:
+                if prefix in old_prefixes and self._rank(location_id) > old_rank:
+                    self._withdraw(prefix, location_id)
+                self._offer(prefix, location_id)
+
+    def record_use(self, location_id: int, count: int = 1):
+        with self._lock:
+            entry = self._entries.get(location_id)
+            if entry is not None:
+                entry['usage_count'] += count
+                for prefix in _short_prefixes(entry['name']):
+                    self._offer(prefix, location_id)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Locations with a word starting with ``query``, most used first."""
+        prefix = _normalize_key(query)
+        if not prefix:
+            return []
+        with self._lock:
+            if len(prefix) < _SHORT_PREFIX and limit <= _TOP_K:
+                top = self._top.get(prefix)
+                if top is None:
+                    top = self._top[prefix] = self._ranked_matches(prefix, _TOP_K)
+                return [dict(self._entries[location_id]) for location_id in top[:limit]]
+            return [dict(self._entries[location_id]) for location_id in self._ranked_matches(prefix, limit)]
+
+    def _ranked_matches(self, prefix: str, limit: int) -> List[int]:
+        start = bisect_left(self._keys, (prefix,))
+        end = bisect_left(self._keys, (prefix + _PREFIX_END,), start)
+        seen = {location_id for _, location_id in self._keys[start:end]}
+        return heapq.nsmallest(limit, seen, key=self._rank)
+
+    def _rank(self, location_id: int) -> tuple:
+        entry = self._entries[location_id]
+        return -entry['usage_count'], entry['name'], location_id
+
+    def _offer(self, prefix: str, location_id: int):
+        """Place a location whose rank improved (or stayed) in a prefix's top list."""
+        top = self._top.get(prefix)
+        if top is None:
+            return
+        if location_id in top:
+            top.remove(location_id)
+        insort(top, location_id, key=self._rank)
+        del top[_TOP_K:]
+
+    def _withdraw(self, prefix: str, location_id: int):
+        """
+        Take a location out of a prefix's top list. A full list no longer
+        knows which location comes next, so it is dropped and rebuilt on the
+        next search.
+        """
+        top = self._top.get(prefix)
+        if top is None or location_id not in top:
+            return
+        if len(top) >= _TOP_K:
+            del self._top[prefix]
+        else:
+            top.remove(location_id)
+
+    def _remove_keys(self, location_id: int, name: str):
+        for key in _word_suffixes(name):
+            i = bisect_left(self._keys, (key, location_id))
+            if i < len(self._keys) and self._keys[i] == (key, location_id):
+                del self._keys[i]
+
+
+def _normalize_key(text: str) -> str:
+    return ' '.join(str(text).lower().replace(',', ' ').split())
+
+
+def _word_suffixes(name: str) -> List[str]:
+    words = _normalize_key(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def _short_prefixes(name: str) -> Set[str]:
+    return {key[:length] for key in _word_suffixes(name) for length in range(1, _SHORT_PREFIX)}
+
+
+_index: Optional[LocationPrefixIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_location_index() -> LocationPrefixIndex:
+    """The process-wide index, built from the Location table on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from .models import Location
+
+                rows = Location.objects.values_list('id', 'name', 'longitude', 'latitude', 'usage_count')
+                _index = LocationPrefixIndex.build(rows.iterator())
+    return _index
+
+
+def index_location(location) -> None:
+    """Add or refresh a location, if the index has been built in this process."""
+    if _index is not None:
+        _index.add(location.pk, location.name, location.coordinates, location.usage_count)
+
+
+def index_location_use(location_id: int) -> None:
+    if _index is not None:
+        _index.record_use(location_id)
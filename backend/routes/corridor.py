@@ -0,0 +1,240 @@
+"""
+Proximity and corridor search over stored route lines.
+
+Each saved route line is cut into its passes through a fixed lat/lon grid
+(ROUTE_CELL_DEGREES) and stored as ``RouteCell`` rows: an inverted index
+from cell to the routes crossing it, with the vertices of each pass. A query
+looks up only the cells within its radius, then measures exact distances
+against those short pieces, so no route is ever decoded in full.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+
+from .geometry import EARTH_RADIUS_KM, decode_polyline, encode_polyline, haversine_km, simplify_line, snap_to_line
+from .models import RouteCell
+
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Keeps the IN (...) list well under database parameter limits
+_CELL_BATCH = 500
+
+# Corridor lines are simplified to one pixel at this zoom (about 40 m or less)
+CORRIDOR_SIMPLIFY_ZOOM = 12
+
+
+def line_pieces(coordinates: Sequence[Sequence[float]], size: Optional[float] = None) -> List[Tuple[int, List]]:
+    """
+    Split a line into ``(cell_id, points)`` passes through the grid. A pass
+    holds every vertex of the consecutive segments crossing the cell,
+    including the end points just outside it.
+    """
+    size = size or settings.ROUTE_CELL_DEGREES
+    if len(coordinates) == 1:
+        return [(_cell_id(*_grid(coordinates[0], size), size), [list(coordinates[0])])]
+    pieces = []
+    open_pieces: Dict[int, Tuple[int, List]] = {}  # cell -> (last segment index, points)
+    for i, (a, b) in enumerate(zip(coordinates, coordinates[1:])):
+        for cell in _segment_cells(a, b, size):
+            last, points = open_pieces.get(cell, (None, None))
+            if last == i - 1:
+                points.append(list(b))
+            elif last != i:
+                points = [list(a), list(b)]
+                pieces.append((cell, points))
+            open_pieces[cell] = (i, points)
+    return pieces
+
+
+def index_route(route, coordinates: Sequence[Sequence[float]], size: Optional[float] = None):
+    """(Re)build the cell index rows for ``route``."""
+    RouteCell.objects.filter(route_optimization=route).delete()
+    if not coordinates:
+        return
+    RouteCell.objects.bulk_create([
+        RouteCell(route_optimization=route, cell=cell, points=encode_polyline(points))
+        for cell, points in line_pieces(coordinates, size)
+    ], batch_size=1000)
+
+
+def near_point(point: Sequence[float], radius_km: float, since=None, until=None,
+               exclude: Optional[int] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    ``(route_id, distance_km)`` for routes passing within ``radius_km`` of
+    ``point``, nearest first. ``since`` / ``until`` bound the route's
+    ``created_at``; ``exclude`` skips one route id.
+    """
+    size = settings.ROUTE_CELL_DEGREES
+    best: Dict[int, float] = {}
+    for route_id, _, points in _pieces(_cells_near(point, radius_km, size), since, until, exclude):
+        distance = _point_line_km(point, points)
+        if distance <= radius_km and distance < best.get(route_id, math.inf):
+            best[route_id] = distance
+    return _ranked(best, limit)
+
+
+def near_line(line: Sequence[Sequence[float]], radius_km: float, since=None, until=None,
+              exclude: Optional[int] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    ``(route_id, distance_km)`` for routes coming within ``radius_km`` of the
+    corridor ``line``, nearest first. Filters as for ``near_point``. The
+    corridor is first simplified to within a few tens of metres.
+    """
+    size = settings.ROUTE_CELL_DEGREES
+    line = simplify_line(line, CORRIDOR_SIMPLIFY_ZOOM)
+    by_cell: Dict[int, List[List]] = defaultdict(list)
+    for cell, points in line_pieces(line, size):
+        by_cell[cell].append(points)
+    # Each cell near the corridor maps to the corridor pieces it must be measured against;
+    # the cells around a corridor cell are gathered once, however often the line passes it
+    nearby: Dict[int, List[Tuple[Tuple, List]]] = defaultdict(list)
+    for cell, pieces in by_cell.items():
+        entries = [(_bounds(points, 0), points) for points in pieces]
+        for near in _cells_near_cell(cell, [p for points in pieces for p in points], radius_km, size):
+            nearby[near].extend(entries)
+
+    best: Dict[int, float] = {}
+    for route_id, cell, points in _pieces(nearby.keys(), since, until, exclude):
+        if best.get(route_id) == 0:
+            continue
+        extent = _bounds(points, 0)
+        # Nearest boxes first; a box gap is a lower bound on the exact distance
+        candidates = sorted(
+            (gap, corridor) for gap, corridor in
+            ((_box_gap_km(extent, box), corridor) for box, corridor in nearby[cell])
+            if gap <= radius_km
+        )
+        for gap, corridor in candidates:
+            if gap >= best.get(route_id, radius_km):
+                break
+            distance = _line_line_km(points, corridor)
+            if distance <= radius_km and distance < best.get(route_id, math.inf):
+                best[route_id] = distance
+    return _ranked(best, limit)
+
+
+def _pieces(cells: Iterable[int], since, until, exclude: Optional[int]):
+    """Yield ``(route_id, cell, points)`` for stored passes through ``cells``."""
+    cells = list(cells)
+    for start in range(0, len(cells), _CELL_BATCH):
+        queryset = RouteCell.objects.filter(cell__in=cells[start:start + _CELL_BATCH])
+        if since is not None:
+            queryset = queryset.filter(route_optimization__created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(route_optimization__created_at__lt=until)
+        if exclude is not None:
+            queryset = queryset.exclude(route_optimization_id=exclude)
+        for route_id, cell, points in queryset.values_list('route_optimization_id', 'cell', 'points').iterator():
+            yield route_id, cell, decode_polyline(points)
+
+
+def _ranked(best: Dict[int, float], limit: Optional[int]) -> List[Tuple[int, float]]:
+    ranked = sorted(best.items(), key=lambda item: (item[1], -item[0]))
+    return ranked[:limit] if limit else ranked
+
+
+def _grid(point: Sequence[float], size: float) -> Tuple[int, int]:
+    return math.floor((point[0] + 180) / size), math.floor((point[1] + 90) / size)
+
+
+def _cell_id(ix: int, iy: int, size: float) -> int:
+    columns = round(360 / size)
+    return iy * columns + ix % columns
+
+
+def _segment_cells(a: Sequence[float], b: Sequence[float], size: float) -> List[int]:
+    """Every grid cell the segment ``a -> b`` passes through (grid traversal)."""
+    x0, y0 = (a[0] + 180) / size, (a[1] + 90) / size
+    x1, y1 = (b[0] + 180) / size, (b[1] + 90) / size
+    ix, iy = math.floor(x0), math.floor(y0)
+    end_x, end_y = math.floor(x1), math.floor(y1)
+    dx, dy = x1 - x0, y1 - y0
+    step_x, step_y = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+    delta_x = abs(1 / dx) if dx else math.inf
+    delta_y = abs(1 / dy) if dy else math.inf
+    next_x = ((ix + 1 - x0) if dx > 0 else (x0 - ix)) * delta_x if dx else math.inf
+    next_y = ((iy + 1 - y0) if dy > 0 else (y0 - iy)) * delta_y if dy else math.inf
+
+    cells = [_cell_id(ix, iy, size)]
+    for _ in range(abs(end_x - ix) + abs(end_y - iy)):
+        if next_x < next_y:
+            next_x += delta_x
+            ix += step_x
+        else:
+            next_y += delta_y
+            iy += step_y
+        cells.append(_cell_id(ix, iy, size))
+    return cells
+
+
+def _cells_near(point: Sequence[float], radius_km: float, size: float) -> Set[int]:
+    """Cells overlapping the box around ``point`` that contains the search circle."""
+    lat_span = radius_km / _KM_PER_DEGREE
+    widest = min(89.0, abs(point[1]) + lat_span)
+    lon_span = min(180.0, radius_km / (_KM_PER_DEGREE * math.cos(math.radians(widest))))
+    west, south = _grid((point[0] - lon_span, point[1] - lat_span), size)
+    east, north = _grid((point[0] + lon_span, point[1] + lat_span), size)
+    return {_cell_id(ix, iy, size) for ix in range(west, east + 1) for iy in range(south, north + 1)}
+
+
+def _cells_near_cell(cell: int, points: Sequence[Sequence[float]], radius_km: float, size: float) -> Set[int]:
+    columns = round(360 / size)
+    iy, ix = divmod(cell, columns)
+    widest = min(89.0, max(abs(p[1]) for p in points) + radius_km / _KM_PER_DEGREE)
+    rings_y = math.ceil(radius_km / _KM_PER_DEGREE / size)
+    rings_x = min(columns // 2, math.ceil(radius_km / (_KM_PER_DEGREE * math.cos(math.radians(widest))) / size))
+    return {
+        _cell_id(ix + dx, iy + dy, size)
+        for dx in range(-rings_x, rings_x + 1) for dy in range(-rings_y, rings_y + 1)
+    }
+
+
+def _bounds(points: Sequence[Sequence[float]], radius_km: float) -> Tuple[float, float, float, float]:
+    """``(west, south, east, north)`` of ``points``, grown by ``radius_km``."""
+    lons = [p[0] for p in points]
+    lats = [p[1] for p in points]
+    lat_margin = radius_km / _KM_PER_DEGREE
+    widest = min(89.0, max(abs(min(lats)), abs(max(lats))) + lat_margin)
+    lon_margin = radius_km / (_KM_PER_DEGREE * math.cos(math.radians(widest)))
+    return min(lons) - lon_margin, min(lats) - lat_margin, max(lons) + lon_margin, max(lats) + lat_margin
+
+
+def _box_gap_km(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> float:
+    """Distance between two ``(west, south, east, north)`` boxes, 0 when they overlap."""
+    gap_lon = max(a[0] - b[2], b[0] - a[2], 0.0)
+    gap_lat = max(a[1] - b[3], b[1] - a[3], 0.0)
+    # Longitude degrees are shortest at the box edge nearest a pole
+    widest = min(89.0, max(abs(a[1]), abs(a[3]), abs(b[1]), abs(b[3])))
+    return _KM_PER_DEGREE * math.hypot(gap_lon * math.cos(math.radians(widest)), gap_lat)
+
+
+def _point_line_km(point: Sequence[float], line: Sequence[Sequence[float]]) -> float:
+    if len(line) == 1:
+        return haversine_km(point, line[0])
+    return snap_to_line(line, point).offset_km
+
+
+def _line_line_km(a: Sequence[Sequence[float]], b: Sequence[Sequence[float]]) -> float:
+    """Shortest distance between two short lines (0 where they cross)."""
+    if _crosses(a, b):
+        return 0.0
+    return min(
+        min(_point_line_km(point, b) for point in a),
+        min(_point_line_km(point, a) for point in b),
+    )
+
+
+def _crosses(a: Sequence[Sequence[float]], b: Sequence[Sequence[float]]) -> bool:
+    def orientation(p, q, r):
+        value = (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+        return (value > 0) - (value < 0)
+
+    for p1, p2 in zip(a, a[1:]):
+        for q1, q2 in zip(b, b[1:]):
+            if (orientation(p1, p2, q1) * orientation(p1, p2, q2) < 0
+                    and orientation(q1, q2, p1) * orientation(q1, q2, p2) < 0):
+                return True
+    return False
@@ -0,0 +1,151 @@
+"""
+Fleet overview map: every active route at once, simplified for the zoom.
+
+Each route's line is simplified with Douglas-Peucker at the zoom levels in
+FLEET_ZOOM_LEVELS when it is saved, and its extent is stored, so building a
+view only decodes short polylines for the routes that overlap it.
+Coordinates are rounded to what one pixel can show at the zoom. Responses
+are cached per zoom (overview) or per tile for FLEET_CACHE_SECONDS, keyed on
+a generation read from the database (the newest active route, its last
+update and the active count), so a save in any worker invalidates them.
+Routes saved before the simplified lines existed are filled in by
+``manage.py backfill_fleet_geometry``.
+"""
+
+import math
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from trucklogix.renderers import dumps
+
+from .geometry import clip_line, decode_polyline, encode_polyline, simplify_line, tile_bounds
+from .models import RouteOptimization
+
+# Tiles are clipped with this fraction of a tile as margin, so lines
+# crossing a tile edge join up without gaps when drawn
+TILE_BUFFER = 1 / 16
+
+MAX_ZOOM = 22
+
+
+def simplified_fields(coordinates: Sequence[Sequence[float]]) -> Dict:
+    """The fleet-map fields to store on a route with this line."""
+    if not coordinates:
+        return {'simplified_geometry': {}}
+    lons = [c[0] for c in coordinates]
+    lats = [c[1] for c in coordinates]
+    # Finest level first; each coarser level simplifies the previous one's output
+    levels, line = {}, coordinates
+    for zoom in sorted(settings.FLEET_ZOOM_LEVELS, reverse=True):
+        line = simplify_line(line, zoom, settings.FLEET_SIMPLIFY_PIXELS)
+        levels[str(zoom)] = encode_polyline(line)
+    return {
+        'simplified_geometry': levels,
+        'min_longitude': min(lons),
+        'min_latitude': min(lats),
+        'max_longitude': max(lons),
+        'max_latitude': max(lats),
+    }
+
+
+def overview(zoom: int, bounds: Optional[Sequence[float]] = None) -> bytes:
+    """GeoJSON FeatureCollection of active routes at ``zoom``, optionally within ``bounds``."""
+    key = f"overview:{zoom}:{','.join(f'{v:.4f}' for v in bounds) if bounds else 'world'}"
+    return _cached(key, lambda: _build(zoom, bounds, clip=False))
+
+
+def tile(z: int, x: int, y: int) -> bytes:
+    """GeoJSON FeatureCollection of active routes clipped to slippy-map tile ``z/x/y``."""
+    return _cached(f'tile:{z}:{x}:{y}', lambda: _build(z, tile_bounds(z, x, y), clip=True))
+
+
+def _cached(key: str, build) -> bytes:
+    cache_key = f'fleet:{_generation()}:{key}'
+    body = caches['fleet'].get(cache_key)
+    if body is None:
+        body = build()
+        caches['fleet'].set(cache_key, body, settings.FLEET_CACHE_SECONDS)
+    return body
+
+
+def _build(zoom: int, bounds: Optional[Sequence[float]], clip: bool) -> bytes:
+    decimals = _decimals(zoom)
+    if bounds is not None and clip:
+        west, south, east, north = bounds
+        margin_x, margin_y = (east - west) * TILE_BUFFER, (north - south) * TILE_BUFFER
+        bounds = (west - margin_x, south - margin_y, east + margin_x, north + margin_y)
+
+    features = []
+    for route in _active_routes(bounds):
+        line = _line_for_zoom(route, zoom)
+        parts = clip_line(line, bounds) if clip else [line]
+        parts = [part for part in (_rounded(part, decimals) for part in parts) if part]
+        if not parts:
+            continue
+        features.append({
+            'type': 'Feature',
+            'id': route['id'],
+            'geometry': (
+                {'type': 'LineString', 'coordinates': parts[0]} if len(parts) == 1
+                else {'type': 'MultiLineString', 'coordinates': parts}
+            ),
+            'properties': {'id': route['id'], 'optimized_route': route['optimized_route']},
+        })
+    return dumps({'type': 'FeatureCollection', 'features': features})
+
+
+def _generation() -> str:
+    """Changes whenever a route in the active window is saved, updated or removed."""
+    # One aggregate over the created_at index; routes ageing out change the count
+    since = timezone.now() - timedelta(hours=settings.FLEET_ACTIVE_HOURS)
+    latest = RouteOptimization.objects.filter(created_at__gte=since).aggregate(
+        newest=Max('id'), updated=Max('updated_at'), count=Count('id')
+    )
+    updated = latest['updated'].timestamp() if latest['updated'] else 0
+    return f"{latest['newest'] or 0}-{updated:.6f}-{latest['count']}"
+
+
+def _active_routes(bounds: Optional[Sequence[float]]) -> List[Dict]:
+    """
+    Routes saved within FLEET_ACTIVE_HOURS that have not been re-routed since,
+    newest first and overlapping ``bounds`` when given.
+    """
+    since = timezone.now() - timedelta(hours=settings.FLEET_ACTIVE_HOURS)
+    queryset = RouteOptimization.objects.filter(created_at__gte=since, reroutes__isnull=True).exclude(geometry='')
+    if bounds is not None:
+        west, south, east, north = bounds
+        queryset = queryset.filter(
+            min_longitude__lte=east, max_longitude__gte=west,
+            min_latitude__lte=north, max_latitude__gte=south,
+        )
+    return list(
+        queryset.order_by('-created_at')
+        .values('id', 'optimized_route', 'geometry', 'simplified_geometry')[:settings.FLEET_MAX_ROUTES]
+    )
+
+
+def _line_for_zoom(route: Dict, zoom: int) -> List[List[float]]:
+    # The coarsest stored level that is still at least as detailed as the zoom needs
+    levels = sorted(int(level) for level in route['simplified_geometry'])
+    level = next((level for level in levels if level >= zoom), None)
+    if level is None:
+        return decode_polyline(route['geometry'])
+    return decode_polyline(route['simplified_geometry'][str(level)])
+
+
+def _decimals(zoom: int) -> int:
+    # Enough decimal places to resolve one pixel (360 / (256 * 2^zoom) degrees)
+    return max(0, min(5, math.ceil(math.log10(256 * 2 ** zoom / 360))))
+
+
+def _rounded(line: Sequence[Sequence[float]], decimals: int) -> List[List[float]]:
+    rounded = []
+    for lon, lat in ((round(c[0], decimals), round(c[1], decimals)) for c in line):
+        if not rounded or rounded[-1] != [lon, lat]:
+            rounded.append([lon, lat])
+    return rounded if len(rounded) > 1 else []
@@ -0,0 +1,147 @@
+"""
+Vectorized fuel and time estimation for fleet budgeting.
+
+Each route keeps its per-step distances and durations from the directions
+response as a packed float32 array (``RouteOptimization.segment_metrics``),
+so thousands of routes load without parsing. Truck profiles are plain
+data (``TRUCK_PROFILES``): consumption at the most economical speed, a
+quadratic penalty for driving faster or slower than it, a per-tonne load
+penalty, a speed cap and auxiliary (e.g. reefer) burn per hour.
+``estimate_routes`` lays the segments of many routes end to end in one
+array and evaluates every profile against all of them at once with NumPy,
+then sums per route with ``np.add.reduceat``.
+"""
+
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+_PACKED_DTYPE = np.dtype('<f4')
+
+# Speeds below this (km/h) are treated as this for the efficiency curve
+_MIN_CURVE_SPEED_KMH = 5.0
+
+
+@dataclass(frozen=True)
+class TruckProfile:
+    label: str
+    # Litres per 100 km at optimal_speed_kmh with an empty trailer
+    base_l_per_100km: float = 24.0
+    optimal_speed_kmh: float = 80.0
+    # Relative extra consumption per squared relative deviation from the optimal speed
+    speed_coefficient: float = 0.6
+    load_kg: float = 0.0
+    # Relative extra consumption per tonne of load
+    weight_coefficient_per_tonne: float = 0.012
+    # Governed top speed; faster segments take the time this speed allows
+    max_speed_kmh: float = 105.0
+    # Fuel burned per hour of travel by equipment other than the engine's traction
+    auxiliary_l_per_hour: float = 0.0
+
+
+TRUCK_PROFILES: Dict[str, TruckProfile] = {
+    'empty': TruckProfile(label='Tractor-trailer, empty'),
+    'standard': TruckProfile(label='Tractor-trailer, 15 t load', load_kg=15000),
+    'heavy': TruckProfile(label='Tractor-trailer, 25 t load', load_kg=25000, max_speed_kmh=100),
+    'reefer': TruckProfile(label='Refrigerated trailer, 15 t load', load_kg=15000, auxiliary_l_per_hour=2.0),
+}
+
+_PROFILE_FIELDS = tuple(field for field in TruckProfile.__dataclass_fields__ if field != 'label')
+
+
+def segment_metrics(feature: Dict) -> bytes:
+    """
+    Pack the per-step distances and durations of a directions feature,
+    falling back to its segments and then to the summary.
+    """
+    properties = feature.get('properties', {})
+    segments = properties.get('segments') or []
+    steps = [step for segment in segments for step in segment.get('steps') or []]
+    parts = steps or segments or [properties.get('summary') or {}]
+    return np.array(
+        [[part.get('distance') or 0.0 for part in parts], [part.get('duration') or 0.0 for part in parts]],
+        dtype=_PACKED_DTYPE,
+    ).tobytes()
+
+
+def unpack_metrics(packed: bytes, distance_meters: Optional[float] = None,
+                   duration_seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ``(distances, durations)`` from ``segment_metrics``; routes stored without
+    them get one segment spanning the route's totals.
+    """
+    if not packed:
+        return np.array([distance_meters or 0.0]), np.array([duration_seconds or 0.0])
+    values = np.frombuffer(packed, dtype=_PACKED_DTYPE).astype(float)
+    return values[:len(values) // 2], values[len(values) // 2:]
+
+
+def resolve_profile(spec) -> Tuple[str, TruckProfile]:
+    """
+    A profile name, or a dict with ``name`` and optional ``base`` (a profile
+    name, default ``standard``) plus any TruckProfile fields to override.
+    Raises KeyError for an unknown profile name.
+    """
+    if isinstance(spec, str):
+        return spec, TRUCK_PROFILES[spec]
+    base = TRUCK_PROFILES[spec.get('base', 'standard')]
+    overrides = {field: spec[field] for field in _PROFILE_FIELDS if spec.get(field) is not None}
+    return spec['name'], replace(base, label=spec.get('label') or spec['name'], **overrides)
+
+
+def profile_dict(name: str, profile: TruckProfile) -> Dict:
+    return {'name': name, **asdict(profile)}
+
+
+def estimate_routes(routes: Sequence[Tuple[np.ndarray, np.ndarray]], profiles: Sequence[TruckProfile],
+                    include_segments: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Evaluate ``profiles`` against ``routes``, each ``(distances, durations)``
+    as returned by ``unpack_metrics`` (at least one segment).
+
+    Returns ``fuel_liters`` and ``duration_seconds`` arrays of shape
+    (profiles, routes), ``distance_meters`` of shape (routes,), and with
+    ``include_segments`` the per-segment ``segment_fuel_liters`` /
+    ``segment_duration_seconds`` (profiles, segments) plus ``offsets``,
+    where each route's segments start.
+    """
+    lengths = np.fromiter((len(distances) for distances, _ in routes), dtype=np.int64, count=len(routes))
+    offsets = np.zeros(len(routes), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    distance = np.concatenate([distances for distances, _ in routes])
+    duration = np.concatenate([durations for _, durations in routes])
+
+    # Profile parameters as (profiles, 1) columns broadcast against (segments,)
+    columns = {
+        field: np.array([getattr(profile, field) for profile in profiles], dtype=float)[:, None]
+        for field in _PROFILE_FIELDS
+    }
+    max_speed_ms = columns['max_speed_kmh'] / 3.6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ors_speed_ms = np.where(duration > 0, distance / duration, np.inf)
+    # Segments ORS expects faster than the governor allows take longer
+    segment_duration = np.where(ors_speed_ms > max_speed_ms, distance / max_speed_ms, duration)
+    speed_kmh = np.clip(np.minimum(ors_speed_ms, max_speed_ms) * 3.6, _MIN_CURVE_SPEED_KMH, None)
+
+    deviation = (speed_kmh - columns['optimal_speed_kmh']) / columns['optimal_speed_kmh']
+    l_per_100km = (
+        columns['base_l_per_100km']
+        * (1 + columns['weight_coefficient_per_tonne'] * columns['load_kg'] / 1000)
+        * (1 + columns['speed_coefficient'] * deviation ** 2)
+    )
+    segment_fuel = l_per_100km * distance / 100000 + columns['auxiliary_l_per_hour'] * segment_duration / 3600
+
+    result = {
+        'fuel_liters': np.add.reduceat(segment_fuel, offsets, axis=1),
+        'duration_seconds': np.add.reduceat(segment_duration, offsets, axis=1),
+        'distance_meters': np.add.reduceat(distance, offsets),
+    }
+    if include_segments:
+        result.update({
+            'segment_fuel_liters': segment_fuel,
+            'segment_duration_seconds': segment_duration,
+            'offsets': offsets,
+        })
+    return result
+
@@ -0,0 +1,208 @@
+"""
+Geometry helpers for routes. Coordinates are ``[lon, lat]`` as returned by ORS.
+"""
+
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(a: Sequence[float], b: Sequence[float]) -> float:
+    """Great-circle distance in kilometres between two ``[lon, lat]`` points."""
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def cumulative_km(coordinates: Sequence[Sequence[float]]) -> List[float]:
+    """Distance along the line to each vertex, starting at 0."""
+    distances = [0.0]
+    for a, b in zip(coordinates, coordinates[1:]):
+        distances.append(distances[-1] + haversine_km(a, b))
+    return distances
+
+
+class Snap(NamedTuple):
+    segment: int  # the point projects onto coordinates[segment] -> coordinates[segment + 1]
+    fraction: float  # position along that segment, 0..1
+    point: List[float]  # the projected [lon, lat]
+    offset_km: float  # distance from the point to the line
+
+
+def snap_to_line(coordinates: Sequence[Sequence[float]], point: Sequence[float],
+                 prefer_within_km: Optional[float] = None) -> Snap:
+    """
+    Project ``point`` onto the nearest segment of a line with at least two
+    vertices. Uses a local equirectangular projection, accurate at the scale
+    of one road segment.
+
+    With ``prefer_within_km``, the first stretch of the line passing that
+    close wins over nearer segments further along, so a point on an
+    out-and-back route snaps to the outbound leg.
+    """
+    lon0, lat0 = point[0], point[1]
+    scale = math.cos(math.radians(lat0))
+    reach2 = None if prefer_within_km is None else (prefer_within_km * 180 / (math.pi * EARTH_RADIUS_KM)) ** 2
+    best = first = None
+    for i in range(len(coordinates) - 1):
+        ax, ay = (coordinates[i][0] - lon0) * scale, coordinates[i][1] - lat0
+        bx, by = (coordinates[i + 1][0] - lon0) * scale, coordinates[i + 1][1] - lat0
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        t = 0.0 if length2 == 0 else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+        px, py = ax + t * dx, ay + t * dy
+        d2 = px * px + py * py
+        if reach2 is not None and d2 <= reach2:
+            if first is None or d2 < first[0]:
+                first = (d2, i, t, px, py)
+        elif first is not None:
+            # The first stretch within reach has ended
+            break
+        if best is None or d2 < best[0]:
+            best = (d2, i, t, px, py)
+    _, i, t, px, py = first or best
+    projected = [lon0 + px / scale, lat0 + py]
+    return Snap(i, t, projected, haversine_km(point, projected))
+
+
+def mercator(point: Sequence[float]) -> Tuple[float, float]:
+    """Web Mercator ``(x, y)`` of a ``[lon, lat]`` point, both 0..1 across the world."""
+    lat = max(-85.05112878, min(85.05112878, point[1]))
+    siny = math.sin(math.radians(lat))
+    return (point[0] + 180) / 360, 0.5 - math.log((1 + siny) / (1 - siny)) / (4 * math.pi)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """``(west, south, east, north)`` in degrees of slippy-map tile ``z/x/y``."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def simplify_line(coordinates: Sequence[Sequence[float]], zoom: int, pixels: float = 1.0) -> List[Sequence[float]]:
+    """
+    Douglas-Peucker simplification for display at ``zoom``: drops vertices
+    that move the line by less than ``pixels`` on a 256px-tile map.
+    """
+    if len(coordinates) < 3:
+        return list(coordinates)
+    tolerance2 = (pixels / (256 * 2 ** zoom)) ** 2
+    projected = [mercator(c) for c in coordinates]
+    keep = [False] * len(coordinates)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coordinates) - 1)]
+    while stack:
+        start, end = stack.pop()
+        (ax, ay), (bx, by) = projected[start], projected[end]
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        best, best_d2 = None, tolerance2
+        for i in range(start + 1, end):
+            px, py = projected[i]
+            t = 0.0 if length2 == 0 else min(1.0, max(0.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+            ex, ey = ax + t * dx - px, ay + t * dy - py
+            d2 = ex * ex + ey * ey
+            if d2 > best_d2:
+                best, best_d2 = i, d2
+        if best is not None:
+            keep[best] = True
+            stack.append((start, best))
+            stack.append((best, end))
+    return [c for c, k in zip(coordinates, keep) if k]
+
+
+def clip_line(coordinates: Sequence[Sequence[float]], bounds: Sequence[float]) -> List[List[List[float]]]:
+    """
+    Clip a line to ``(west, south, east, north)``, returning the parts inside
+    (Liang-Barsky per segment; consecutive clipped segments are joined).
+    """
+    west, south, east, north = bounds
+    parts, current = [], []
+    for a, b in zip(coordinates, coordinates[1:]):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, a[0] - west), (dx, east - a[0]), (-dy, a[1] - south), (dy, north - a[1])):
+            if p == 0:
+                if q < 0:
+                    t0, t1 = 1.0, 0.0
+                    break
+                continue
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+        if t0 > t1:
+            if current:
+                parts.append(current)
+                current = []
+            continue
+        start = [a[0] + t0 * dx, a[1] + t0 * dy]
+        end = [a[0] + t1 * dx, a[1] + t1 * dy]
+        if not current:
+            current = [start]
+        current.append(end)
+        if t1 < 1.0:
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+    return [part for part in parts if len(part) > 1]
+
+
+def encode_polyline(coordinates: Sequence[Sequence[float]], precision: int = 5) -> str:
+    """
+    Encode ``[lon, lat]`` points with the Google encoded-polyline algorithm
+    (lat/lon order on the wire, as map libraries expect).
+    """
+    factor = 10 ** precision
+    output = []
+    prev_lat = prev_lon = 0
+    for lon, lat in ((c[0], c[1]) for c in coordinates):
+        lat_i, lon_i = int(round(lat * factor)), int(round(lon * factor))
+        _encode_value(lat_i - prev_lat, output)
+        _encode_value(lon_i - prev_lon, output)
+        prev_lat, prev_lon = lat_i, lon_i
+    return ''.join(output)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Decode an encoded polyline back into ``[lon, lat]`` points."""
+    factor = 10 ** precision
+    coordinates = []
+    index = lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        delta, index = _decode_value(encoded, index)
+        lat += delta
+        delta, index = _decode_value(encoded, index)
+        lon += delta
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
+
+
+def _encode_value(value: int, output: List[str]):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        output.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    output.append(chr(value + 63))
+
+
+def _decode_value(encoded: str, index: int):
+    result = shift = 0
+    while True:
+        byte = ord(encoded[index]) - 63
+        index += 1
+        result |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            break
+    return (~(result >> 1) if result & 1 else result >> 1), index
@@ -0,0 +1,90 @@
+"""
+Location registry: named places with stored coordinates.
+
+Lookups bump the location's usage count (which ranks autocomplete
+suggestions) in memory; the counts are written in batches rather than one
+UPDATE per lookup.
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+
+from .autocomplete import index_location, index_location_use
+from .models import Location
+
+
+def normalize_location_name(name: str) -> str:
+    """Case- and whitespace-insensitive form used for registry lookups."""
+    return ' '.join(str(name).lower().split())
+
+
+_pending_uses: Counter = Counter()
+_pending_since: Optional[float] = None
+_pending_lock = threading.Lock()
+
+
+def lookup_location(name: str, count_use: bool = True) -> Optional[Location]:
+    """Return the registered location for ``name``, bumping its usage count."""
+    location = Location.objects.filter(normalized_name=normalize_location_name(name)).first()
+    if location is not None and count_use:
+        location.usage_count += 1
+        index_location_use(location.pk)
+        _record_use(location.pk)
+    return location
+
+
+def flush_location_usage() -> int:
+    """Write the buffered usage counts; returns the number of locations updated."""
+    global _pending_since
+    with _pending_lock:
+        pending = dict(_pending_uses)
+        _pending_uses.clear()
+        _pending_since = None
+    # One UPDATE per distinct increment rather than per location
+    by_count = defaultdict(list)
+    for location_id, count in pending.items():
+        by_count[count].append(location_id)
+    for count, location_ids in by_count.items():
+        Location.objects.filter(pk__in=location_ids).update(usage_count=F('usage_count') + count)
+    return len(pending)
+
+
+def _record_use(location_id: int):
+    global _pending_since
+    now = time.monotonic()
+    with _pending_lock:
+        _pending_uses[location_id] += 1
+        if _pending_since is None:
+            _pending_since = now
+        due = (sum(_pending_uses.values()) >= settings.LOCATION_USAGE_FLUSH_BATCH
+               or now - _pending_since >= settings.LOCATION_USAGE_FLUSH_SECONDS)
+    if due:
+        flush_location_usage()
+
+
+def register_location(name: str, coordinates: List[float], usage_count: int = 1) -> Location:
+    """
+    Add ``name`` at ``[lon, lat]`` to the registry, or update its coordinates
+    if it is already registered.
+    """
+    normalized = normalize_location_name(name)
+    longitude, latitude = float(coordinates[0]), float(coordinates[1])
+    try:
+        location, created = Location.objects.get_or_create(
+            normalized_name=normalized,
+            defaults={'name': name.strip(), 'longitude': longitude, 'latitude': latitude, 'usage_count': usage_count},
+        )
+    except IntegrityError:
+        # Registered concurrently by another request
+        location, created = Location.objects.get(normalized_name=normalized), False
+    if not created and (location.longitude, location.latitude) != (longitude, latitude):
+        location.longitude, location.latitude = longitude, latitude
+        location.save(update_fields=['longitude', 'latitude', 'updated_at'])
+    index_location(location)
+    return location
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from routes.models import ArchivedRouteOptimization, RouteOptimization
+from routes.readers import route_rows
+from trucklogix.retention import archive_rows
+
+
+class Command(BaseCommand):
+    help = "Move route optimizations older than the retention age into the compressed archive table. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ROUTE_RETENTION_DAYS,
+            help='Archive routes created longer ago than this many days.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Routes copied per archive transaction.')
+        parser.add_argument('--delete-batch', type=int, default=100, help='Routes deleted per transaction.')
+        parser.add_argument('--limit', type=int, help='Maximum number of routes to archive in this run.')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between delete batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many routes would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_routes = RouteOptimization.objects.filter(created_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{old_routes.count()} routes created before {cutoff:%Y-%m-%d} would be archived.')
+            return
+
+        archived = archive_rows(
+            old_routes,
+            ArchivedRouteOptimization,
+            serialize=lambda ids: route_rows(RouteOptimization.objects.filter(id__in=ids).order_by('id'), detail=True),
+            make_archive=lambda row, payload: ArchivedRouteOptimization(
+                id=row['id'],
+                optimized_route=row['optimized_route'],
+                created_at=row['created_at'],
+                payload=payload,
+            ),
+            chunk_size=options['chunk_size'],
+            delete_batch_size=options['delete_batch'],
+            limit=options['limit'],
+            pause_seconds=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} routes created before {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from routes import fleet
+from routes.models import RouteOptimization
+
+FIELDS = ['simplified_geometry', 'min_longitude', 'min_latitude', 'max_longitude', 'max_latitude', 'updated_at']
+
+
+class Command(BaseCommand):
+    help = "Store the fleet-map simplified lines and extents of routes saved before they were computed on write."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Maximum number of routes to backfill in this run.'
+        )
+
+    def handle(self, *args, **options):
+        routes = (
+            RouteOptimization.objects.exclude(geometry='').filter(min_longitude__isnull=True)
+            .order_by('id').only('id', 'geometry')
+        )
+        if options['limit']:
+            routes = routes[:options['limit']]
+
+        batch, count = [], 0
+        for route in routes.iterator(chunk_size=500):
+            for field, value in fleet.simplified_fields(route.geometry_coordinates()).items():
+                setattr(route, field, value)
+            # Moves the fleet cache generation on, so cached maps pick the routes up
+            route.updated_at = timezone.now()
+            batch.append(route)
+            if len(batch) >= 500:
+                RouteOptimization.objects.bulk_update(batch, FIELDS)
+                count, batch = count + len(batch), []
+        if batch:
+            RouteOptimization.objects.bulk_update(batch, FIELDS)
+            count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {count} routes.'))
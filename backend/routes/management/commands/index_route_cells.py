@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from routes.corridor import index_route
+from routes.models import RouteCell, RouteOptimization
+
+
+class Command(BaseCommand):
+    help = "Build the grid-cell index used by route proximity and corridor search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Re-index every route (e.g. after changing ROUTE_CELL_DEGREES), not just unindexed ones.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Maximum number of routes to index in this run.'
+        )
+
+    def handle(self, *args, **options):
+        routes = RouteOptimization.objects.exclude(geometry='').order_by('id').only('id', 'geometry')
+        if not options['rebuild']:
+            routes = routes.exclude(id__in=RouteCell.objects.values('route_optimization_id'))
+        if options['limit']:
+            routes = routes[:options['limit']]
+
+        count = 0
+        for route in routes.iterator(chunk_size=500):
+            index_route(route, route.geometry_coordinates())
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} routes.'))
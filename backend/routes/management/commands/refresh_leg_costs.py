@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from routes.matrix import refresh_legs, stale_legs
+from routes.resilience import OrsUnavailableError
+from routes.services import get_route_optimization_service
+
+
+class Command(BaseCommand):
+    help = "Re-fetch stored leg costs older than the TTL. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl-seconds', type=int, default=settings.LEG_COST_TTL_SECONDS,
+            help='Refresh legs last updated longer ago than this.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=1000,
+            help='Maximum number of legs to refresh in this run.'
+        )
+
+    def handle(self, *args, **options):
+        service = get_route_optimization_service()
+        if service is None:
+            raise CommandError('OpenRouteService API key is not set.')
+
+        legs = list(stale_legs(options['ttl_seconds'])[:options['limit']])
+        if not legs:
+            self.stdout.write('No stale legs.')
+            return
+
+        try:
+            updated = refresh_legs(legs, service._fetch_matrix)
+        except OrsUnavailableError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {updated} of {len(legs)} stale legs.'))
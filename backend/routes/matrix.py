@@ -0,0 +1,138 @@
+"""
+Persistent duration/distance matrix among registered locations.
+
+Leg costs are stored once and read back as dense ``array('d')`` rows, so
+repeated legs between terminals, yards and customers are local lookups.
+Missing pairs are filled incrementally with one backend matrix fetch;
+``manage.py refresh_leg_costs`` re-fetches entries older than the TTL.
+"""
+
+from array import array
+from datetime import timedelta
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import LegCost, Location
+
+# fetch(coordinates, sources, destinations) -> (durations, distances), each
+# a len(sources) x len(destinations) nested list; entries may be None.
+MatrixFetcher = Callable[[List[List[float]], List[int], List[int]], Tuple[List[List], List[List]]]
+
+MISSING = float('nan')
+
+
+class LegCostMatrix:
+    """
+    Dense matrices over an ordered list of registered locations.
+    """
+
+    def __init__(self, locations: Sequence[Location]):
+        self.locations = list(locations)
+        # A location may appear more than once (e.g. two stops at one yard)
+        self.index: Dict[int, List[int]] = {}
+        for i, location in enumerate(self.locations):
+            self.index.setdefault(location.pk, []).append(i)
+        n = len(self.locations)
+        self.durations = [array('d', [MISSING] * n) for _ in range(n)]
+        self.distances = [array('d', [MISSING] * n) for _ in range(n)]
+        for positions in self.index.values():
+            for i in positions:
+                for j in positions:
+                    self.durations[i][j] = 0.0
+                    self.distances[i][j] = 0.0
+
+    def load(self) -> 'LegCostMatrix':
+        """Fill every stored leg among the locations with one query."""
+        ids = list(self.index)
+        legs = LegCost.objects.filter(origin_id__in=ids, destination_id__in=ids).values_list(
+            'origin_id', 'destination_id', 'duration_seconds', 'distance_meters'
+        )
+        for origin_id, destination_id, duration, distance in legs:
+            self._set(origin_id, destination_id, duration, distance)
+        return self
+
+    def _set(self, origin_id: int, destination_id: int, duration: float, distance: float):
+        for i in self.index[origin_id]:
+            for j in self.index[destination_id]:
+                self.durations[i][j] = duration
+                self.distances[i][j] = distance
+
+    def missing_pairs(self) -> List[Tuple[int, int]]:
+        n = len(self.locations)
+        return [
+            (i, j) for i in range(n) for j in range(n)
+            if self.durations[i][j] != self.durations[i][j]  # NaN
+        ]
+
+    def fill_missing(self, fetch: MatrixFetcher) -> int:
+        """
+        Fetch the missing pairs in one backend fetch and persist them.
+
+        Only rows and columns that have gaps are requested. Returns the number
+        of legs stored.
+        """
+        # One representative position per distinct location
+        missing = {
+            (self.index[self.locations[i].pk][0], self.index[self.locations[j].pk][0])
+            for i, j in self.missing_pairs()
+        }
+        if not missing:
+            return 0
+        sources = sorted({i for i, _ in missing})
+        destinations = sorted({j for _, j in missing})
+        coordinates = [location.coordinates for location in self.locations]
+        durations, distances = fetch(coordinates, sources, destinations)
+
+        legs = []
+        for si, i in enumerate(sources):
+            for di, j in enumerate(destinations):
+                if (i, j) not in missing:
+                    continue
+                duration, distance = durations[si][di], distances[si][di]
+                if duration is None or distance is None:
+                    continue
+                origin, destination = self.locations[i], self.locations[j]
+                self._set(origin.pk, destination.pk, duration, distance)
+                legs.append(LegCost(
+                    origin=origin,
+                    destination=destination,
+                    duration_seconds=duration,
+                    distance_meters=distance,
+                ))
+        LegCost.objects.bulk_create(legs, ignore_conflicts=True)
+        return len(legs)
+
+
+def stale_legs(ttl_seconds: int = None):
+    """Legs last refreshed more than ``ttl_seconds`` ago, oldest first."""
+    if ttl_seconds is None:
+        ttl_seconds = settings.LEG_COST_TTL_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=ttl_seconds)
+    return LegCost.objects.filter(updated_at__lt=cutoff).select_related('origin', 'destination').order_by('updated_at')
+
+
+def refresh_legs(legs: Sequence[LegCost], fetch: MatrixFetcher) -> int:
+    """
+    Re-fetch the given legs, one backend call per origin, and save them.
+    Returns the number of legs updated.
+    """
+    by_origin: Dict[int, List[LegCost]] = {}
+    for leg in legs:
+        by_origin.setdefault(leg.origin_id, []).append(leg)
+
+    updated = []
+    now = timezone.now()
+    for origin_legs in by_origin.values():
+        origin = origin_legs[0].origin
+        coordinates = [origin.coordinates] + [leg.destination.coordinates for leg in origin_legs]
+        durations, distances = fetch(coordinates, [0], list(range(1, len(coordinates))))
+        for k, leg in enumerate(origin_legs):
+            duration, distance = durations[0][k], distances[0][k]
+            if duration is None or distance is None:
+                continue
+            leg.duration_seconds, leg.distance_meters, leg.updated_at = duration, distance, now
+            updated.append(leg)
+    LegCost.objects.bulk_update(updated, ['duration_seconds', 'distance_meters', 'updated_at'])
+    return len(updated)
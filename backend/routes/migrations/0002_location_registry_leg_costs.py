@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+                ('longitude', models.FloatField()),
+                ('latitude', models.FloatField()),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-usage_count', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LegCost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration_seconds', models.FloatField()),
+                ('distance_meters', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_legs', to='routes.location')),
+                ('origin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_legs', to='routes.location')),
+            ],
+            options={
+                'unique_together': {('origin', 'destination')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0002_location_registry_leg_costs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='distance_meters',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='geometry',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='way_points',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0003_route_geometry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRouteOptimization',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('optimized_route', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='routeoptimization',
+            index=models.Index(fields=['created_at'], name='route_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0004_archived_routes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='rerouted_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reroutes', to='routes.routeoptimization'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0005_route_rerouted_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='max_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='max_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='min_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='min_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='simplified_geometry',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
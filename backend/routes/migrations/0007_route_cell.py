@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0006_route_fleet_geometry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.BigIntegerField()),
+                ('points', models.TextField()),
+                ('route_optimization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='routes.routeoptimization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cell', 'route_optimization'], name='route_cell_idx')],
+            },
+        ),
+    ]
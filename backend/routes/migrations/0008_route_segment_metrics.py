@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0007_route_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeoptimization',
+            name='segment_metrics',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
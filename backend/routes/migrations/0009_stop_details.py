@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:31
+
+import ast
+
+from django.db import migrations, models
+
+
+def backfill_details(apps, schema_editor):
+    """Stops saved before this migration hold only the repr of their dict in ``location``."""
+    for model_name in ('FuelStop', 'RestBreakStop'):
+        model = apps.get_model('routes', model_name)
+        batch = []
+        for stop in model.objects.filter(details={}).only('id', 'location').iterator(chunk_size=2000):
+            try:
+                details = ast.literal_eval(stop.location)
+            except (ValueError, SyntaxError):
+                details = None
+            stop.details = details if isinstance(details, dict) else {'name': stop.location}
+            batch.append(stop)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['details'])
+                batch = []
+        model.objects.bulk_update(batch, ['details'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0008_route_segment_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fuelstop',
+            name='details',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='restbreakstop',
+            name='details',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_details, migrations.RunPython.noop),
+    ]
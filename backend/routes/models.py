@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from trucklogix.retention import decompress_payload
+
+from .geometry import decode_polyline
+
 
 class RouteOptimization(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -13,20 +17,49 @@ class RouteOptimization(models.Model):
     optimized_route = models.TextField()
     estimated_travel_time = models.CharField(max_length=100)
     estimated_fuel_consumption = models.CharField(max_length=100)
+
+    # Route line as an encoded polyline (precision 5) with waypoint indices into it
+    geometry = models.TextField(blank=True, default='')
+    way_points = models.JSONField(blank=True, default=list)
+    distance_meters = models.FloatField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+
+    # Per-step distances (m) then durations (s) from the directions response as
+    # little-endian float32, for fuel estimates (see routes.fuel)
+    segment_metrics = models.BinaryField(blank=True, default=b'')
+
+    # Pre-simplified lines for the fleet map ({zoom: encoded polyline}) and the line's extent
+    simplified_geometry = models.JSONField(blank=True, default=dict)
+    min_longitude = models.FloatField(null=True, blank=True)
+    min_latitude = models.FloatField(null=True, blank=True)
+    max_longitude = models.FloatField(null=True, blank=True)
+    max_latitude = models.FloatField(null=True, blank=True)
+
+    # The route this one was re-planned from, when created by a re-route
+    rerouted_from = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='reroutes'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at'], name='route_created_idx')]
 
     def __str__(self):
         return f"Route: {self.current_location} -> {self.pickup_location} -> {self.dropoff_location}"
 
+    def geometry_coordinates(self):
+        """Decode the stored polyline into ``[lon, lat]`` points."""
+        return decode_polyline(self.geometry) if self.geometry else []
+
 
 class FuelStop(models.Model):
     route_optimization = models.ForeignKey(RouteOptimization, related_name='fuel_stops', on_delete=models.CASCADE)
     location = models.CharField(max_length=255)
+    # The stop as generated (name, [lon, lat] coordinates, distance_meters), read back when re-routing
+    details = models.JSONField(blank=True, default=dict)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
@@ -39,10 +72,96 @@ class FuelStop(models.Model):
 class RestBreakStop(models.Model):
     route_optimization = models.ForeignKey(RouteOptimization, related_name='rest_break_stops', on_delete=models.CASCADE)
     location = models.CharField(max_length=255)
+    # The stop as generated (name, [lon, lat] coordinates, distance_meters), read back when re-routing
+    details = models.JSONField(blank=True, default=dict)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['order']
 
     def __str__(self):
-        return f"Rest Stop: {self.location}"
\ No newline at end of file
+        return f"Rest Stop: {self.location}"
+
+class RouteCell(models.Model):
+    """
+    One pass of a route line through a grid cell (ROUTE_CELL_DEGREES square),
+    with the vertices of that pass. An inverted index for proximity and
+    corridor search: routes near a point are found by cell, then measured
+    against only these short pieces.
+    """
+    route_optimization = models.ForeignKey(RouteOptimization, related_name='cells', on_delete=models.CASCADE)
+    cell = models.BigIntegerField()
+    # Encoded polyline of the vertices in this pass, including the ones just outside
+    points = models.TextField()
+
+    class Meta:
+        indexes = [models.Index(fields=['cell', 'route_optimization'], name='route_cell_idx')]
+
+    def __str__(self):
+        return f"Cell {self.cell} of route {self.route_optimization_id}"
+
+
+class Location(models.Model):
+    """
+    A named place with known coordinates: terminals, yards, customers and
+    anything geocoded before. Lookups by name skip geocoding.
+    """
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, unique=True)
+    longitude = models.FloatField()
+    latitude = models.FloatField()
+    usage_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-usage_count', 'name']
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def coordinates(self):
+        return [self.longitude, self.latitude]
+
+
+class LegCost(models.Model):
+    """
+    Road duration and distance from one registered location to another.
+    """
+    origin = models.ForeignKey(Location, related_name='outgoing_legs', on_delete=models.CASCADE)
+    destination = models.ForeignKey(Location, related_name='incoming_legs', on_delete=models.CASCADE)
+    duration_seconds = models.FloatField()
+    distance_meters = models.FloatField()
+
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = [('origin', 'destination')]
+
+    def __str__(self):
+        return f"Leg: {self.origin_id} -> {self.destination_id}"
+
+
+class ArchivedRouteOptimization(models.Model):
+    """
+    Cold-storage copy of a RouteOptimization and its stops, moved out of the
+    hot tables by ``manage.py archive_routes``. Keeps the original id;
+    ``payload`` is the zlib-compressed JSON of the route as the detail
+    endpoint returned it (geometry encoded).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    optimized_route = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived route: {self.optimized_route}"
+
+    def data(self):
+        return decompress_payload(self.payload)
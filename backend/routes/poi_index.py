@@ -0,0 +1,269 @@
+"""
+In-memory spatial index of fuel and rest POIs.
+
+Points are loaded from a GeoJSON FeatureCollection or an Overpass JSON
+export, bucketed into a fixed lat/lon grid and stored column-wise in
+``array`` buffers sorted by cell, so a radius or nearest-k query only scans
+the handful of cells around the query point. The index is immutable; a
+background thread rebuilds it when the source file changes and swaps it in.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from .geometry import EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+
+# ORS POI category ids used by RouteOptimizationService
+FUEL_CATEGORY = 596
+REST_CATEGORY = 566
+
+# OSM tags that map onto those categories
+_OSM_CATEGORIES = {
+    ('amenity', 'fuel'): FUEL_CATEGORY,
+    ('highway', 'rest_area'): REST_CATEGORY,
+    ('highway', 'services'): REST_CATEGORY,
+    ('amenity', 'truck_stop'): REST_CATEGORY,
+}
+
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class PoiIndex:
+    """
+    Grid-bucketed POIs. Build with ``PoiIndex.from_points``; query with
+    ``radius`` and ``nearest``. Distances are metres.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05):
+        self.cell_degrees = cell_degrees
+        self.lons = array('d')
+        self.lats = array('d')
+        self.categories = array('i')
+        self.names: List[str] = []
+        self.buckets: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self.lons)
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[float, float, int, str]], cell_degrees: float = 0.05) -> 'PoiIndex':
+        """Build from ``(lon, lat, category_id, name)`` tuples."""
+        index = cls(cell_degrees)
+        keyed = sorted(
+            (index._cell(lon, lat), lon, lat, category, name)
+            for lon, lat, category, name in points
+        )
+        start = 0
+        for position, (cell, lon, lat, category, name) in enumerate(keyed):
+            index.lons.append(lon)
+            index.lats.append(lat)
+            index.categories.append(category)
+            index.names.append(name)
+            if position + 1 == len(keyed) or keyed[position + 1][0] != cell:
+                index.buckets[cell] = (start, position + 1)
+                start = position + 1
+        return index
+
+    @classmethod
+    def from_file(cls, path: str, cell_degrees: float = 0.05) -> 'PoiIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        points, skipped = _parse_points(data)
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed POI records in {path}")
+        return cls.from_points(points, cell_degrees)
+
+    def radius(self, coord: List[float], radius_m: float, category: Optional[int] = None,
+               limit: Optional[int] = None) -> List[Dict]:
+        """POIs within ``radius_m`` of ``[lon, lat]``, nearest first."""
+        lon, lat = coord[0], coord[1]
+        radius_km = radius_m / 1000
+        lat_span = radius_km / _KM_PER_DEGREE
+        lon_span = lat_span / max(math.cos(math.radians(lat)), 1e-6)
+        x0, y0 = self._cell(lon - lon_span, lat - lat_span)
+        x1, y1 = self._cell(lon + lon_span, lat + lat_span)
+
+        hits = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.buckets.get((cx, cy))
+                if bucket is None:
+                    continue
+                for i in range(*bucket):
+                    if category is not None and self.categories[i] != category:
+                        continue
+                    distance = self._distance_m(lon, lat, i)
+                    if distance <= radius_m:
+                        hits.append((distance, i))
+        hits.sort()
+        if limit is not None:
+            hits = hits[:limit]
+        return [self._result(i, distance) for distance, i in hits]
+
+    def nearest(self, coord: List[float], k: int, category: Optional[int] = None,
+                max_radius_m: float = 50000) -> List[Dict]:
+        """The ``k`` POIs closest to ``[lon, lat]`` within ``max_radius_m``."""
+        cell_m = self.cell_degrees * _KM_PER_DEGREE * 1000 * max(math.cos(math.radians(coord[1])), 0.1)
+        radius_m = cell_m
+        while True:
+            hits = self.radius(coord, radius_m, category)
+            # Everything within radius_m has been seen, so k hits are final
+            if len(hits) >= k or radius_m >= max_radius_m:
+                return hits[:k]
+            radius_m = min(radius_m * 2, max_radius_m)
+
+    def _cell(self, lon: float, lat: float) -> Tuple[int, int]:
+        return int(math.floor(lon / self.cell_degrees)), int(math.floor(lat / self.cell_degrees))
+
+    def _distance_m(self, lon: float, lat: float, i: int) -> float:
+        # Equirectangular approximation; accurate to well under 1% at POI ranges
+        x = math.radians(self.lons[i] - lon) * math.cos(math.radians((self.lats[i] + lat) / 2))
+        y = math.radians(self.lats[i] - lat)
+        return math.hypot(x, y) * EARTH_RADIUS_KM * 1000
+
+    def _result(self, i: int, distance: float) -> Dict:
+        return {
+            'name': self.names[i],
+            'coordinates': [self.lons[i], self.lats[i]],
+            'category': self.categories[i],
+            'distance_meters': round(distance, 1),
+        }
+
+
+def _parse_points(data: Dict) -> Tuple[List[Tuple[float, float, int, str]], int]:
+    """
+    POIs from a GeoJSON FeatureCollection or an Overpass JSON export, and the
+    number of malformed records (missing keys, bad coordinates) skipped.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('expected a GeoJSON FeatureCollection or an Overpass JSON export')
+    points, skipped = [], 0
+    for parse, records in ((_feature_point, data.get('features')), (_element_point, data.get('elements'))):
+        for record in records or []:
+            try:
+                point = parse(record)
+            except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            if point is not None:
+                points.append(point)
+    return points, skipped
+
+
+def _feature_point(feature: Dict) -> Optional[Tuple[float, float, int, str]]:
+    geometry = feature.get('geometry') or {}
+    if geometry.get('type') != 'Point':
+        return None
+    props = feature.get('properties') or {}
+    category = _category(props)
+    if category is None:
+        return None
+    lon, lat = geometry['coordinates'][:2]
+    return _coordinate(lon, 180), _coordinate(lat, 90), category, _name(props)
+
+
+def _element_point(element: Dict) -> Optional[Tuple[float, float, int, str]]:
+    if 'lat' not in element:
+        return None
+    tags = element.get('tags') or {}
+    category = _category(tags)
+    if category is None:
+        return None
+    return _coordinate(element['lon'], 180), _coordinate(element['lat'], 90), category, _name(tags)
+
+
+def _coordinate(value, limit: float) -> float:
+    value = float(value)
+    if not -limit <= value <= limit:
+        raise ValueError(f'coordinate out of range: {value}')
+    return value
+
+
+def _category(props: Dict) -> Optional[int]:
+    # ORS-style properties carry category_ids as {"596": {...}}; OSM exports carry tags.
+    category_ids = props.get('category_ids')
+    if category_ids:
+        for category in (FUEL_CATEGORY, REST_CATEGORY):
+            if str(category) in category_ids or category in category_ids:
+                return category
+    tags = props.get('osm_tags') or props.get('tags') or props
+    for (key, value), category in _OSM_CATEGORIES.items():
+        if tags.get(key) == value:
+            return category
+    return None
+
+
+def _name(props: Dict) -> str:
+    tags = props.get('osm_tags') or props.get('tags') or {}
+    return tags.get('name') or props.get('name') or ''
+
+
+_index: Optional[PoiIndex] = None
+_index_mtime: Optional[float] = None
+# Set when the first load failed; get_poi_index leaves retrying to the refresher
+_load_failed = False
+_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+
+
+def get_poi_index() -> Optional[PoiIndex]:
+    """
+    The current index, loaded from POI_INDEX_PATH on first use.
+
+    Returns None when no source is configured or it cannot be read. Starts
+    the background refresher when POI_INDEX_REFRESH_SECONDS is set. After a
+    failed load, requests get None without retrying until the refresher
+    loads it (with refreshing disabled, until restart).
+    """
+    if not settings.POI_INDEX_PATH:
+        return None
+    if _index is None and not _load_failed:
+        with _lock:
+            if _index is None and not _load_failed:
+                refresh_poi_index()
+                _start_refresher()
+    return _index
+
+
+def refresh_poi_index(force: bool = False) -> bool:
+    """Rebuild the index if the source file changed. Returns whether it was swapped."""
+    global _index, _index_mtime, _load_failed
+    path = settings.POI_INDEX_PATH
+    try:
+        mtime = os.path.getmtime(path)
+        if not force and _index is not None and mtime == _index_mtime:
+            return False
+        started = time.monotonic()
+        index = PoiIndex.from_file(path, settings.POI_INDEX_CELL_DEGREES)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load POI index from {path}: {e}")
+        _load_failed = _index is None
+        return False
+    _index, _index_mtime, _load_failed = index, mtime, False
+    logger.info(f"Loaded {len(index)} POIs from {path} in {(time.monotonic() - started) * 1000:.0f} ms")
+    return True
+
+
+def _start_refresher():
+    global _refresher
+    interval = settings.POI_INDEX_REFRESH_SECONDS
+    if interval <= 0 or _refresher is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            refresh_poi_index()
+
+    _refresher = threading.Thread(target=run, name='poi-index-refresh', daemon=True)
+    _refresher.start()
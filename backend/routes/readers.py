@@ -0,0 +1,75 @@
+"""
+Read path for route optimization listings.
+
+Builds the same dicts as ``RouteOptimizationSerializer`` straight from
+``.values()``: one query for the routes and one grouped query per stop
+type, with no per-field serializer overhead.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from trucklogix.renderers import format_datetime
+
+from .models import FuelStop, RestBreakStop
+
+ROUTE_COLUMNS = (
+    'id', 'current_location', 'pickup_location', 'dropoff_location',
+    'current_cycle_hours_used', 'optimized_route', 'estimated_travel_time',
+    'estimated_fuel_consumption', 'distance_meters', 'duration_seconds',
+    'created_at', 'updated_at',
+)
+
+# Keeps the IN (...) list well under database parameter limits
+_CHILD_BATCH = 500
+
+
+def route_rows(queryset, detail: bool = False) -> List[Dict]:
+    """
+    Serialize ``queryset`` (ordering and slicing preserved) to
+    RouteOptimizationSerializer-shaped dicts, or with ``detail`` to the
+    RouteOptimizationDetailSerializer shape (encoded geometry and way points).
+    """
+    columns = ROUTE_COLUMNS + (('geometry', 'way_points') if detail else ())
+    routes = list(queryset.values(*columns))
+    route_ids = [route['id'] for route in routes]
+    fuel_stops = _stops(FuelStop, route_ids)
+    rest_break_stops = _stops(RestBreakStop, route_ids)
+    rows = [
+        {
+            'id': route['id'],
+            'current_location': route['current_location'],
+            'pickup_location': route['pickup_location'],
+            'dropoff_location': route['dropoff_location'],
+            'current_cycle_hours_used': route['current_cycle_hours_used'],
+            'optimized_route': route['optimized_route'],
+            'estimated_travel_time': route['estimated_travel_time'],
+            'estimated_fuel_consumption': route['estimated_fuel_consumption'],
+            'distance_meters': route['distance_meters'],
+            'duration_seconds': route['duration_seconds'],
+            'fuel_stops': fuel_stops.get(route['id'], []),
+            'rest_break_stops': rest_break_stops.get(route['id'], []),
+            'created_at': format_datetime(route['created_at']),
+            'updated_at': format_datetime(route['updated_at']),
+        }
+        for route in routes
+    ]
+    if detail:
+        for row, route in zip(rows, routes):
+            row['geometry'] = route['geometry']
+            row['way_points'] = route['way_points']
+    return rows
+
+
+def _stops(model, route_ids: List[int]) -> Dict[int, List[Dict]]:
+    grouped = defaultdict(list)
+    for start in range(0, len(route_ids), _CHILD_BATCH):
+        rows = (
+            model.objects
+            .filter(route_optimization_id__in=route_ids[start:start + _CHILD_BATCH])
+            .order_by('route_optimization_id', 'order', 'id')
+            .values_list('route_optimization_id', 'location', 'order')
+        )
+        for route_id, location, order in rows:
+            grouped[route_id].append({'location': location, 'order': order})
+    return grouped
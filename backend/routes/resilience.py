@@ -0,0 +1,184 @@
+"""
+Circuit breakers and a stale-while-revalidate cache for OpenRouteService calls.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while a circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class OrsUnavailableError(Exception):
+    """An ORS operation failed and no cached result could stand in for it."""
+
+    def __init__(self, operation: str, retry_after: float = 0):
+        super().__init__(f"OpenRouteService {operation} is unavailable")
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Trip after consecutive failures, counting calls slower than
+    ``slow_call_seconds`` as failures too.
+
+    While open, calls fail fast with CircuitOpenError. After ``reset_seconds``
+    one trial call is let through (half-open); its outcome closes or re-opens
+    the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, slow_call_seconds: float, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._retry_after() <= 0:
+                return self.HALF_OPEN
+            return self._state
+
+    def call(self, fn: Callable[[], Any], is_failure: Callable[[Exception], bool] = lambda e: True) -> Any:
+        self._before_call()
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            if is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        if time.monotonic() - start > self.slow_call_seconds:
+            self._record_failure()
+        else:
+            self._record_success()
+        return result
+
+    def snapshot(self) -> Dict:
+        return {'state': self.state, 'failures': self._failures}
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.reset_seconds - time.monotonic()
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            retry_after = self._retry_after()
+            if retry_after > 0 or self._trial_in_flight:
+                raise CircuitOpenError(self.name, max(retry_after, 0))
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+
+    def _record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an ORS operation, creating it on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.ORS_BREAKER_FAILURE_THRESHOLD,
+                slow_call_seconds=settings.ORS_BREAKER_SLOW_CALL_SECONDS,
+                reset_seconds=settings.ORS_BREAKER_RESET_SECONDS,
+            )
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {name: breaker.snapshot() for name, breaker in breakers}
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    # 4xx responses mean the request was bad, not that ORS is unhealthy, except
+    # 429: with retry_over_query_limit off, rate limiting is how ORS fails under load.
+    # Errors without a status (timeouts, connection errors) count as failures.
+    status = getattr(error, 'status', None)
+    if not isinstance(status, int):
+        status = getattr(error, 'status_code', None)
+    if not isinstance(status, int):
+        return True
+    return status == 429 or status >= 500
+
+
+def cached_ors_call(operation: str, params: Dict, fn: Callable[[], Any]) -> Tuple[Any, str]:
+    """
+    Run an ORS operation behind its circuit breaker with a stale-while-revalidate cache.
+
+    Returns ``(value, freshness)`` where freshness is ``'cached'`` for a hit
+    inside ORS_CACHE_FRESH_SECONDS, ``'live'`` for a fresh backend result, or
+    ``'stale'`` when the backend failed or its circuit is open and an older
+    cached result was served instead. Raises OrsUnavailableError when there
+    is nothing to fall back to.
+    """
+    key = _cache_key(operation, params)
+    entry: Optional[Dict] = caches['ors'].get(key)
+    now = time.time()
+    if entry is not None and now - entry['stored_at'] < settings.ORS_CACHE_FRESH_SECONDS:
+        return entry['value'], 'cached'
+
+    try:
+        value = get_breaker(operation).call(fn, is_failure=_is_backend_failure)
+    except CircuitOpenError as e:
+        if entry is not None:
+            return entry['value'], 'stale'
+        raise OrsUnavailableError(operation, retry_after=e.retry_after) from e
+    except Exception as e:
+        if not _is_backend_failure(e):
+            raise
+        if entry is not None:
+            return entry['value'], 'stale'
+        raise OrsUnavailableError(operation) from e
+
+    caches['ors'].set(key, {'value': value, 'stored_at': now}, settings.ORS_CACHE_STALE_SECONDS)
+    return value, 'live'
+
+
+def _cache_key(operation: str, params: Dict) -> str:
+    encoded = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return f"ors:{operation}:{hashlib.sha1(encoded).hexdigest()}"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import RouteOptimization, FuelStop, RestBreakStop
+from .fuel import TRUCK_PROFILES, resolve_profile
+from .models import RouteOptimization, FuelStop, RestBreakStop, Location
 
 
 class FuelStopSerializer(serializers.ModelSerializer):
@@ -23,14 +24,179 @@ class RouteOptimizationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'current_location', 'pickup_location', 'dropoff_location',
             'current_cycle_hours_used', 'optimized_route', 'estimated_travel_time',
-            'estimated_fuel_consumption', 'fuel_stops', 'rest_break_stops',
-            'created_at', 'updated_at'
+            'estimated_fuel_consumption', 'distance_meters', 'duration_seconds',
+            'fuel_stops', 'rest_break_stops', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class RouteOptimizationDetailSerializer(RouteOptimizationSerializer):
+    """
+    Adds the stored route line. ``geometry`` is the encoded polyline unless the
+    ``decode_geometry`` context flag asks for a GeoJSON LineString.
+    """
+    geometry = serializers.SerializerMethodField()
+
+    class Meta(RouteOptimizationSerializer.Meta):
+        fields = RouteOptimizationSerializer.Meta.fields + ['geometry', 'way_points']
+
+    def get_geometry(self, obj):
+        if self.context.get('decode_geometry'):
+            return {'type': 'LineString', 'coordinates': obj.geometry_coordinates()}
+        return obj.geometry
+
+
+class CoordinatesField(serializers.ListField):
+    """A ``[lon, lat]`` pair, e.g. from an autocomplete selection."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        super().__init__(child=serializers.FloatField(), min_length=2, max_length=2, **kwargs)
+
+    def to_internal_value(self, data):
+        # The length validators only run after this returns, so check before unpacking
+        if isinstance(data, (list, tuple)) and len(data) != 2:
+            raise serializers.ValidationError('Coordinates must be [longitude, latitude].')
+        lon, lat = super().to_internal_value(data)
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise serializers.ValidationError('Coordinates must be [longitude, latitude].')
+        return [lon, lat]
+
+
 class RouteOptimizationInputSerializer(serializers.Serializer):
     current_location = serializers.CharField(max_length=255)
     pickup_location = serializers.CharField(max_length=255)
     dropoff_location = serializers.CharField(max_length=255)
-    current_cycle_hours_used = serializers.FloatField(min_value=0)
\ No newline at end of file
+    current_cycle_hours_used = serializers.FloatField(min_value=0)
+    # Known coordinates (e.g. from autocomplete) skip geocoding
+    current_coordinates = CoordinatesField()
+    pickup_coordinates = CoordinatesField()
+    dropoff_coordinates = CoordinatesField()
+
+class RerouteInputSerializer(serializers.Serializer):
+    position = CoordinatesField(required=True)
+    # Defaults to the cycle hours of the route being re-planned
+    current_cycle_hours_used = serializers.FloatField(min_value=0, required=False)
+
+
+class ProximitySearchSerializer(serializers.Serializer):
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    radius_km = serializers.FloatField(min_value=0, max_value=500, default=20)
+    # Bounds on when the route was planned
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+
+class CorridorSearchSerializer(serializers.Serializer):
+    # Work grows with the corridor's length times the square of its width
+    coordinates = serializers.ListField(child=CoordinatesField(), min_length=2, max_length=2000, required=False)
+    route_id = serializers.IntegerField(required=False)
+    radius_km = serializers.FloatField(min_value=0, max_value=50, default=20)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+    def validate(self, data):
+        if ('coordinates' in data) == ('route_id' in data):
+            raise serializers.ValidationError('Give either coordinates or route_id.')
+        return data
+
+
+class TruckProfileInputSerializer(serializers.Serializer):
+    """A custom truck profile: a built-in ``base`` with some fields overridden."""
+    name = serializers.CharField(max_length=50)
+    base = serializers.ChoiceField(choices=sorted(TRUCK_PROFILES), default='standard')
+    label = serializers.CharField(max_length=100, required=False)
+    base_l_per_100km = serializers.FloatField(min_value=1, required=False)
+    optimal_speed_kmh = serializers.FloatField(min_value=10, required=False)
+    speed_coefficient = serializers.FloatField(min_value=0, required=False)
+    load_kg = serializers.FloatField(min_value=0, required=False)
+    weight_coefficient_per_tonne = serializers.FloatField(min_value=0, required=False)
+    max_speed_kmh = serializers.FloatField(min_value=10, required=False)
+    auxiliary_l_per_hour = serializers.FloatField(min_value=0, required=False)
+
+
+class TruckProfileField(serializers.Field):
+    """A built-in profile name or a custom profile object; validates to ``(name, TruckProfile)``."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            serializer = TruckProfileInputSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            data = serializer.validated_data
+        elif not isinstance(data, str) or data not in TRUCK_PROFILES:
+            raise serializers.ValidationError(
+                f"Unknown truck profile; use one of {', '.join(sorted(TRUCK_PROFILES))} or a profile object."
+            )
+        return resolve_profile(data)
+
+
+class FuelEstimateInputSerializer(serializers.Serializer):
+    # Either explicit routes or a created_at range
+    route_ids = serializers.ListField(child=serializers.IntegerField(), max_length=10000, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    profiles = serializers.ListField(child=TruckProfileField(), min_length=1, max_length=20, default=['standard'])
+    # Per-segment fuel and time, for up to 10 routes
+    segments = serializers.BooleanField(default=False)
+
+    def validate_profiles(self, profiles):
+        profiles = [resolve_profile(p) if isinstance(p, str) else p for p in profiles]
+        names = [name for name, _ in profiles]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError('Profile names must be unique.')
+        return profiles
+
+    def validate(self, data):
+        if 'route_ids' not in data and 'since' not in data:
+            raise serializers.ValidationError('Give route_ids or a since/until range.')
+        return data
+
+
+class RouteStopInputSerializer(serializers.Serializer):
+    STOP_TYPES = [('pickup', 'Pickup'), ('dropoff', 'Dropoff')]
+
+    location = serializers.CharField(max_length=255)
+    type = serializers.ChoiceField(choices=STOP_TYPES)
+    load_id = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    coordinates = CoordinatesField()
+
+
+class MultiStopRouteInputSerializer(serializers.Serializer):
+    current_location = serializers.CharField(max_length=255)
+    current_coordinates = CoordinatesField()
+    current_cycle_hours_used = serializers.FloatField(min_value=0)
+    stops = RouteStopInputSerializer(many=True)
+
+    def validate_stops(self, stops):
+        if not stops:
+            raise serializers.ValidationError('At least one stop is required.')
+        if len(stops) > 100:
+            raise serializers.ValidationError('At most 100 stops are supported.')
+
+        pickups, dropoffs = {}, {}
+        for stop in stops:
+            load_id = stop.get('load_id')
+            if not load_id:
+                continue
+            seen = pickups if stop['type'] == 'pickup' else dropoffs
+            if load_id in seen:
+                raise serializers.ValidationError(f"Load '{load_id}' has more than one {stop['type']}.")
+            seen[load_id] = stop
+        for load_id in dropoffs:
+            if load_id not in pickups:
+                raise serializers.ValidationError(f"Load '{load_id}' has a dropoff but no pickup.")
+        return stops
+
+
+class LocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ['id', 'name', 'longitude', 'latitude', 'usage_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'usage_count', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'longitude': {'min_value': -180, 'max_value': 180},
+            'latitude': {'min_value': -90, 'max_value': 90},
+        }
@@ -1,76 +1,620 @@
-import openrouteservice
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
+import hashlib
 import logging
 
+from django.conf import settings
+from django.core.cache import cache
+
+from trucklogix.singleflight import SingleFlight
+from .geometry import cumulative_km, haversine_km, snap_to_line
+from .locations import lookup_location, normalize_location_name, register_location
+from .matrix import LegCostMatrix
+from .models import Location
+from .poi_index import get_poi_index
+from .resilience import OrsUnavailableError, cached_ors_call
+from .solver import solve_stop_order
+
+# Shared across service instances so concurrent requests in this process coalesce.
+_optimize_flight = SingleFlight()
+
+_shared_service = None
+
+
+def get_route_optimization_service() -> 'RouteOptimizationService':
+    """
+    Return the process-wide service, built lazily from OPENROUTESERVICE_API_KEY.
+
+    Returns None when no API key is configured.
+    """
+    global _shared_service
+    if _shared_service is None and settings.OPENROUTESERVICE_API_KEY:
+        _shared_service = RouteOptimizationService(api_key=settings.OPENROUTESERVICE_API_KEY)
+    return _shared_service
+
+# Worst-first ordering used when one stage makes several ORS calls.
+_FRESHNESS_RANK = {'live': 0, 'local': 1, 'registry': 1, 'cached': 1, 'stored': 1, 'stale': 2, 'unavailable': 3}
+
+
+def _note_freshness(freshness: Dict, stage: str, value: str):
+    if freshness is None:
+        return
+    current = freshness.get(stage)
+    if current is None or _FRESHNESS_RANK[value] > _FRESHNESS_RANK[current]:
+        freshness[stage] = value
+
+
 class RouteOptimizationService:
     """
     Route optimization using OpenRouteService for real-time directions, POI search, and geocoding.
     """
 
+    # ORS directions accepts at most this many waypoints per request
+    MAX_DIRECTIONS_WAYPOINTS = 50
+    # ORS matrix accepts at most this many source x destination pairs per request
+    MAX_MATRIX_ROUTES = 3500
+    # Waypoints searched for fuel on multi-stop routes
+    MULTI_STOP_FUEL_SEARCH_POINTS = 5
+    # Straight-line fallback when no duration matrix is available
+    LOCAL_DETOUR_FACTOR = 1.3
+    LOCAL_AVERAGE_SPEED_KMH = 70
+
     def __init__(self, api_key: str):
-        self.client = openrouteservice.Client(key=api_key)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        The ORS client, created on first use so importing this module stays cheap.
+        """
+        if self._client is None:
+            import openrouteservice
+
+            # Fail fast instead of waiting out ORS's default 60s timeout and retries.
+            self._client = openrouteservice.Client(
+                key=self.api_key,
+                base_url=settings.OPENROUTESERVICE_BASE_URL,
+                timeout=settings.ORS_TIMEOUT_SECONDS,
+                retry_timeout=settings.ORS_TIMEOUT_SECONDS,
+                retry_over_query_limit=False,
+            )
+        return self._client
 
     def optimize_route(self, route_data: Dict) -> Dict:
+        for stage, payload in self.optimize_route_stages(route_data):
+            if stage == 'result':
+                return payload
+
+    def optimize_route_stages(self, route_data: Dict) -> Iterator[Tuple[str, Dict]]:
+        """
+        Run optimize_route one stage at a time, yielding ``(stage, payload)``
+        as each is ready: ``coordinates``, ``route`` (summary and directions),
+        ``fuel_stops``, ``rest_stops`` and finally ``result``, the dict
+        optimize_route returns.
+        """
         # Extract route details
         current_location = route_data['current_location']
         pickup_location = route_data['pickup_location']
         dropoff_location = route_data['dropoff_location']
         cycle_hours_used = route_data.get('current_cycle_hours_used', 0)
+        freshness = {}
 
-        # Geocode locations to coordinates
-        current_coords = self._geocode(current_location)
-        pickup_coords = self._geocode(pickup_location)
-        dropoff_coords = self._geocode(dropoff_location)
+        # Geocode locations to coordinates, unless the client already knows them
+        current_coords = route_data.get('current_coordinates') or self._geocode(current_location, freshness)
+        pickup_coords = route_data.get('pickup_coordinates') or self._geocode(pickup_location, freshness)
+        dropoff_coords = route_data.get('dropoff_coordinates') or self._geocode(dropoff_location, freshness)
         coordinates = [current_coords, pickup_coords, dropoff_coords]
-        
-        print(f"Coordinates: {coordinates}") 
+        named_coordinates = {'current': current_coords, 'pickup': pickup_coords, 'dropoff': dropoff_coords}
+
+        yield 'coordinates', {'coordinates': named_coordinates, 'freshness': dict(freshness)}
 
         # Request optimized route
-        directions = self.client.directions(
-            coordinates=coordinates,
-            profile='driving-car',
-            format='geojson'
-        )
+        directions = self._directions(coordinates, freshness)
         
         summary = directions['features'][0]['properties']['summary']
         distance_km = round(summary['distance'] / 1000, 2)
         duration_min = round(summary['duration'] / 60, 2)
-        
-        print(f"Distance: {distance_km} km, Duration: {duration_min} min")
+
+        yield 'route', {
+            'distance_km': distance_km,
+            'duration_min': duration_min,
+            'estimated_travel_time': self._calculate_travel_time(duration_min * 60),
+            'estimated_fuel_consumption': self._calculate_fuel_consumption(distance_km),
+            'directions': directions,
+            'freshness': dict(freshness),
+        }
 
         # Generate fuel and rest stops
-        fuel_stops = self._generate_fuel_stops(coordinates)
-        rest_stops = self._generate_rest_stops(coordinates, cycle_hours_used)
+        fuel_stops = self._generate_fuel_stops(coordinates, freshness)
+        yield 'fuel_stops', {'fuel_stops': fuel_stops, 'freshness': dict(freshness)}
+        rest_stops = self._generate_rest_stops(coordinates, cycle_hours_used, freshness)
+        yield 'rest_stops', {'rest_break_stops': rest_stops, 'freshness': dict(freshness)}
 
-        return {
+        yield 'result', {
             'optimized_route': f"{current_location} → {pickup_location} → {dropoff_location}",
             'distance_km': distance_km,
             'duration_min': duration_min,
             'fuel_stops': fuel_stops,
             'rest_break_stops': rest_stops,
-            'coordinates': {'current': current_coords, 'pickup': pickup_coords, 'dropoff': dropoff_coords},
-            'directions': directions
+            'coordinates': named_coordinates,
+            'directions': directions,
+            'freshness': freshness,
+        }
+
+    def optimize_route_progressive(self, route_data: Dict) -> Iterator[Tuple[str, Dict]]:
+        """
+        optimize_route_stages for streaming responses, coalesced with
+        optimize_route_coalesced on the same key: a recent or in-flight
+        result is replayed stage by stage, and a fresh one is stored for
+        ROUTE_OPTIMIZATION_REUSE_SECONDS.
+        """
+        key = self.coalescing_key(route_data)
+        reuse_seconds = settings.ROUTE_OPTIMIZATION_REUSE_SECONDS
+        cached = cache.get(key) if reuse_seconds > 0 else None
+        if cached is None:
+            live = False
+
+            def stages():
+                nonlocal live
+                live = True
+                for stage, payload in self.optimize_route_stages(route_data):
+                    if stage == 'result':
+                        if reuse_seconds > 0:
+                            cache.set(key, payload, reuse_seconds)
+                        return payload
+                    yield stage, payload
+
+            cached = yield from _optimize_flight.stream(key, stages)
+            if live:
+                yield 'result', cached
+                return
+
+        yield 'coordinates', {'coordinates': cached['coordinates'], 'freshness': cached['freshness']}
+        yield 'route', {
+            'distance_km': cached['distance_km'],
+            'duration_min': cached['duration_min'],
+            'estimated_travel_time': self._calculate_travel_time(cached['duration_min'] * 60),
+            'estimated_fuel_consumption': self._calculate_fuel_consumption(cached['distance_km']),
+            'directions': cached['directions'],
+            'freshness': cached['freshness'],
         }
+        yield 'fuel_stops', {'fuel_stops': cached['fuel_stops'], 'freshness': cached['freshness']}
+        yield 'rest_stops', {'rest_break_stops': cached['rest_break_stops'], 'freshness': cached['freshness']}
+        yield 'result', cached
 
-    def _geocode(self, location_name: str) -> List[float]:
-        result = self.client.pelias_search(text=location_name)
-        return result['features'][0]['geometry']['coordinates']
+    def optimize_route_coalesced(self, route_data: Dict) -> Dict:
+        """
+        Run optimize_route behind a single-flight layer keyed on the normalized input.
 
+        Identical concurrent requests share one in-flight computation, and the
+        result is reused for ROUTE_OPTIMIZATION_REUSE_SECONDS afterwards. The
+        returned dict is shared between callers and must not be mutated.
+        """
+        key = self.coalescing_key(route_data)
+        reuse_seconds = settings.ROUTE_OPTIMIZATION_REUSE_SECONDS
 
-    def _generate_fuel_stops(self, coordinates: List[List[float]]) -> List[dict]:
-        logger = logging.getLogger(__name__)
-        fuel_stops = []
+        if reuse_seconds > 0:
+            cached = cache.get(key)
+            if cached is not None:
+                logging.getLogger(__name__).info(f"Reusing recent optimization for {key}")
+                return cached
 
-        for coord in coordinates:
+        def compute():
+            result = self.optimize_route(route_data)
+            if reuse_seconds > 0:
+                cache.set(key, result, reuse_seconds)
+            return result
+
+        return _optimize_flight.do(key, compute)
+
+    @staticmethod
+    def coalescing_key(route_data: Dict) -> str:
+        """
+        Build a cache key from the locations, any client-supplied coordinates and
+        the cycle hours, ignoring case and extra whitespace in names.
+        """
+        parts = [
+            normalize_location_name(route_data['current_location']),
+            normalize_location_name(route_data['pickup_location']),
+            normalize_location_name(route_data['dropoff_location']),
+            f"{float(route_data.get('current_cycle_hours_used', 0)):.2f}",
+        ]
+        for field in ('current_coordinates', 'pickup_coordinates', 'dropoff_coordinates'):
+            coordinates = route_data.get(field)
+            parts.append(','.join(f"{value:.6f}" for value in coordinates) if coordinates else '')
+        digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+        return f"route-optimize:{digest}"
+
+    def reroute(self, route_data: Dict) -> Dict:
+        """
+        Re-plan a stored route from the driver's current ``position``.
+
+        The position is snapped to the stored line, to the earliest stretch
+        within REROUTE_SNAP_TOLERANCE_METERS when the line passes there more
+        than once. That close, the driver is still on route and no ORS call
+        (or API key) is needed; otherwise directions are requested only from the
+        position to a rejoin point REROUTE_REJOIN_KM (or three times the
+        detour) further along, never past the next waypoint. The rest of the
+        line, its share of the stored distance and duration, and the stops
+        not yet passed are reused.
+
+        ``route_data`` carries ``position``, the stored ``geometry`` (decoded),
+        ``way_points``, ``distance_meters``, ``duration_seconds``,
+        ``optimized_route`` and the ``fuel_stops`` / ``rest_break_stops``
+        (dicts, with ``coordinates`` when known). Returns the same shape as
+        ``optimize_route`` plus a ``reroute`` summary.
+        """
+        position = list(route_data['position'])
+        line = route_data['geometry']
+        way_points = route_data.get('way_points') or [0, len(line) - 1]
+        freshness = {}
+
+        along = cumulative_km(line)
+        total_km = along[-1] or 1e-9
+        tolerance_km = settings.REROUTE_SNAP_TOLERANCE_METERS / 1000
+        snap = snap_to_line(line, position, prefer_within_km=tolerance_km)
+        snap_km = along[snap.segment] + snap.fraction * (along[snap.segment + 1] - along[snap.segment])
+        next_waypoint = next((k for k in way_points if k > snap.segment), len(line) - 1)
+
+        if snap.offset_km <= tolerance_km:
+            # Still on route: continue along the stored line from the snapped point
+            rejoin = snap.segment + 1
+            prefix = [position, line[rejoin]]
+            prefix_km = haversine_km(position, line[rejoin])
+            prefix_distance = prefix_km * 1000
+            prefix_duration = route_data['duration_seconds'] * prefix_km / total_km
+            _note_freshness(freshness, 'directions', 'stored')
+        else:
+            if not self.api_key:
+                raise ValueError('OpenRouteService API key is not set.')
+            target_km = snap_km + max(settings.REROUTE_REJOIN_KM, 3 * snap.offset_km)
+            rejoin = next((k for k in range(snap.segment + 1, next_waypoint) if along[k] >= target_km), next_waypoint)
+            directions = self._directions([position, line[rejoin]], freshness)
+            feature = directions['features'][0]
+            prefix = feature['geometry']['coordinates']
+            prefix_distance = feature['properties']['summary']['distance']
+            prefix_duration = feature['properties']['summary']['duration']
+
+        suffix_share = (total_km - along[rejoin]) / total_km
+        distance = prefix_distance + route_data['distance_meters'] * suffix_share
+        duration = prefix_duration + route_data['duration_seconds'] * suffix_share
+        geometry = prefix + line[rejoin + 1:]
+        offset = len(prefix) - 1 - rejoin
+        new_way_points = [0] + [k + offset for k in way_points[1:] if k >= rejoin]
+        # Names of the stops still ahead, aligned with the stored waypoints when possible
+        names = route_data['optimized_route'].split(' → ')
+        if len(names) == len(way_points):
+            stops = [name for name, k in zip(names[1:], way_points[1:]) if k >= rejoin]
+        else:
+            stops = [names[-1]]
+
+        def ahead(stop):
+            coords = stop.get('coordinates')
+            if not coords:
+                return True
+            stop_snap = snap_to_line(line, coords)
+            stop_km = along[stop_snap.segment] + stop_snap.fraction * (
+                along[stop_snap.segment + 1] - along[stop_snap.segment]
+            )
+            return stop_km >= snap_km
+
+        fuel_stops = [stop for stop in route_data['fuel_stops'] if ahead(stop)]
+        rest_stops = [stop for stop in route_data['rest_break_stops'] if ahead(stop)]
+        position_label = f"{position[0]:.5f},{position[1]:.5f}"
+
+        return {
+            'optimized_route': ' → '.join([position_label, *stops]),
+            'distance_km': round(distance / 1000, 2),
+            'duration_min': round(duration / 60, 2),
+            'fuel_stops': fuel_stops,
+            'rest_break_stops': rest_stops,
+            'coordinates': {'current': position, 'snapped': snap.point},
+            'directions': {'type': 'FeatureCollection', 'features': [{
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': geometry},
+                'properties': {
+                    'summary': {'distance': distance, 'duration': duration},
+                    'way_points': new_way_points,
+                },
+            }]},
+            'freshness': freshness,
+            'reroute': {
+                'off_route_meters': round(snap.offset_km * 1000, 1),
+                'recomputed_meters': round(prefix_distance, 1),
+                'reused_meters': round(route_data['distance_meters'] * suffix_share, 1),
+                'stops_ahead': stops,
+            },
+        }
+
+    def optimize_multi_stop(self, route_data: Dict) -> Dict:
+        """
+        Sequence N pickups and dropoffs from the current location, then route them.
+
+        Each stop is ``{'location', 'type', 'load_id'}``; a load's pickup must
+        precede its dropoff. The stop order comes from one duration matrix
+        (stored legs, ORS, or a local estimate when ORS is unavailable) and is fed into the
+        same directions and stop generation as optimize_route. Stop locations
+        are registered, so legs between repeat locations come from the
+        persistent matrix instead of ORS.
+        """
+        current_location = route_data['current_location']
+        stops = route_data['stops']
+        cycle_hours_used = route_data.get('current_cycle_hours_used', 0)
+        freshness = {}
+
+        locations = [self._resolve_location(current_location, freshness, route_data.get('current_coordinates'))]
+        locations += [
+            self._resolve_location(stop['location'], freshness, stop.get('coordinates'))
+            for stop in stops
+        ]
+        coordinates = [location.coordinates for location in locations]
+        current_coords = coordinates[0]
+
+        durations, distances, matrix_source = self._duration_matrix(locations, freshness)
+
+        # Node 0 is the current location; stop k is node k + 1
+        pickups = {}
+        for node, stop in enumerate(stops, start=1):
+            if stop['type'] == 'pickup' and stop.get('load_id'):
+                pickups[stop['load_id']] = node
+        precedence = [
+            (pickups[stop['load_id']], node)
+            for node, stop in enumerate(stops, start=1)
+            if stop['type'] == 'dropoff' and stop.get('load_id') in pickups
+        ]
+        order = solve_stop_order(durations, precedence)
+
+        ordered_coords = [coordinates[node] for node in order]
+        directions = self._directions_for_waypoints(ordered_coords, freshness)
+        summary = directions['features'][0]['properties']['summary']
+        distance_km = round(summary['distance'] / 1000, 2)
+        duration_min = round(summary['duration'] / 60, 2)
+
+        stop_order = []
+        elapsed_s = 0.0
+        for prev, node in zip(order, order[1:]):
+            elapsed_s += durations[prev][node]
+            stop = stops[node - 1]
+            stop_order.append({
+                'location': stop['location'],
+                'type': stop['type'],
+                'load_id': stop.get('load_id'),
+                'coordinates': coordinates[node],
+                'eta_min': round(elapsed_s / 60, 2),
+            })
+
+        # Fuel: a handful of evenly spaced waypoints rather than every stop.
+        # Rest: keyed on the first pickup and the final stop, as in optimize_route.
+        step = max(1, len(ordered_coords) // self.MULTI_STOP_FUEL_SEARCH_POINTS)
+        fuel_stops = self._generate_fuel_stops(ordered_coords[::step], freshness)
+        first_pickup = next(
+            (entry['coordinates'] for entry in stop_order if entry['type'] == 'pickup'),
+            ordered_coords[1]
+        )
+        rest_stops = self._generate_rest_stops(
+            [current_coords, first_pickup, ordered_coords[-1]], cycle_hours_used, freshness
+        )
+
+        return {
+            'optimized_route': ' → '.join([current_location] + [entry['location'] for entry in stop_order]),
+            'distance_km': distance_km,
+            'duration_min': duration_min,
+            'fuel_stops': fuel_stops,
+            'rest_break_stops': rest_stops,
+            'stop_order': stop_order,
+            'matrix_source': matrix_source,
+            'coordinates': {'current': current_coords, 'stops': [entry['coordinates'] for entry in stop_order]},
+            'directions': directions,
+            'freshness': freshness,
+        }
+
+    def _duration_matrix(self, locations: List[Location], freshness: Dict = None):
+        """
+        Pairwise durations (s) and distances (m) among registered locations.
+
+        Stored legs are read from the persistent matrix; missing ones are
+        fetched from ORS and stored. Pairs ORS cannot supply, or all of them
+        when ORS is down or rejects the request, fall back to a straight-line
+        estimate. Returns
+        ``(durations, distances, source)`` with source ``'registry'``,
+        ``'ors'`` or ``'local'``.
+        """
+        matrix = LegCostMatrix(locations).load()
+        source = 'registry'
+        if matrix.missing_pairs():
             try:
-                pois = self.client.places(
+                matrix.fill_missing(lambda coordinates, sources, destinations: self._fetch_matrix(
+                    coordinates, sources, destinations, freshness
+                ))
+                source = 'ors'
+            except OrsUnavailableError:
+                logging.getLogger(__name__).warning("Matrix unavailable, estimating locally")
+                _note_freshness(freshness, 'matrix', 'unavailable')
+                source = 'local'
+            except Exception as e:
+                # A 4xx from ORS (e.g. a location it cannot route to) is not an outage
+                if not isinstance(getattr(e, 'status', None), int):
+                    raise
+                logging.getLogger(__name__).warning(f"Matrix rejected ({e}), estimating locally")
+                source = 'local'
+        else:
+            _note_freshness(freshness, 'matrix', 'registry')
+
+        for i, j in matrix.missing_pairs():
+            distance, duration = self._estimate_leg(locations[i].coordinates, locations[j].coordinates)
+            matrix.distances[i][j] = distance
+            matrix.durations[i][j] = duration
+        return matrix.durations, matrix.distances, source
+
+    def _fetch_matrix(self, coordinates: List[List[float]], sources: List[int], destinations: List[int],
+                      freshness: Dict = None):
+        """
+        Durations and distances from ``sources`` to ``destinations`` (indices
+        into ``coordinates``), split into ORS matrix calls of at most
+        MAX_MATRIX_ROUTES pairs.
+        """
+        column_size = min(len(destinations), self.MAX_MATRIX_ROUTES)
+        row_size = max(1, self.MAX_MATRIX_ROUTES // column_size)
+        durations = [[] for _ in sources]
+        distances = [[] for _ in sources]
+        for column in range(0, len(destinations), column_size):
+            block_destinations = destinations[column:column + column_size]
+            for row in range(0, len(sources), row_size):
+                block_sources = sources[row:row + row_size]
+                block_durations, block_distances = self._fetch_matrix_block(
+                    coordinates, block_sources, block_destinations, freshness
+                )
+                for k, (duration_row, distance_row) in enumerate(zip(block_durations, block_distances)):
+                    durations[row + k].extend(duration_row)
+                    distances[row + k].extend(distance_row)
+        return durations, distances
+
+    def _fetch_matrix_block(self, coordinates: List[List[float]], sources: List[int], destinations: List[int],
+                            freshness: Dict = None):
+        """One ORS matrix call, sending only the coordinates it uses."""
+        used = sorted(set(sources) | set(destinations))
+        position = {index: k for k, index in enumerate(used)}
+        locations = [coordinates[index] for index in used]
+        block_sources = [position[index] for index in sources]
+        block_destinations = [position[index] for index in destinations]
+        matrix, fresh = cached_ors_call(
+            'matrix', {'coordinates': locations, 'sources': block_sources, 'destinations': block_destinations},
+            lambda: self.client.distance_matrix(
+                locations=locations,
+                profile='driving-car',
+                sources=block_sources,
+                destinations=block_destinations,
+                metrics=['duration', 'distance']
+            )
+        )
+        _note_freshness(freshness, 'matrix', fresh)
+        return matrix['durations'], matrix['distances']
+
+    def _estimate_leg(self, origin: List[float], destination: List[float]):
+        """Road distance (m) and duration (s) estimated from the great-circle distance."""
+        distance_km = haversine_km(origin, destination) * self.LOCAL_DETOUR_FACTOR
+        return distance_km * 1000, distance_km / self.LOCAL_AVERAGE_SPEED_KMH * 3600
+
+    def _directions_for_waypoints(self, coordinates: List[List[float]], freshness: Dict = None) -> Dict:
+        """
+        Directions through any number of waypoints, split into overlapping chunks
+        within the ORS waypoint limit and merged back into one feature.
+        """
+        limit = self.MAX_DIRECTIONS_WAYPOINTS
+        if len(coordinates) <= limit:
+            return self._directions(coordinates, freshness)
+
+        line, segments, way_points = [], [], []
+        distance = duration = 0.0
+        for start in range(0, len(coordinates) - 1, limit - 1):
+            chunk = coordinates[start:start + limit]
+            feature = self._directions(chunk, freshness)['features'][0]
+            props = feature['properties']
+            offset = len(line) - 1 if line else 0
+            chunk_line = feature['geometry']['coordinates']
+            line.extend(chunk_line[1:] if line else chunk_line)
+            chunk_way_points = [offset + index for index in props.get('way_points', [])]
+            way_points.extend(chunk_way_points[1:] if way_points else chunk_way_points)
+            segments.extend(props.get('segments', []))
+            distance += props['summary']['distance']
+            duration += props['summary']['duration']
+
+        return {
+            'type': 'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': line},
+                'properties': {
+                    'segments': segments,
+                    'way_points': way_points,
+                    'summary': {'distance': distance, 'duration': duration},
+                },
+            }],
+        }
+
+    def _geocode(self, location_name: str, freshness: Dict = None) -> List[float]:
+        return self._resolve_location(location_name, freshness).coordinates
+
+    def _resolve_location(self, location_name: str, freshness: Dict = None,
+                          coordinates: List[float] = None) -> Location:
+        """
+        Registered location for a name, geocoding and registering it on first use.
+
+        Client-supplied coordinates register an unknown name without geocoding;
+        they never overwrite an already registered location.
+        """
+        location = lookup_location(location_name)
+        if location is not None:
+            _note_freshness(freshness, 'geocode', 'registry')
+            return location
+        if coordinates:
+            _note_freshness(freshness, 'geocode', 'registry')
+            return register_location(location_name, coordinates)
+
+        result, fresh = cached_ors_call(
+            'geocode', {'text': location_name},
+            lambda: self.client.pelias_search(text=location_name)
+        )
+        _note_freshness(freshness, 'geocode', fresh)
+        coordinates = result['features'][0]['geometry']['coordinates']
+        return register_location(location_name, coordinates)
+
+    def _directions(self, coordinates: List[List[float]], freshness: Dict = None) -> Dict:
+        directions, fresh = cached_ors_call(
+            'directions', {'coordinates': coordinates},
+            lambda: self.client.directions(
+                coordinates=coordinates,
+                profile='driving-car',
+                format='geojson'
+            )
+        )
+        _note_freshness(freshness, 'directions', fresh)
+        return directions
+
+    def _places(self, coord: List[float], category_id: int, freshness: Dict = None, stage: str = 'pois') -> Dict:
+        """
+        POIs of one category within 2 km of a point, from the local POI index
+        when it has any, otherwise from ORS. Raises OrsUnavailableError when
+        ORS is down and nothing is cached for that point.
+        """
+        index = get_poi_index()
+        if index is not None:
+            hits = index.radius(coord, 2000, category_id, limit=10)
+            if hits:
+                _note_freshness(freshness, stage, 'local')
+                return {'features': [
+                    {
+                        'properties': {'name': hit['name'], 'distance': hit['distance_meters']},
+                        'geometry': {'type': 'Point', 'coordinates': hit['coordinates']},
+                    }
+                    for hit in hits
+                ]}
+
+        try:
+            pois, fresh = cached_ors_call(
+                'places', {'coordinates': coord, 'category': category_id},
+                lambda: self.client.places(
                     request='pois',
                     geojson={'type': 'Point', 'coordinates': coord},
                     buffer=2000,  # max allowed radius in meters
-                    filter_category_ids=[596],  # fuel stations category
+                    filter_category_ids=[category_id],
                     limit=10,
                     sortby='distance'
                 )
+            )
+        except OrsUnavailableError:
+            _note_freshness(freshness, stage, 'unavailable')
+            raise
+        _note_freshness(freshness, stage, fresh)
+        return pois
+
+    def _generate_fuel_stops(self, coordinates: List[List[float]], freshness: Dict = None) -> List[dict]:
+        logger = logging.getLogger(__name__)
+        fuel_stops = []
+
+        for coord in coordinates:
+            try:
+                pois = self._places(coord, 596, freshness, 'fuel_stops')  # fuel stations category
                 features = pois.get('features', [])
                 logger.info(f"Fuel POIs near {coord}: count={len(features)}")
 
@@ -98,7 +642,7 @@ class RouteOptimizationService:
         return fuel_stops
 
 
-    def _generate_rest_stops(self, coordinates: List[List[float]], cycle_hours: float) -> List[dict]:
+    def _generate_rest_stops(self, coordinates: List[List[float]], cycle_hours: float, freshness: Dict = None) -> List[dict]:
         logger = logging.getLogger(__name__)
         rest_stops = []
         logger.info(f"Calculating rest stops for cycle hours: {cycle_hours}")
@@ -106,14 +650,7 @@ class RouteOptimizationService:
         if cycle_hours > 4:
             pickup = coordinates[1]
             try:
-                pois = self.client.places(
-                    request='pois',
-                    geojson={'type': 'Point', 'coordinates': pickup},
-                    buffer=2000,
-                    filter_category_ids=[566],
-                    limit=10,
-                    sortby='distance'
-                )
+                pois = self._places(pickup, 566, freshness, 'rest_stops')
                 features = pois.get('features', [])
                 # logger.info(f"POIs near pickup: {features}")
                 
@@ -0,0 +1,445 @@
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from openrouteservice import exceptions as ors_exceptions
+
+from . import autocomplete, corridor, fuel, geometry, poi_index, resilience, solver
+from .models import RouteOptimization
+from .resilience import CircuitBreaker, CircuitOpenError, OrsUnavailableError, cached_ors_call
+
+
+def _fail():
+    raise ConnectionError('backend down')
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def _breaker(self, **kwargs):
+        options = {'failure_threshold': 2, 'slow_call_seconds': 5, 'reset_seconds': 0.05}
+        options.update(kwargs)
+        return CircuitBreaker('test', **options)
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = self._breaker()
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(_fail)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: 'not called')
+
+    def test_success_resets_the_failure_count(self):
+        breaker = self._breaker()
+        with self.assertRaises(ConnectionError):
+            breaker.call(_fail)
+        breaker.call(lambda: 'ok')
+        with self.assertRaises(ConnectionError):
+            breaker.call(_fail)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_closes_or_reopens(self):
+        breaker = self._breaker(failure_threshold=1)
+        with self.assertRaises(ConnectionError):
+            breaker.call(_fail)
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(ConnectionError):
+            breaker.call(_fail)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = self._breaker(failure_threshold=1, slow_call_seconds=0)
+        breaker.call(lambda: time.sleep(0.01))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        breaker = self._breaker(failure_threshold=1)
+        with self.assertRaises(ors_exceptions.ApiError):
+            breaker.call(lambda: (_ for _ in ()).throw(ors_exceptions.ApiError(404, 'no route')),
+                         is_failure=resilience._is_backend_failure)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class BackendFailureTests(SimpleTestCase):
+    def test_classification(self):
+        self.assertTrue(resilience._is_backend_failure(ors_exceptions.ApiError(429, 'rate limited')))
+        self.assertTrue(resilience._is_backend_failure(ors_exceptions.ApiError(502, 'bad gateway')))
+        self.assertTrue(resilience._is_backend_failure(ors_exceptions.HTTPError(503)))
+        self.assertTrue(resilience._is_backend_failure(ors_exceptions.Timeout()))
+        self.assertFalse(resilience._is_backend_failure(ors_exceptions.ApiError(400, 'bad request')))
+        self.assertFalse(resilience._is_backend_failure(ors_exceptions.HTTPError(404)))
+
+
+@override_settings(ORS_CACHE_FRESH_SECONDS=0, ORS_BREAKER_FAILURE_THRESHOLD=100)
+class CachedOrsCallTests(SimpleTestCase):
+    def setUp(self):
+        caches['ors'].clear()
+        resilience._breakers.clear()
+
+    def test_serves_stale_copy_when_backend_fails(self):
+        self.assertEqual(cached_ors_call('op', {'a': 1}, lambda: 'fresh'), ('fresh', 'live'))
+        self.assertEqual(cached_ors_call('op', {'a': 1}, _fail), ('fresh', 'stale'))
+
+    def test_raises_unavailable_without_a_copy(self):
+        with self.assertRaises(OrsUnavailableError):
+            cached_ors_call('op', {'a': 2}, _fail)
+
+    def test_client_errors_are_raised_unchanged(self):
+        def reject():
+            raise ors_exceptions.ApiError(400, 'bad request')
+
+        cached_ors_call('op', {'a': 3}, lambda: 'fresh')
+        with self.assertRaises(ors_exceptions.ApiError):
+            cached_ors_call('op', {'a': 3}, reject)
+
+
+class SolveStopOrderTests(SimpleTestCase):
+    def _problem(self, seed, stops=24, pairs=6):
+        rng = random.Random(seed)
+        points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(stops + 1)]
+        # Asymmetric costs, like drive times that differ by direction
+        matrix = [
+            [0 if i == j else ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 * rng.uniform(1, 1.3)
+             for j, b in enumerate(points)]
+            for i, a in enumerate(points)
+        ]
+        nodes = list(range(1, stops + 1))
+        rng.shuffle(nodes)
+        precedence = [(nodes[2 * k], nodes[2 * k + 1]) for k in range(pairs)]
+        return matrix, precedence
+
+    def _initial(self, matrix, precedence):
+        partner_after = dict(precedence)
+        partner_before = {after: before for before, after in precedence}
+        return solver._nearest_insertion(matrix, partner_after, partner_before)
+
+    def test_visits_every_stop_once_keeping_precedence(self):
+        for seed in range(20):
+            matrix, precedence = self._problem(seed)
+            order = solver.solve_stop_order(matrix, precedence)
+
+            self.assertEqual(order[0], 0)
+            self.assertEqual(sorted(order), list(range(len(matrix))))
+            position = {node: p for p, node in enumerate(order)}
+            for before, after in precedence:
+                self.assertLess(position[before], position[after], f'seed {seed}')
+
+    def test_never_worse_than_nearest_insertion(self):
+        for seed in range(20):
+            matrix, precedence = self._problem(seed)
+            initial = self._initial(matrix, precedence)
+            order = solver.solve_stop_order(matrix, precedence)
+
+            self.assertLessEqual(
+                solver.route_cost(matrix, order), solver.route_cost(matrix, initial) + 1e-9, f'seed {seed}'
+            )
+
+    def test_trivial_inputs(self):
+        self.assertEqual(solver.solve_stop_order([[0]]), [0])
+        self.assertEqual(solver.solve_stop_order([[0, 1], [1, 0]]), [0, 1])
+
+
+class GeometryTests(SimpleTestCase):
+    # Google's reference example, as [lon, lat]
+    REFERENCE_LINE = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+    REFERENCE_ENCODED = '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+
+    def test_polyline_matches_reference_encoding(self):
+        self.assertEqual(geometry.encode_polyline(self.REFERENCE_LINE), self.REFERENCE_ENCODED)
+        decoded = geometry.decode_polyline(self.REFERENCE_ENCODED)
+        for point, expected in zip(decoded, self.REFERENCE_LINE):
+            self.assertAlmostEqual(point[0], expected[0], places=5)
+            self.assertAlmostEqual(point[1], expected[1], places=5)
+
+    def test_polyline_round_trip(self):
+        rng = random.Random(7)
+        line = [[round(rng.uniform(-180, 180), 6), round(rng.uniform(-85, 85), 6)] for _ in range(200)]
+        for precision in (5, 6):
+            decoded = geometry.decode_polyline(geometry.encode_polyline(line, precision), precision)
+            self.assertEqual(len(decoded), len(line))
+            for point, expected in zip(decoded, line):
+                self.assertAlmostEqual(point[0], expected[0], delta=10 ** -precision)
+                self.assertAlmostEqual(point[1], expected[1], delta=10 ** -precision)
+
+    def test_simplify_keeps_ends_and_corners(self):
+        straight = [[-100 + i * 0.01, 40.0] for i in range(101)]
+        corner = straight + [[-99.0, 40.0 + i * 0.01] for i in range(1, 101)]
+
+        simplified = geometry.simplify_line(corner, zoom=10)
+
+        self.assertEqual(simplified, [corner[0], corner[100], corner[-1]])
+        self.assertEqual(geometry.simplify_line(corner[:2], zoom=10), corner[:2])
+
+    def test_simplify_stays_within_tolerance(self):
+        rng = random.Random(3)
+        line = [[-100 + i * 0.001, 40 + rng.uniform(-0.002, 0.002)] for i in range(500)]
+        zoom = 12
+        simplified = geometry.simplify_line(line, zoom)
+        self.assertLess(len(simplified), len(line))
+
+        tolerance = 1 / (256 * 2 ** zoom)
+        projected = [geometry.mercator(c) for c in simplified]
+        for point in line:
+            px, py = geometry.mercator(point)
+            gap = min(_point_segment_distance(px, py, a, b) for a, b in zip(projected, projected[1:]))
+            self.assertLessEqual(gap, tolerance * (1 + 1e-9))
+
+    def test_clip_line_splits_at_bounds(self):
+        line = [[-2, 0], [2, 0], [2, 3], [-2, 3], [-2, 0.5], [0, 0.5]]
+
+        parts = geometry.clip_line(line, (-1, -1, 1, 1))
+
+        self.assertEqual(parts, [[[-1.0, 0.0], [1.0, 0.0]], [[-1.0, 0.5], [0.0, 0.5]]])
+        self.assertEqual(geometry.clip_line([[5, 5], [6, 6]], (-1, -1, 1, 1)), [])
+
+    def test_snap_to_line(self):
+        line = [[-100.0, 40.0], [-99.0, 40.0], [-99.0, 41.0]]
+
+        snap = geometry.snap_to_line(line, [-99.5, 40.01])
+
+        self.assertEqual(snap.segment, 0)
+        self.assertAlmostEqual(snap.fraction, 0.5, places=6)
+        self.assertAlmostEqual(snap.point[1], 40.0, places=9)
+        self.assertAlmostEqual(snap.offset_km, geometry.haversine_km([-99.5, 40.01], [-99.5, 40.0]), places=3)
+
+    def test_snap_prefers_the_first_stretch_within_reach(self):
+        # Out along latitude 40, back 2 km further north
+        out_and_back = [[-100.0, 40.0], [-99.0, 40.0], [-99.0, 40.02], [-100.0, 40.02]]
+        point = [-99.5, 40.012]  # nearer the return leg
+
+        self.assertEqual(geometry.snap_to_line(out_and_back, point).segment, 2)
+        self.assertEqual(geometry.snap_to_line(out_and_back, point, prefer_within_km=2).segment, 0)
+
+
+class CorridorSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(11)
+        cls.lines = {}
+        for i in range(60):
+            lon, lat, heading = rng.uniform(-101, -99), rng.uniform(37, 39), rng.uniform(0, 2 * math.pi)
+            line = []
+            for _ in range(80):
+                heading += rng.uniform(-0.3, 0.3)
+                lon += 0.02 * math.cos(heading)
+                lat += 0.02 * math.sin(heading)
+                line.append([round(lon, 5), round(lat, 5)])
+            route = RouteOptimization.objects.create(
+                current_location='A', pickup_location='B', dropoff_location='C', current_cycle_hours_used=0,
+                optimized_route=f'Route {i}', estimated_travel_time='', estimated_fuel_consumption='',
+                geometry=geometry.encode_polyline(line),
+            )
+            corridor.index_route(route, line)
+            cls.lines[route.id] = line
+
+    def _assert_same_results(self, results, expected):
+        self.assertEqual(sorted(route_id for route_id, _ in results), sorted(expected))
+        for route_id, distance in results:
+            self.assertAlmostEqual(distance, expected[route_id], places=6)
+
+    def test_near_point_matches_brute_force(self):
+        for point in ([-100.0, 38.0], [-99.3, 37.4], [-100.8, 38.9]):
+            for radius_km in (2, 15, 40):
+                expected = {
+                    route_id: distance for route_id, distance in
+                    ((route_id, geometry.snap_to_line(line, point).offset_km) for route_id, line in self.lines.items())
+                    if distance <= radius_km
+                }
+                self._assert_same_results(corridor.near_point(point, radius_km), expected)
+            # The widest search reaches some route, so the comparison is not vacuous
+            self.assertTrue(expected)
+
+    def test_near_line_matches_brute_force(self):
+        line = [[-101.0, 37.5], [-100.4, 38.2], [-99.6, 38.4], [-99.0, 39.1]]
+        simplified = geometry.simplify_line(line, corridor.CORRIDOR_SIMPLIFY_ZOOM)
+        for radius_km in (1, 10):
+            expected = {
+                route_id: distance for route_id, distance in
+                ((route_id, corridor._line_line_km(route_line, simplified)) for route_id, route_line in self.lines.items())
+                if distance <= radius_km
+            }
+            self._assert_same_results(corridor.near_line(line, radius_km), expected)
+        self.assertTrue(expected)
+
+    def test_filters_and_limit(self):
+        point = [-100.0, 38.0]
+        results = corridor.near_point(point, 40)
+        nearest_id = results[0][0]
+
+        self.assertEqual(corridor.near_point(point, 40, limit=3), results[:3])
+        self.assertNotIn(nearest_id, [route_id for route_id, _ in corridor.near_point(point, 40, exclude=nearest_id)])
+
+
+class FuelEstimateTests(SimpleTestCase):
+    def _routes(self):
+        rng = random.Random(5)
+        routes = []
+        for length in (1, 3, 40, 7):
+            distances = [rng.uniform(0, 20000) for _ in range(length)]
+            # Include a zero-length step and a stationary one, plus steps faster than any governor
+            durations = [d / rng.uniform(2, 40) for d in distances]
+            routes.append((distances, durations))
+        routes[1][0][0], routes[1][1][0] = 0.0, 30.0
+        routes[2][1][5] = 0.0
+        return routes
+
+    def test_vectorized_estimates_match_scalar_computation(self):
+        routes = self._routes()
+        profiles = list(fuel.TRUCK_PROFILES.values()) + [fuel.resolve_profile({'name': 'slow', 'max_speed_kmh': 60})[1]]
+
+        result = fuel.estimate_routes(
+            [(np.array(distances), np.array(durations)) for distances, durations in routes], profiles,
+            include_segments=True,
+        )
+
+        for p, profile in enumerate(profiles):
+            for r, (distances, durations) in enumerate(routes):
+                fuel_liters, duration_seconds = _scalar_estimate(distances, durations, profile)
+                self.assertAlmostEqual(result['fuel_liters'][p, r], fuel_liters, places=6)
+                self.assertAlmostEqual(result['duration_seconds'][p, r], duration_seconds, places=6)
+        self.assertTrue(np.allclose(result['distance_meters'], [sum(distances) for distances, _ in routes]))
+        self.assertEqual(list(result['offsets']), [0, 1, 4, 44])
+
+    def test_metrics_round_trip(self):
+        feature = {'properties': {'segments': [
+            {'steps': [{'distance': 1200.5, 'duration': 60.0}, {'distance': 300.0, 'duration': 30.0}]},
+            {'steps': [{'distance': 50.0, 'duration': 0}]},
+        ]}}
+
+        distances, durations = fuel.unpack_metrics(fuel.segment_metrics(feature))
+
+        self.assertEqual(list(distances), [1200.5, 300.0, 50.0])
+        self.assertEqual(list(durations), [60.0, 30.0, 0.0])
+        self.assertEqual([list(a) for a in fuel.unpack_metrics(b'', 1000, 50)], [[1000.0], [50.0]])
+
+
+class PoiIndexLoadTests(SimpleTestCase):
+    def setUp(self):
+        state = mock.patch.multiple(poi_index, _index=None, _index_mtime=None, _load_failed=False)
+        state.start()
+        self.addCleanup(state.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'pois.json')
+
+    def _write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+
+    def test_malformed_records_are_skipped(self):
+        fuel_props = {'category_ids': {'596': {}}, 'name': 'Fuel'}
+        self._write({
+            'features': [
+                {'geometry': {'type': 'Point', 'coordinates': [-100.0, 40.0]}, 'properties': fuel_props},
+                {'geometry': {'type': 'Point'}, 'properties': fuel_props},
+                {'geometry': {'type': 'Point', 'coordinates': 5}, 'properties': fuel_props},
+                {'geometry': {'type': 'Point', 'coordinates': ['x', 40]}, 'properties': fuel_props},
+                {'geometry': {'type': 'Point', 'coordinates': [-100.0, 95.0]}, 'properties': fuel_props},
+                'not a feature',
+            ],
+            'elements': [
+                {'lat': 40.1, 'lon': -100.1, 'tags': {'amenity': 'fuel'}},
+                {'lat': 40.1, 'tags': {'amenity': 'fuel'}},
+            ],
+        })
+
+        with self.assertLogs('routes.poi_index', 'WARNING') as logs:
+            index = poi_index.PoiIndex.from_file(self.path)
+
+        self.assertEqual(len(index), 2)
+        self.assertIn('Skipped 6 malformed POI records', logs.output[0])
+
+    @override_settings(POI_INDEX_REFRESH_SECONDS=0)
+    def test_failed_load_is_not_retried_per_request(self):
+        self._write('{not json')
+        with override_settings(POI_INDEX_PATH=self.path), \
+                mock.patch.object(poi_index.PoiIndex, 'from_file', wraps=poi_index.PoiIndex.from_file) as from_file, \
+                self.assertLogs('routes.poi_index', 'ERROR'):
+            self.assertIsNone(poi_index.get_poi_index())
+            self.assertIsNone(poi_index.get_poi_index())
+            self.assertEqual(from_file.call_count, 1)
+
+            # The refresher's next run picks up the fixed file
+            self._write({'elements': [{'lat': 40.1, 'lon': -100.1, 'tags': {'amenity': 'fuel'}}]})
+            self.assertTrue(poi_index.refresh_poi_index(force=True))
+            self.assertEqual(len(poi_index.get_poi_index()), 1)
+
+
+class LocationPrefixIndexTests(SimpleTestCase):
+    WORDS = ['main', 'mesa', 'yard', 'dallas', 'denver', 'depot', 'tx', 'co', 'north', 'nashville']
+
+    def _expected(self, index, query, limit):
+        prefix = autocomplete._normalize_key(query)
+        matches = [
+            entry for entry in index._entries.values()
+            if any(word.startswith(prefix) for word in autocomplete._word_suffixes(entry['name']))
+        ]
+        matches.sort(key=lambda entry: (-entry['usage_count'], entry['name'], entry['id']))
+        return [entry['id'] for entry in matches[:limit]]
+
+    def test_short_prefix_top_lists_follow_updates(self):
+        rng = random.Random(9)
+
+        def name():
+            return ' '.join(rng.choice(self.WORDS) for _ in range(rng.randint(1, 3)))
+
+        index = autocomplete.LocationPrefixIndex.build(
+            (i, name(), 0.0, 0.0, rng.randint(0, 20)) for i in range(300)
+        )
+        queries = ['m', 'd', 'de', 'ma', 'n', 'tx', 'dal', 'x']
+        for step in range(150):
+            action = rng.random()
+            location_id = rng.randrange(330)
+            if action < 0.4 and location_id in index._entries:
+                index.record_use(location_id, rng.randint(1, 5))
+            elif action < 0.8:
+                index.add(location_id, name(), [0.0, 0.0], rng.randint(0, 30))
+            for query in queries:
+                for limit in (3, 50):
+                    results = [entry['id'] for entry in index.search(query, limit)]
+                    self.assertEqual(results, self._expected(index, query, limit), f'step {step} {query!r}')
+
+    def test_results_are_copies(self):
+        index = autocomplete.LocationPrefixIndex.build([(1, 'Main Yard', -96.8, 32.8, 4)])
+
+        index.search('m')[0]['usage_count'] = 100
+
+        self.assertEqual(index.search('m')[0]['usage_count'], 4)
+
+
+def _scalar_estimate(distances, durations, profile):
+    """One segment at a time, as the module docstring describes the model."""
+    max_speed_ms = profile.max_speed_kmh / 3.6
+    total_fuel = total_duration = 0.0
+    for distance, duration in zip(distances, durations):
+        speed_ms = distance / duration if duration > 0 else math.inf
+        if speed_ms > max_speed_ms:
+            duration, speed_ms = distance / max_speed_ms, max_speed_ms
+        speed_kmh = max(speed_ms * 3.6, fuel._MIN_CURVE_SPEED_KMH)
+        deviation = (speed_kmh - profile.optimal_speed_kmh) / profile.optimal_speed_kmh
+        l_per_100km = (
+            profile.base_l_per_100km
+            * (1 + profile.weight_coefficient_per_tonne * profile.load_kg / 1000)
+            * (1 + profile.speed_coefficient * deviation ** 2)
+        )
+        total_fuel += l_per_100km * distance / 100000 + profile.auxiliary_l_per_hour * duration / 3600
+        total_duration += duration
+    return total_fuel, total_duration
+
+
+def _point_segment_distance(px, py, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else min(1.0, max(0.0, ((px - a[0]) * dx + (py - a[1]) * dy) / length2))
+    return ((a[0] + t * dx - px) ** 2 + (a[1] + t * dy - py) ** 2) ** 0.5
@@ -3,7 +3,17 @@ from . import views
 
 urlpatterns = [
     path('optimize/', views.optimize_route, name='optimize_route'),
+    path('optimize/stream/', views.optimize_route_stream, name='optimize_route_stream'),
+    path('optimize/multi-stop/', views.optimize_multi_stop_route, name='optimize_multi_stop_route'),
+    path('fleet/', views.fleet_overview, name='fleet_overview'),
+    path('fleet/tiles/<int:z>/<int:x>/<int:y>/', views.fleet_tile, name='fleet_tile'),
+    path('search/near/', views.search_routes_near, name='search_routes_near'),
+    path('search/corridor/', views.search_routes_corridor, name='search_routes_corridor'),
+    path('fuel-estimate/', views.estimate_route_fuel, name='estimate_route_fuel'),
     path('history/', views.get_route_history, name='route_history'),
+    path('locations/', views.locations, name='locations'),
+    path('locations/autocomplete/', views.autocomplete_locations, name='autocomplete_locations'),
     path('<int:route_id>/', views.get_route_detail, name='route_detail'),
+    path('<int:route_id>/reroute/', views.reroute_route, name='reroute_route'),
     path('healthcheck/', views.health_check, name='health_check'),
 ]
\ No newline at end of file
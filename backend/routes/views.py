@@ -1,16 +1,33 @@
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
-from .models import RouteOptimization, FuelStop, RestBreakStop
-from .serializers import RouteOptimizationSerializer, RouteOptimizationInputSerializer
-from .services import RouteOptimizationService
-import os
-from dotenv import load_dotenv
+from trucklogix.idempotency import idempotent
+from trucklogix.renderers import (
+    EventStreamRenderer, FastJSONRenderer, NDJSONRenderer, ndjson_frame, sse_frame
+)
+from . import corridor, fleet, fuel
+from .autocomplete import get_location_index
+from .geometry import decode_polyline, encode_polyline
+from .locations import register_location
+from .models import ArchivedRouteOptimization, RouteOptimization, FuelStop, RestBreakStop, Location
+from .readers import route_rows
+from .serializers import (
+    RouteOptimizationSerializer, RouteOptimizationDetailSerializer, RouteOptimizationInputSerializer,
+    MultiStopRouteInputSerializer, RerouteInputSerializer, ProximitySearchSerializer,
+    CorridorSearchSerializer, FuelEstimateInputSerializer, LocationSerializer
+)
+from .services import RouteOptimizationService, get_route_optimization_service
+from .resilience import OrsUnavailableError
 
-load_dotenv()  
+logger = logging.getLogger(__name__)
 
 
 @api_view(['POST'])
+@idempotent('optimize_route')
 def optimize_route(request):
     """
     Optimize a route based on current location, pickup, dropoff, and cycle hours.
@@ -22,68 +39,34 @@ def optimize_route(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Initialize the service with an API key
-        api_key = os.getenv('OPENROUTESERVICE_API_KEY') 
-        if not api_key:
+        # Reuse the shared service (the ORS client is created on first use)
+        service = get_route_optimization_service()
+        if service is None:
             print("API key is not set.")
             return Response(
                 {'error': 'OpenRouteService API key is not set.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        service = RouteOptimizationService(api_key=api_key)
 
         # Call the service to optimize the route
-        optimization_result = service.optimize_route(serializer.validated_data)
+        optimization_result = service.optimize_route_coalesced(serializer.validated_data)
         # print(f"Optimization result: {optimization_result}")
 
-        # Compute readable travel time and fuel consumption
-        estimated_travel_time = service._calculate_travel_time(
-            optimization_result['duration_min'] * 60
-        )
-        # print(f"Estimated travel time: {estimated_travel_time}")
-        estimated_fuel_consumption = service._calculate_fuel_consumption(
-            optimization_result['distance_km']
-        )
-        # print(f"Estimated fuel consumption: {estimated_fuel_consumption}")
-
-        # Create the route optimization record
-        route_optimization = RouteOptimization.objects.create(
-            current_location=serializer.validated_data['current_location'],
-            pickup_location=serializer.validated_data['pickup_location'],
-            dropoff_location=serializer.validated_data['dropoff_location'],
-            current_cycle_hours_used=serializer.validated_data['current_cycle_hours_used'],
-            optimized_route=optimization_result['optimized_route'],
-            estimated_travel_time=estimated_travel_time,
-            estimated_fuel_consumption=estimated_fuel_consumption
+        route_optimization = _save_route_optimization(
+            service, serializer.validated_data, optimization_result
         )
-        # print(f"Created RouteOptimization: {route_optimization.id}")
-
-        # Create fuel stops
-        for i, fuel_stop in enumerate(optimization_result['fuel_stops']):
-            fs = FuelStop.objects.create(
-                route_optimization=route_optimization,
-                location=fuel_stop,
-                order=i
-            )
-            # print(f"Created FuelStop {i}: {fs.id}")
-
-        # Create rest break stops
-        for i, rest_stop in enumerate(optimization_result['rest_break_stops']):
-            rs = RestBreakStop.objects.create(
-                route_optimization=route_optimization,
-                location=rest_stop,
-                order=i
-            )
-            # print(f"Created RestBreakStop {i}: {rs.id}")
 
         # Return the serialized result
         result_serializer = RouteOptimizationSerializer(route_optimization)
         result_data = result_serializer.data
         result_data['coordinates'] = optimization_result.get('coordinates', [])
         result_data['directions'] = optimization_result.get('directions', [])
+        result_data['freshness'] = optimization_result.get('freshness', {})
         print(f"Serialized result with coordinates: {result_data}")
         return Response(result_data, status=status.HTTP_201_CREATED)
     
+    except OrsUnavailableError as e:
+        return _routing_unavailable_response('Failed to optimize route', e)
 
     except Exception as e:
         print(f"Exception occurred: {str(e)}")
@@ -92,26 +75,486 @@ def optimize_route(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+@api_view(['POST'])
+@renderer_classes([NDJSONRenderer, EventStreamRenderer])
+def optimize_route_stream(request):
+    """
+    Optimize a route like ``optimize/``, streaming each stage as it is ready:
+    ``coordinates``, ``route`` (line and summary), ``fuel_stops``,
+    ``rest_stops``, then ``record`` with the saved route. NDJSON by default;
+    Server-Sent Events with ``Accept: text/event-stream``. A failure mid-way
+    ends the stream with an ``error`` event.
+    """
+    serializer = RouteOptimizationInputSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    service = get_route_optimization_service()
+    if service is None:
+        return Response(
+            {'error': 'OpenRouteService API key is not set.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    route_fields = serializer.validated_data
+    frame = sse_frame if request.accepted_renderer.format == 'sse' else ndjson_frame
+
+    def stages():
+        try:
+            for stage, payload in service.optimize_route_progressive(route_fields):
+                if stage != 'result':
+                    yield frame(stage, payload)
+                    continue
+                route_optimization = _save_route_optimization(service, route_fields, payload)
+                yield frame('record', RouteOptimizationSerializer(route_optimization).data)
+        except OrsUnavailableError as e:
+            logger.warning(f"Routing backend unavailable: {e}")
+            yield frame('error', {
+                'error': f'Failed to optimize route: {str(e)}',
+                'status': status.HTTP_503_SERVICE_UNAVAILABLE,
+                'retry_after': max(1, round(e.retry_after)),
+            })
+        except Exception as e:
+            logger.exception("Streamed route optimization failed")
+            yield frame('error', {
+                'error': f'Failed to optimize route: {str(e)}',
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+            })
+
+    response = StreamingHttpResponse(stages(), content_type=request.accepted_renderer.media_type)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _save_route_optimization(service, route_fields, optimization_result, rerouted_from=None):
+    """
+    Persist an optimization result with its fuel and rest stops.
+
+    ``route_fields`` supplies current/pickup/dropoff locations and cycle hours.
+    """
+    # Compute readable travel time and fuel consumption
+    estimated_travel_time = service._calculate_travel_time(
+        optimization_result['duration_min'] * 60
+    )
+    estimated_fuel_consumption = service._calculate_fuel_consumption(
+        optimization_result['distance_km']
+    )
+
+    # Keep the route line compactly so details can redraw it without ORS
+    feature = optimization_result['directions']['features'][0]
+    summary = feature['properties']['summary']
+
+    # Create the route optimization record
+    coordinates = feature['geometry']['coordinates']
+    route_optimization = RouteOptimization.objects.create(
+        current_location=route_fields['current_location'],
+        pickup_location=route_fields['pickup_location'],
+        dropoff_location=route_fields['dropoff_location'],
+        current_cycle_hours_used=route_fields['current_cycle_hours_used'],
+        optimized_route=optimization_result['optimized_route'],
+        estimated_travel_time=estimated_travel_time,
+        estimated_fuel_consumption=estimated_fuel_consumption,
+        geometry=encode_polyline(coordinates),
+        way_points=feature['properties'].get('way_points', []),
+        distance_meters=summary.get('distance'),
+        duration_seconds=summary.get('duration'),
+        segment_metrics=fuel.segment_metrics(feature),
+        rerouted_from=rerouted_from,
+        **fleet.simplified_fields(coordinates)
+    )
+
+    # Create fuel stops
+    for i, fuel_stop in enumerate(optimization_result['fuel_stops']):
+        FuelStop.objects.create(
+            route_optimization=route_optimization,
+            location=fuel_stop,
+            details=fuel_stop,
+            order=i
+        )
+
+    # Create rest break stops
+    for i, rest_stop in enumerate(optimization_result['rest_break_stops']):
+        RestBreakStop.objects.create(
+            route_optimization=route_optimization,
+            location=rest_stop,
+            details=rest_stop,
+            order=i
+        )
+
+    corridor.index_route(route_optimization, coordinates)
+    return route_optimization
+
+
+def _routing_unavailable_response(prefix, error):
+    logger.warning(f"Routing backend unavailable: {error}")
+    return Response(
+        {'error': f'{prefix}: {str(error)}'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(max(1, round(error.retry_after)))}
+    )
+
+
+@api_view(['POST'])
+@idempotent('reroute_route')
+def reroute_route(request, route_id):
+    """
+    Re-plan a stored route from the driver's current position.
+
+    Only the stretch from the position back onto the stored line is routed
+    again (nothing at all while the driver is on route); the rest of the line
+    and the stops not yet passed are reused. The result is saved as a new
+    route linked to the original through ``rerouted_from``.
+    """
+    serializer = RerouteInputSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        route = RouteOptimization.objects.get(id=route_id)
+    except RouteOptimization.DoesNotExist:
+        return Response({'error': 'Route not found'}, status=status.HTTP_404_NOT_FOUND)
+    line = route.geometry_coordinates()
+    if len(line) < 2 or route.distance_meters is None or route.duration_seconds is None:
+        return Response(
+            {'error': 'Route has no stored line to re-route from; optimize it again instead'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    try:
+        # Without an API key only the on-route case, which makes no ORS call, can succeed
+        service = get_route_optimization_service() or RouteOptimizationService(api_key='')
+
+        position = serializer.validated_data['position']
+        optimization_result = service.reroute({
+            'position': position,
+            'geometry': line,
+            'way_points': route.way_points,
+            'distance_meters': route.distance_meters,
+            'duration_seconds': route.duration_seconds,
+            'optimized_route': route.optimized_route,
+            'fuel_stops': [stop.details or {'name': stop.location} for stop in route.fuel_stops.all()],
+            'rest_break_stops': [stop.details or {'name': stop.location} for stop in route.rest_break_stops.all()],
+        })
+
+        route_optimization = _save_route_optimization(service, {
+            'current_location': f"{position[0]:.5f},{position[1]:.5f}",
+            'pickup_location': route.pickup_location,
+            'dropoff_location': route.dropoff_location,
+            'current_cycle_hours_used': serializer.validated_data.get(
+                'current_cycle_hours_used', route.current_cycle_hours_used
+            ),
+        }, optimization_result, rerouted_from=route)
+
+        result_data = RouteOptimizationSerializer(route_optimization).data
+        result_data['rerouted_from'] = route.id
+        for key in ('coordinates', 'directions', 'freshness', 'reroute'):
+            result_data[key] = optimization_result[key]
+        return Response(result_data, status=status.HTTP_201_CREATED)
+
+    except OrsUnavailableError as e:
+        return _routing_unavailable_response('Failed to re-route', e)
+
+    except Exception as e:
+        logger.exception("Re-route failed")
+        return Response(
+            {'error': f'Failed to re-route: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+def optimize_multi_stop_route(request):
+    """
+    Optimize the visiting order of several pickups and dropoffs, then route them.
+    """
+    serializer = MultiStopRouteInputSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        service = get_route_optimization_service()
+        if service is None:
+            return Response(
+                {'error': 'OpenRouteService API key is not set.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        data = serializer.validated_data
+        optimization_result = service.optimize_multi_stop(data)
+        stop_order = optimization_result['stop_order']
+
+        route_optimization = _save_route_optimization(service, {
+            'current_location': data['current_location'],
+            'pickup_location': next(
+                (stop['location'] for stop in stop_order if stop['type'] == 'pickup'),
+                stop_order[0]['location']
+            ),
+            'dropoff_location': stop_order[-1]['location'],
+            'current_cycle_hours_used': data['current_cycle_hours_used'],
+        }, optimization_result)
+
+        result_data = RouteOptimizationSerializer(route_optimization).data
+        for key in ('stop_order', 'matrix_source', 'coordinates', 'directions', 'freshness'):
+            result_data[key] = optimization_result[key]
+        return Response(result_data, status=status.HTTP_201_CREATED)
+
+    except OrsUnavailableError as e:
+        return _routing_unavailable_response('Failed to optimize multi-stop route', e)
+
+    except Exception as e:
+        logger.exception("Multi-stop route optimization failed")
+        return Response(
+            {'error': f'Failed to optimize multi-stop route: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET', 'POST'])
+def locations(request):
+    """
+    List registered locations (most used first) or register one with known coordinates.
+    """
+    if request.method == 'POST':
+        serializer = LocationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        location = register_location(data['name'], [data['longitude'], data['latitude']], usage_count=0)
+        return Response(LocationSerializer(location).data, status=status.HTTP_201_CREATED)
+
+    registered = Location.objects.all()[:100]
+    return Response(LocationSerializer(registered, many=True).data)
+
+
 @api_view(['GET'])
+def autocomplete_locations(request):
+    """
+    Suggest registered or previously geocoded locations matching a prefix, most used first.
+
+    Pass a suggestion's coordinates back as ``*_coordinates`` to skip geocoding.
+    """
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(get_location_index().search(query, limit))
+
+
+@api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def get_route_history(request):
     """
     Get the history of route optimizations.
     """
     routes = RouteOptimization.objects.all()[:10]  # Get last 10 routes
-    serializer = RouteOptimizationSerializer(routes, many=True)
-    return Response(serializer.data)
+    return Response(route_rows(routes))
+
+
+@api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
+def search_routes_near(request):
+    """
+    Routes whose line passes within ``radius_km`` of ``lon`` / ``lat``,
+    nearest first, each with its ``distance_km``.
+    """
+    serializer = ProximitySearchSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    matches = corridor.near_point(
+        [data['lon'], data['lat']], data['radius_km'],
+        since=data.get('since'), until=data.get('until'), limit=data['limit']
+    )
+    return Response({'results': _routes_with_distance(matches)})
+
+
+@api_view(['POST'])
+@renderer_classes([FastJSONRenderer])
+def search_routes_corridor(request):
+    """
+    Routes coming within ``radius_km`` of a corridor: a ``coordinates`` line or
+    a stored route's line (``route_id``, which is left out of the results).
+    """
+    serializer = CorridorSearchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    route_id = data.get('route_id')
+    if route_id is not None:
+        route = RouteOptimization.objects.filter(id=route_id).only('geometry', 'simplified_geometry').first()
+        if route is None:
+            return Response({'error': 'Route not found'}, status=status.HTTP_404_NOT_FOUND)
+        # The finest stored simplification is well within any useful corridor width
+        levels = route.simplified_geometry
+        finest = max(levels, key=int, default=None)
+        line = decode_polyline(levels[finest]) if finest else route.geometry_coordinates()
+        if not line:
+            return Response({'error': 'Route has no stored line'}, status=status.HTTP_409_CONFLICT)
+    else:
+        line = data['coordinates']
+
+    matches = corridor.near_line(
+        line, data['radius_km'],
+        since=data.get('since'), until=data.get('until'), exclude=route_id, limit=data['limit']
+    )
+    return Response({'results': _routes_with_distance(matches)})
+
+
+def _routes_with_distance(matches):
+    distances = dict(matches)
+    rows = {row['id']: row for row in route_rows(RouteOptimization.objects.filter(id__in=distances))}
+    return [
+        {**rows[route_id], 'distance_km': round(distance, 3)}
+        for route_id, distance in matches if route_id in rows
+    ]
+
+
+@api_view(['POST'])
+@renderer_classes([FastJSONRenderer])
+def estimate_route_fuel(request):
+    """
+    Fuel and drive time of stored routes (``route_ids`` or a ``since`` /
+    ``until`` range) under one or more truck ``profiles``, from each route's
+    per-step distances and durations, with per-profile fleet totals.
+    """
+    serializer = FuelEstimateInputSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    routes = RouteOptimization.objects.order_by('id')
+    if 'route_ids' in data:
+        routes = routes.filter(id__in=data['route_ids'])
+    if 'since' in data:
+        routes = routes.filter(created_at__gte=data['since'])
+    if 'until' in data:
+        routes = routes.filter(created_at__lt=data['until'])
+    rows = list(
+        routes.values_list('id', 'segment_metrics', 'distance_meters', 'duration_seconds')
+        [:settings.FUEL_ESTIMATE_MAX_ROUTES + 1]
+    )
+    if len(rows) > settings.FUEL_ESTIMATE_MAX_ROUTES:
+        return Response(
+            {'error': f'At most {settings.FUEL_ESTIMATE_MAX_ROUTES} routes per request; narrow the range'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if data['segments'] and len(rows) > 10:
+        return Response({'error': 'segments is limited to 10 routes'}, status=status.HTTP_400_BAD_REQUEST)
+
+    names = [name for name, _ in data['profiles']]
+    metrics = [fuel.unpack_metrics(packed, distance, duration) for _, packed, distance, duration in rows]
+    if not metrics:
+        metrics = [fuel.unpack_metrics(b'')]  # keeps the array shapes valid; no route rows are emitted
+    estimate = fuel.estimate_routes(metrics, [profile for _, profile in data['profiles']], data['segments'])
+    liters = estimate['fuel_liters'].round(2).tolist()
+    hours = (estimate['duration_seconds'] / 3600).round(2).tolist()
+    distances = (estimate['distance_meters'] / 1000).round(2).tolist()
+
+    results = []
+    for r, (route_id, *_) in enumerate(rows):
+        result = {
+            'id': route_id,
+            'distance_km': distances[r],
+            'estimates': {
+                name: {'fuel_liters': liters[p][r], 'duration_hours': hours[p][r]}
+                for p, name in enumerate(names)
+            },
+        }
+        if data['segments']:
+            start = int(estimate['offsets'][r])
+            end = start + len(metrics[r][0])
+            result['segments'] = {
+                'distance_meters': metrics[r][0].round(1).tolist(),
+                **{
+                    name: {
+                        'fuel_liters': estimate['segment_fuel_liters'][p, start:end].round(3).tolist(),
+                        'duration_seconds': estimate['segment_duration_seconds'][p, start:end].round(1).tolist(),
+                    }
+                    for p, name in enumerate(names)
+                },
+            }
+        results.append(result)
+
+    found = {route_id for route_id, *_ in rows}
+    return Response({
+        'profiles': [fuel.profile_dict(name, profile) for name, profile in data['profiles']],
+        'routes': results,
+        'totals': {
+            name: {
+                'routes': len(rows),
+                'distance_km': round(float(estimate['distance_meters'].sum()) / 1000, 2),
+                'fuel_liters': round(float(estimate['fuel_liters'][p].sum()), 2),
+                'duration_hours': round(float(estimate['duration_seconds'][p].sum()) / 3600, 2),
+            }
+            for p, name in enumerate(names)
+        },
+        'missing': [route_id for route_id in data.get('route_ids', []) if route_id not in found],
+    })
+
+
+@api_view(['GET'])
+def fleet_overview(request):
+    """
+    All active routes as one GeoJSON FeatureCollection, simplified for
+    ``?zoom=`` (default 6) and optionally limited to ``?bbox=west,south,east,north``.
+    """
+    try:
+        zoom = int(request.query_params.get('zoom', 6))
+        bbox = request.query_params.get('bbox')
+        bounds = [float(v) for v in bbox.split(',')] if bbox else None
+    except ValueError:
+        return Response({'error': 'zoom must be an integer and bbox four numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= zoom <= fleet.MAX_ZOOM or (bounds is not None and len(bounds) != 4):
+        return Response(
+            {'error': f'zoom must be 0-{fleet.MAX_ZOOM} and bbox west,south,east,north'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return _fleet_response(fleet.overview(zoom, bounds))
+
+
+@api_view(['GET'])
+def fleet_tile(request, z, x, y):
+    """Active routes clipped to slippy-map tile ``z/x/y`` as GeoJSON."""
+    if z > fleet.MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return Response({'error': 'Tile out of range'}, status=status.HTTP_404_NOT_FOUND)
+    return _fleet_response(fleet.tile(z, x, y))
+
+
+def _fleet_response(body):
+    # Already-encoded JSON from the cache, so DRF's renderer is bypassed
+    response = HttpResponse(body, content_type='application/geo+json')
+    response['Cache-Control'] = f'max-age={min(settings.FLEET_CACHE_SECONDS, 60)}'
+    return response
 
 
 @api_view(['GET'])
 def get_route_detail(request, route_id):
     """
-    Get details of a specific route optimization.
+    Get details of a specific route optimization, including its stored route line.
+
+    The line is returned as an encoded polyline; pass ``?geometry=geojson`` to
+    get it decoded into a GeoJSON LineString. Routes moved out by retention
+    are served from the archive with ``"archived": true``.
     """
+    decode = request.query_params.get('geometry') == 'geojson'
     try:
         route = RouteOptimization.objects.get(id=route_id)
-        serializer = RouteOptimizationSerializer(route)
+        serializer = RouteOptimizationDetailSerializer(route, context={'decode_geometry': decode})
         return Response(serializer.data)
     except RouteOptimization.DoesNotExist:
+        archived = ArchivedRouteOptimization.objects.filter(id=route_id).first()
+        if archived is not None:
+            data = archived.data()
+            if decode:
+                geometry = data['geometry']
+                data['geometry'] = {
+                    'type': 'LineString',
+                    'coordinates': decode_polyline(geometry) if geometry else [],
+                }
+            return Response({**data, 'archived': True})
         return Response(
             {'error': 'Route not found'},
             status=status.HTTP_404_NOT_FOUND
@@ -2,4 +2,9 @@
 set -o errexit
 
 python manage.py migrate
-gunicorn trucklogix.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --timeout 180
\ No newline at end of file
+# One process, so the duty-status stream (in-memory driver state, SSE
+# subscriptions and the event flusher) sees every ingest and subscriber.
+# Requests run on threads: an open SSE stream or chunked upload holds one
+# thread (at most HOS_STREAM_MAX_CONNECTIONS of them), not the whole worker.
+gunicorn trucklogix.wsgi:application --bind 0.0.0.0:$PORT \
+    --workers 1 --worker-class gthread --threads ${WEB_THREADS:-32} --timeout 180
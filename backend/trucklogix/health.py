@@ -0,0 +1,72 @@
+"""
+Lightweight liveness and readiness probes.
+
+Served from the first middleware so probes skip sessions, CSRF, auth and
+the DRF stack entirely.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+LIVENESS_PATH = '/healthz'
+READINESS_PATH = '/readyz'
+
+
+def liveness():
+    """The process is up and serving requests."""
+    return JsonResponse({'status': 'ok'})
+
+
+def readiness():
+    """
+    Report whether the database answers and the routing backend is configured.
+
+    Returns 503 when any check fails so load balancers hold traffic back.
+    """
+    checks = {
+        'database': _check_database(),
+        'routing_backend': _check_routing_backend(),
+    }
+    ready = all(check['ok'] for check in checks.values())
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+        status=200 if ready else 503,
+    )
+
+
+def _check_database():
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        return {'ok': True}
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+
+def _check_routing_backend():
+    if not settings.OPENROUTESERVICE_API_KEY:
+        return {'ok': False, 'error': 'OpenRouteService API key is not set.'}
+    # Open circuits are reported but do not fail readiness: the service still
+    # answers from stale caches and pulling it out of rotation would not help.
+    from routes.resilience import breaker_states
+
+    return {'ok': True, 'circuits': breaker_states()}
+
+
+class HealthCheckMiddleware:
+    """
+    Answer probe paths directly and pass everything else down the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path.rstrip('/')
+        if path == LIVENESS_PATH:
+            return liveness()
+        if path == READINESS_PATH:
+            return readiness()
+        return self.get_response(request)
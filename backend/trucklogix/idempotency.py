@@ -0,0 +1,204 @@
+"""
+``Idempotency-Key`` support for POST views.
+
+The first request for a key claims an ``IdempotencyRecord`` row (unique on
+scope and key, so every worker process sees it) and stores its response
+there for IDEMPOTENCY_TTL_SECONDS with a fingerprint of the request body.
+Retries with the same key and body replay it without running the view
+again; the same key with a different body is rejected with 422.
+Concurrent duplicates wait for the in-flight request: within a process
+through a single-flight layer, across processes by polling the row while
+its claim is held. A claim older than IDEMPOTENCY_LOCK_SECONDS (its worker
+died) is taken over. Server errors are neither stored nor handed to waiting
+duplicates, which get a 409 and retry.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+_flight = SingleFlight()
+
+
+def idempotent(scope: str):
+    """
+    Decorate a DRF function view (below ``@api_view``) so requests carrying
+    an ``Idempotency-Key`` header run at most once per key within ``scope``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            record_key = _record_key(request, key)
+            fingerprint = _fingerprint(request)
+            record = _stored(scope, record_key)
+            if record is None:
+                record = _flight.do(
+                    (scope, record_key),
+                    lambda: _run_once(scope, record_key, fingerprint, view, request, args, kwargs)
+                )
+            replayed = record is not None and record.get('origin') is not request._request
+            if replayed and record['status'] >= 500:
+                # The leader's server error is its own; this duplicate may retry
+                record = None
+            if record is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still in progress'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': '1'}
+                )
+            return _replay(record, fingerprint, replayed=replayed)
+
+        return wrapper
+    return decorator
+
+
+def _run_once(scope, record_key, fingerprint, view, request, args, kwargs):
+    """Run the view as the leader for the key, or wait for another process's result."""
+    claim = _claim(scope, record_key, fingerprint)
+    if claim is None:
+        return _wait_for(scope, record_key)
+    if isinstance(claim, dict):
+        return claim
+
+    try:
+        response = view(request, *args, **kwargs)
+    except BaseException:
+        _release(claim)
+        raise
+    record = {
+        'fingerprint': fingerprint,
+        'status': response.status_code,
+        'data': response.data,
+        'headers': {name: value for name, value in response.items() if name in ('Retry-After', 'Location')},
+        # Lets the leader tell its own result from one it is replaying; never stored
+        'origin': request._request,
+    }
+    # Server errors are not stored, so a retry gets a fresh attempt
+    if response.status_code < 500:
+        IdempotencyRecord.objects.filter(pk=claim.pk, locked_until=claim.locked_until).update(
+            status_code=response.status_code,
+            data=response.data,
+            headers=record['headers'],
+            locked_until=None,
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+    else:
+        _release(claim)
+    return record
+
+
+def _claim(scope, record_key, fingerprint):
+    """
+    Claim the key for this request. Returns the claimed row, the stored
+    record when another request already finished, or None while another
+    request holds the claim.
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    claim = {
+        'fingerprint': fingerprint, 'status_code': None, 'data': None, 'headers': {},
+        'locked_until': locked_until, 'expires_at': locked_until,
+    }
+    try:
+        with transaction.atomic():
+            return IdempotencyRecord.objects.create(scope=scope, key=record_key, **claim)
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyRecord.objects.filter(scope=scope, key=record_key).first()
+    if existing is None:
+        # Released between the insert and this read; let the caller retry
+        return None
+    if existing.expires_at > now:
+        if existing.status_code is not None:
+            return _as_record(existing)
+        if existing.locked_until > now:
+            return None
+    # Expired, or the worker holding the claim died: take it over unless another request just did
+    taken = IdempotencyRecord.objects.filter(
+        pk=existing.pk, status_code=existing.status_code, locked_until=existing.locked_until,
+    ).update(**claim)
+    if not taken:
+        return None
+    existing.locked_until = locked_until
+    return existing
+
+
+def _release(claim):
+    IdempotencyRecord.objects.filter(pk=claim.pk, locked_until=claim.locked_until).delete()
+
+
+def _stored(scope, record_key):
+    """The stored, unexpired record for the key, if its request has finished."""
+    row = IdempotencyRecord.objects.filter(
+        scope=scope, key=record_key, status_code__isnull=False, expires_at__gt=timezone.now(),
+    ).first()
+    return _as_record(row) if row is not None else None
+
+
+def _as_record(row):
+    return {'fingerprint': row.fingerprint, 'status': row.status_code, 'data': row.data, 'headers': row.headers}
+
+
+def _wait_for(scope, record_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        row = IdempotencyRecord.objects.filter(scope=scope, key=record_key).first()
+        if row is None or (row.status_code is None and row.locked_until <= timezone.now()):
+            # The other request finished without storing a response (e.g. a 5xx), or died
+            break
+        if row.status_code is not None:
+            return _as_record(row)
+    logger.info(f"Gave up waiting for in-flight request {scope} {record_key}")
+    return None
+
+
+def _replay(record, fingerprint, replayed):
+    if record['fingerprint'] != fingerprint:
+        return Response(
+            {'error': f'{HEADER} was already used with a different request body'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(record['data'], status=record['status'], headers=record['headers'])
+    if replayed:
+        response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _record_key(request, key):
+    user = request.user.pk if getattr(request.user, 'is_authenticated', False) else 'anon'
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return f'{user}:{digest}'
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
@@ -0,0 +1,28 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyRecord(models.Model):
+    """
+    One request run under an ``Idempotency-Key`` (see trucklogix.idempotency),
+    shared by every worker process. While the original runs the row is a
+    claim with no ``status_code``, held until ``locked_until``; afterwards it
+    holds the response to replay until ``expires_at``.
+    """
+    scope = models.CharField(max_length=100)
+    # The requesting user and a digest of the header value
+    key = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    headers = models.JSONField(default=dict, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq')]
+        indexes = [models.Index(fields=['expires_at'], name='idempotency_expires_idx')]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
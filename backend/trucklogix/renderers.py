@@ -0,0 +1,84 @@
+"""
+Fast JSON rendering for read-heavy endpoints.
+
+``FastJSONRenderer`` encodes with orjson when it is installed and falls back
+to DRF's ``JSONRenderer`` otherwise; both produce the same compact UTF-8
+output. ``NDJSONRenderer`` and ``EventStreamRenderer`` let streaming views
+negotiate their framing, and render a plain response (e.g. a validation
+error) as a single frame. ``format_datetime`` mirrors DRF's ``DateTimeField`` representation
+so rows built straight from ``.values()`` render exactly like serializer
+output.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_fallback_encoder = encoders.JSONEncoder()
+# Validation errors of list fields are keyed by item index
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def format_datetime(value):
+    """ISO 8601 in the current timezone, with UTC written as ``Z`` (DRF's default format)."""
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    text = value.isoformat()
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+def dumps(data) -> bytes:
+    """Encode ``data`` the way ``FastJSONRenderer`` does."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    return orjson.dumps(data, default=_fallback_encoder.default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_fallback_encoder.default, option=_ORJSON_OPTIONS)
+
+
+def ndjson_frame(event: str, data) -> bytes:
+    """One ``{"event": ..., "data": ...}`` line of an NDJSON stream."""
+    return dumps({'event': event, 'data': data}) + b'\n'
+
+
+def sse_frame(event: str, data) -> bytes:
+    """One Server-Sent Events message."""
+    return b'event: ' + event.encode() + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+def _frame_event(renderer_context):
+    response = (renderer_context or {}).get('response')
+    return 'error' if response is not None and response.status_code >= 400 else 'message'
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ndjson_frame(_frame_event(renderer_context), data)
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_frame(_frame_event(renderer_context), data)
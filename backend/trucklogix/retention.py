@@ -0,0 +1,68 @@
+"""
+Move old rows out of the hot tables into compressed cold-storage tables.
+
+Rows past the retention age are copied in chunks (one insert transaction
+per chunk) as zlib-compressed JSON in their API detail shape, then deleted
+from the hot table in small separate transactions so no lock is held for
+long. A run interrupted between the copy and the delete is safe to repeat:
+archive inserts ignore rows that are already there.
+"""
+
+import json
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+from .renderers import dumps
+
+
+def compress_payload(data: Dict) -> bytes:
+    return zlib.compress(dumps(data), 6)
+
+
+def decompress_payload(payload) -> Dict:
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def archive_rows(
+    queryset,
+    archive_model,
+    serialize: Callable[[List[int]], Iterable[Dict]],
+    make_archive: Callable[[Dict, bytes], object],
+    chunk_size: int = 500,
+    delete_batch_size: int = 100,
+    limit: Optional[int] = None,
+    pause_seconds: float = 0,
+) -> int:
+    """
+    Archive every row of ``queryset`` (up to ``limit``) and delete it from the hot table.
+
+    ``serialize`` turns a list of ids into their API-shaped dicts and
+    ``make_archive`` builds an unsaved ``archive_model`` instance from one
+    dict and its compressed payload. Returns the number of rows archived.
+    """
+    archived = 0
+    last_id = 0
+    while limit is None or archived < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - archived)
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            archive_model.objects.bulk_create(
+                [make_archive(row, compress_payload(row)) for row in serialize(ids)],
+                ignore_conflicts=True,
+            )
+
+        for start in range(0, len(ids), delete_batch_size):
+            with transaction.atomic():
+                queryset.model.objects.filter(id__in=ids[start:start + delete_batch_size]).delete()
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        archived += len(ids)
+        last_id = ids[-1]
+    return archived
@@ -4,6 +4,8 @@ Django settings for trucklogix project.
 
 from pathlib import Path
 from decouple import config
+import dj_database_url
+from corsheaders.defaults import default_headers as default_cors_headers
 import os, logging
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,11 +29,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'trucklogix',
     'routes',
     'eld_logs',
 ]
 
 MIDDLEWARE = [
+    # First, so /healthz and /readyz skip the rest of the stack
+    'trucklogix.health.HealthCheckMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,12 +67,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'trucklogix.wsgi.application'
 
-# Database
+# Database (DATABASE_URL overrides the local SQLite file, e.g. for load tests)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.config(default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
 }
 
 # Password validation
@@ -110,6 +112,102 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Caches (per-process), one alias per kind of data so that culling one (e.g. a
+# burst of fleet tiles) never evicts another: 'default' holds recent optimize
+# results, 'ors' the stale-while-revalidate ORS copies the circuit breakers fall
+# back on, 'fleet' rendered overviews and tiles. Idempotency records, which
+# every worker must see, live in the database (trucklogix.models).
+def _local_cache(location, max_entries):
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': location,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    'default': _local_cache('trucklogix', config('CACHE_DEFAULT_MAX_ENTRIES', default=1000, cast=int)),
+    'ors': _local_cache('trucklogix-ors', config('CACHE_ORS_MAX_ENTRIES', default=20000, cast=int)),
+    'fleet': _local_cache('trucklogix-fleet', config('CACHE_FLEET_MAX_ENTRIES', default=5000, cast=int)),
+}
+
+# Route optimization
+OPENROUTESERVICE_API_KEY = config('OPENROUTESERVICE_API_KEY', default='')
+OPENROUTESERVICE_BASE_URL = config('OPENROUTESERVICE_BASE_URL', default='https://api.openrouteservice.org')
+
+# Seconds an identical optimize request reuses a recent result (0 disables reuse;
+# concurrent identical requests are always coalesced).
+ROUTE_OPTIMIZATION_REUSE_SECONDS = config('ROUTE_OPTIMIZATION_REUSE_SECONDS', default=30, cast=int)
+
+# Re-routing: positions this close to the stored line count as on route (no ORS
+# call); otherwise directions are fetched only to a point this far ahead.
+REROUTE_SNAP_TOLERANCE_METERS = config('REROUTE_SNAP_TOLERANCE_METERS', default=150, cast=float)
+REROUTE_REJOIN_KM = config('REROUTE_REJOIN_KM', default=5, cast=float)
+
+# Fleet overview map: routes saved within FLEET_ACTIVE_HOURS (and not re-routed
+# since) are drawn, simplified at save time for each zoom in FLEET_ZOOM_LEVELS to
+# within FLEET_SIMPLIFY_PIXELS; overviews and tiles are cached FLEET_CACHE_SECONDS.
+FLEET_ACTIVE_HOURS = config('FLEET_ACTIVE_HOURS', default=24, cast=float)
+FLEET_ZOOM_LEVELS = config('FLEET_ZOOM_LEVELS', default='4,6,8,10,12', cast=lambda v: sorted(int(z) for z in v.split(',') if z.strip()))
+FLEET_SIMPLIFY_PIXELS = config('FLEET_SIMPLIFY_PIXELS', default=1.0, cast=float)
+FLEET_CACHE_SECONDS = config('FLEET_CACHE_SECONDS', default=300, cast=int)
+FLEET_MAX_ROUTES = config('FLEET_MAX_ROUTES', default=2000, cast=int)
+
+# Proximity/corridor search: grid cell size (degrees) of the route-line index.
+# Changing it needs `manage.py index_route_cells --rebuild`.
+ROUTE_CELL_DEGREES = config('ROUTE_CELL_DEGREES', default=0.1, cast=float)
+
+# Most stored routes one fuel-estimate request may evaluate
+FUEL_ESTIMATE_MAX_ROUTES = config('FUEL_ESTIMATE_MAX_ROUTES', default=10000, cast=int)
+
+# Location registry usage counts are buffered per process and written once this
+# many lookups are pending or the oldest has waited this long.
+LOCATION_USAGE_FLUSH_BATCH = config('LOCATION_USAGE_FLUSH_BATCH', default=100, cast=int)
+LOCATION_USAGE_FLUSH_SECONDS = config('LOCATION_USAGE_FLUSH_SECONDS', default=60, cast=float)
+
+# Stored leg costs older than this are re-fetched by `manage.py refresh_leg_costs`
+LEG_COST_TTL_SECONDS = config('LEG_COST_TTL_SECONDS', default=7 * 24 * 3600, cast=int)
+
+# Local fuel/rest POI index (GeoJSON or Overpass JSON); empty disables it and
+# every POI lookup goes to ORS. Rebuilt in the background when the file changes.
+POI_INDEX_PATH = config('POI_INDEX_PATH', default='')
+POI_INDEX_CELL_DEGREES = config('POI_INDEX_CELL_DEGREES', default=0.05, cast=float)
+POI_INDEX_REFRESH_SECONDS = config('POI_INDEX_REFRESH_SECONDS', default=3600, cast=int)
+
+# OpenRouteService resilience: per-call timeout, circuit breaker and stale cache
+ORS_TIMEOUT_SECONDS = config('ORS_TIMEOUT_SECONDS', default=10, cast=float)
+ORS_BREAKER_FAILURE_THRESHOLD = config('ORS_BREAKER_FAILURE_THRESHOLD', default=5, cast=int)
+ORS_BREAKER_SLOW_CALL_SECONDS = config('ORS_BREAKER_SLOW_CALL_SECONDS', default=5, cast=float)
+ORS_BREAKER_RESET_SECONDS = config('ORS_BREAKER_RESET_SECONDS', default=30, cast=float)
+ORS_CACHE_FRESH_SECONDS = config('ORS_CACHE_FRESH_SECONDS', default=3600, cast=int)
+ORS_CACHE_STALE_SECONDS = config('ORS_CACHE_STALE_SECONDS', default=7 * 24 * 3600, cast=int)
+
+# Retention: rows older than this are moved to the compressed archive tables by
+# `manage.py archive_eld_logs` / `manage.py archive_routes` (still readable by id).
+ELD_LOG_RETENTION_DAYS = config('ELD_LOG_RETENTION_DAYS', default=180, cast=int)
+ROUTE_RETENTION_DAYS = config('ROUTE_RETENTION_DAYS', default=90, cast=int)
+
+# Duty-status event stream: rule sets tracked per driver (comma-separated; empty
+# means all), batch size / interval for persisting events, and SSE keep-alives.
+HOS_STREAM_RULE_SETS = config('HOS_STREAM_RULE_SETS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+HOS_STREAM_FLUSH_BATCH = config('HOS_STREAM_FLUSH_BATCH', default=500, cast=int)
+HOS_STREAM_FLUSH_SECONDS = config('HOS_STREAM_FLUSH_SECONDS', default=1.0, cast=float)
+HOS_STREAM_HEARTBEAT_SECONDS = config('HOS_STREAM_HEARTBEAT_SECONDS', default=15, cast=float)
+# SSE subscriptions and chunked uploads each hold one of the web process's
+# threads (WEB_THREADS in start.sh); past this many the stream answers 503 so
+# the rest of the API keeps its threads. An SSE response ends after the max
+# duration and EventSource clients reconnect.
+HOS_STREAM_MAX_CONNECTIONS = config('HOS_STREAM_MAX_CONNECTIONS', default=16, cast=int)
+HOS_STREAM_MAX_CONNECTION_SECONDS = config('HOS_STREAM_MAX_CONNECTION_SECONDS', default=900, cast=float)
+
+# Idempotency-Key support on the expensive POSTs: how long a stored response is
+# replayed, how long a duplicate waits for an in-flight original, and the most
+# the original may run before its claim is taken over. Purge expired records
+# with purge_idempotency_records.
+IDEMPOTENCY_TTL_SECONDS = config('IDEMPOTENCY_TTL_SECONDS', default=24 * 3600, cast=int)
+IDEMPOTENCY_WAIT_SECONDS = config('IDEMPOTENCY_WAIT_SECONDS', default=60, cast=float)
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=180, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -120,6 +218,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_cors_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'Retry-After']
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
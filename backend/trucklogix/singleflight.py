@@ -0,0 +1,95 @@
+"""
+Single-flight helper: concurrent calls sharing a key run the work only once.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Generator, Hashable
+
+# Result of a streamed call whose leader stopped before finishing
+_ABANDONED = object()
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs ``fn``; callers arriving while it is
+    still running block until it finishes and receive the same result, or
+    the same exception. Once the call completes the key is released, so a
+    later call runs ``fn`` again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, result = self._lead(key)
+        if call is None:
+            return result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._release(key, call)
+        return call.result
+
+    def stream(self, key: Hashable, fn: Callable[[], Generator]) -> Generator:
+        """
+        ``do`` for a generator function that reports progress, used as
+        ``result = yield from flight.stream(key, fn)``.
+
+        The leader passes ``fn()``'s items through as they come and its
+        return value is the result shared with every caller; callers that
+        join meanwhile get no items, only the result. A leader closed before
+        it finishes (its client went away) hands the key to a waiting caller.
+        """
+        call, result = self._lead(key)
+        if call is None:
+            return result
+
+        call.result = _ABANDONED
+        try:
+            call.result = yield from fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self._release(key, call)
+        return call.result
+
+    def _lead(self, key: Hashable):
+        """``(call, None)`` when this caller leads ``key``, otherwise ``(None, leader's result)``."""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    return call, None
+
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            if call.result is not _ABANDONED:
+                return None, call.result
+
+    def _release(self, key: Hashable, call: _Call):
+        with self._lock:
+            self._calls.pop(key, None)
+        call.event.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,201 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from .idempotency import REPLAY_HEADER, idempotent
+from .models import IdempotencyRecord
+from .singleflight import SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+    def _run_concurrently(self, flight, fn, callers=5):
+        results, errors = [], []
+        started = threading.Barrier(callers)
+
+        def call():
+            started.wait()
+            try:
+                results.append(flight.do('key', fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return object()
+
+        # Let every caller join the flight before the leader finishes
+        threading.Timer(0.2, release.set).start()
+        results, errors = self._run_concurrently(flight, work)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+    def test_error_is_raised_to_every_waiting_caller(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def work():
+            release.wait(5)
+            raise ValueError('backend down')
+
+        threading.Timer(0.2, release.set).start()
+        results, errors = self._run_concurrently(flight, work)
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_key_is_released_after_completion(self):
+        flight = SingleFlight()
+        calls = []
+
+        self.assertEqual(flight.do('key', lambda: calls.append(1) or len(calls)), 1)
+        self.assertFalse(flight.in_flight('key'))
+        self.assertEqual(flight.do('key', lambda: calls.append(1) or len(calls)), 2)
+
+    def test_stream_followers_get_only_the_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def stages():
+            calls.append(1)
+            yield 'first'
+            release.wait(5)
+            yield 'second'
+            return 'done'
+
+        leader = flight.stream('key', stages)
+        self.assertEqual(next(leader), 'first')
+        follower = []
+        thread = threading.Thread(target=lambda: follower.append(_drain(flight.stream('key', stages))))
+        thread.start()
+        # Let the follower join before the leader finishes
+        threading.Timer(0.2, release.set).start()
+        self.assertEqual(_drain(leader), (['second'], 'done'))
+        thread.join()
+
+        self.assertEqual(follower, [([], 'done')])
+        self.assertEqual(len(calls), 1)
+
+    def test_abandoned_stream_is_taken_over(self):
+        flight = SingleFlight()
+
+        def stages():
+            yield 'first'
+            return 'done'
+
+        leader = flight.stream('key', stages)
+        next(leader)
+        follower = []
+        thread = threading.Thread(target=lambda: follower.append(_drain(flight.stream('key', stages))))
+        thread.start()
+        time.sleep(0.2)
+        leader.close()
+        thread.join()
+
+        self.assertEqual(follower, [(['first'], 'done')])
+        self.assertFalse(flight.in_flight('key'))
+
+
+@override_settings(IDEMPOTENCY_WAIT_SECONDS=0.3)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.status = status.HTTP_201_CREATED
+
+        @api_view(['POST'])
+        @idempotent('test')
+        def view(request):
+            self.calls.append(request.data)
+            return Response({'call': len(self.calls)}, status=self.status)
+
+        self.view = view
+        self.factory = APIRequestFactory()
+
+    def _post(self, body, key='key-1'):
+        request = self.factory.post('/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        return self.view(request)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self._post({'a': 1})
+        retry = self._post({'a': 1})
+
+        self.assertEqual((first.status_code, first.data), (201, {'call': 1}))
+        self.assertEqual((retry.status_code, retry.data), (201, {'call': 1}))
+        self.assertNotIn(REPLAY_HEADER, first)
+        self.assertEqual(retry[REPLAY_HEADER], 'true')
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self._post({'a': 1}, key='key-2').data, {'call': 2})
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self._post({'a': 1})
+        self.assertEqual(self._post({'a': 2}).status_code, 422)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.status = status.HTTP_502_BAD_GATEWAY
+        self.assertEqual(self._post({'a': 1}).status_code, 502)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        self.status = status.HTTP_201_CREATED
+        self.assertEqual(self._post({'a': 1}).data, {'call': 2})
+
+    def test_duplicate_of_an_in_flight_request_gets_409(self):
+        self._post({'a': 1})
+        IdempotencyRecord.objects.update(
+            status_code=None, data=None, locked_until=timezone.now() + timedelta(minutes=1),
+        )
+
+        response = self._post({'a': 1})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(len(self.calls), 1)
+
+    def test_claim_of_a_dead_request_is_taken_over(self):
+        self._post({'a': 1})
+        IdempotencyRecord.objects.update(status_code=None, data=None, locked_until=timezone.now() - timedelta(seconds=1))
+
+        response = self._post({'a': 1})
+
+        self.assertEqual(response.data, {'call': 2})
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, 201)
+
+    def test_expired_record_runs_again(self):
+        self._post({'a': 1})
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self._post({'a': 1}).data, {'call': 2})
+        self.assertEqual(IdempotencyRecord.objects.count(), 1)
+
+
+def _drain(generator):
+    """``(items, return value)`` of a generator."""
+    items = []
+    while True:
+        try:
+            items.append(next(generator))
+        except StopIteration as stop:
+            return items, stop.value